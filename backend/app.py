@@ -1,6 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context, url_for
 from flask_cors import CORS
 import traceback
+import time
+import gc
 import sys
 import os
 
@@ -8,6 +10,13 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.predict import ChurnPredictor
+from src.microbatch import MicroBatcher
+from src.prediction_requests import predict_batch_request, predict_request
+from src.reason_codes import parse_explain
+from src.metrics import REGISTRY, SamplingProfiler, process_memory
+from src.stream_scoring import (read_csv_chunks, read_ndjson_chunks, score_chunks,
+                                format_csv, format_ndjson)
+from src.scoring_jobs import JobRunner, JobStore, SUCCEEDED, public_job
 import config
 
 # Initialize Flask app
@@ -22,6 +31,118 @@ except Exception as e:
     print(f"❌ Error initializing predictor: {e}")
     predictor = None
 
+# Optionally coalesce concurrent single predictions into batch calls
+batcher = None
+if predictor is not None and config.MICROBATCH_ENABLED:
+    batcher = MicroBatcher(
+        predictor.predict_batch,
+        max_batch_size=config.MICROBATCH_MAX_SIZE,
+        max_wait_ms=config.MICROBATCH_MAX_WAIT_MS
+    )
+
+# Request metrics for /api/metrics; stage timings are recorded by the predictor
+REGISTRY.enabled = config.METRICS_ENABLED
+HTTP_REQUESTS = REGISTRY.counter(
+    'churn_http_requests_total', 'HTTP requests by endpoint, method and status',
+    ['endpoint', 'method', 'status']
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    'churn_http_request_duration_seconds',
+    'Time to build the response (for /api/predict/stream, until streaming starts)',
+    ['endpoint', 'method']
+)
+REGISTRY.gauge(
+    'churn_model_info', 'Loaded model version',
+    lambda: {(predictor.model_version, predictor.artifacts.source): 1} if predictor else None,
+    ['version', 'source']
+)
+REGISTRY.gauge(
+    'churn_model_reloads_total', 'Successful model reloads in this worker',
+    lambda: predictor.reload_count if predictor else None, kind='counter'
+)
+REGISTRY.gauge(
+    'churn_prediction_cache_requests_total', 'Prediction cache lookups by result',
+    lambda: {('hit',): predictor.cache.stats()['hits'], ('miss',): predictor.cache.stats()['misses']}
+    if predictor and predictor.cache else None,
+    ['result'], kind='counter'
+)
+REGISTRY.gauge(
+    'churn_prediction_cache_size', 'Entries in the prediction cache',
+    lambda: predictor.cache.stats()['size'] if predictor and predictor.cache else None
+)
+
+def _drift_psi():
+    monitor = predictor.artifacts.drift_monitor if predictor else None
+    if monitor is None:
+        return None
+    report = monitor.report()
+    return {(col,): field['psi'] for col, field in report['fields'].items()
+            if field['status'] != 'insufficient_data'}
+
+REGISTRY.gauge(
+    'churn_feature_drift_psi', 'PSI of each input field against the training data, over the drift windows',
+    _drift_psi, ['feature']
+)
+REGISTRY.gauge(
+    'churn_shadow_agreement', 'Share of rows each challenger labels like the champion',
+    lambda: {(version,): value for version, value in predictor.shadow.agreement().items()}
+    if predictor and predictor.shadow else None,
+    ['challenger']
+)
+REGISTRY.gauge(
+    'churn_process_memory_bytes', 'Memory of this worker process (pss counts shared pages pro rata)',
+    lambda: {(kind[:-len('_mb')],): mb * 1024 * 1024 for kind, mb in process_memory().items()},
+    ['kind']
+)
+REGISTRY.gauge(
+    'churn_microbatch_queue_depth', 'Predictions waiting for the micro-batcher',
+    lambda: batcher.stats()['queue_depth'] if batcher else None
+)
+
+profiler = SamplingProfiler()
+
+def prepare_for_fork():
+    """
+    Called by gunicorn.conf.py in the master once the app is preloaded,
+    right before the workers are forked.
+    """
+    if predictor is not None:
+        predictor.prepare_for_fork()
+    # Keep the collector from writing to the headers of every inherited
+    # object in each worker, which would copy their pages
+    gc.collect()
+    gc.freeze()
+
+# Asynchronous bulk scoring jobs; the dispatcher starts on the first request
+job_runner = JobRunner(JobStore(config.JOBS_DIR), workers=config.JOB_WORKERS,
+                       poll_interval=config.JOB_POLL_INTERVAL)
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram."""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and observe its latency."""
+    if REGISTRY.enabled and 'request_start' in g:
+        endpoint = request.endpoint or 'unknown'
+        HTTP_SECONDS.observe(time.perf_counter() - g.request_start, endpoint, request.method)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    return response
+
+@app.before_request
+def start_model_watcher():
+    """Start the artifact watcher in this worker process if enabled."""
+    if predictor is not None:
+        predictor.ensure_watcher(config.MODEL_RELOAD_INTERVAL)
+
+@app.before_request
+def start_job_runner():
+    """Start scoring queued and interrupted jobs in this worker process if enabled."""
+    if predictor is not None:
+        job_runner.ensure_started()
+
 @app.route('/')
 def home():
     """Home endpoint."""
@@ -31,71 +152,100 @@ def home():
         'version': '1.0.0'
     })
 
+def health_status():
+    """Body of /api/health, shared with the async app (asgi.py)."""
+    return {
+        'status': 'healthy',
+        'model_loaded': predictor is not None,
+        'model': predictor.status() if predictor else None,
+        'decision_threshold': predictor.decision_threshold if predictor else config.DECISION_THRESHOLD,
+        'microbatch': batcher.stats() if batcher else None,
+        'prediction_cache': predictor.cache.stats() if predictor and predictor.cache else None,
+        'memory': dict(process_memory(), pid=os.getpid())
+    }
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'model_loaded': predictor is not None
-    })
+    return jsonify(health_status())
 
-@app.route('/api/predict', methods=['POST'])
-def predict():
+@app.route('/api/reload', methods=['POST'])
+def reload_model():
     """
-    Prediction endpoint.
-    Expects JSON with customer features.
+    Reload the model from disk without restarting the worker.
+    Loads and validates the current artifacts in the background and swaps
+    them in atomically. With ?wait=true the response waits for the result.
+    Also touches the reload trigger file so other workers running the
+    artifact watcher pick up the change.
     """
     if predictor is None:
         return jsonify({
             'error': 'Model not loaded. Please train the model first.'
         }), 500
     
+    if config.RELOAD_TOKEN and request.headers.get('X-Reload-Token') != config.RELOAD_TOKEN:
+        return jsonify({
+            'error': 'Invalid reload token'
+        }), 403
+    
     try:
-        # Get input data
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'error': 'No input data provided'
-            }), 400
-        
-        # Validate required fields
-        required_fields = [
-            'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
-            'PhoneService', 'MultipleLines', 'InternetService',
-            'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
-            'TechSupport', 'StreamingTV', 'StreamingMovies',
-            'Contract', 'PaperlessBilling', 'PaymentMethod',
-            'MonthlyCharges', 'TotalCharges'
-        ]
-        
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
+        config.RELOAD_TRIGGER_PATH.touch()
+    except OSError as e:
+        print(f"Could not touch reload trigger: {e}")
+    
+    if request.args.get('wait', 'false').lower() == 'true':
+        try:
+            predictor.reload()
+        except Exception as e:
             return jsonify({
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
-        
-        # Make prediction
-        result = predictor.predict(data)
-        
-        # Return result
+                'error': f'Reload failed: {str(e)}',
+                'model': predictor.status()
+            }), 500
         return jsonify({
             'success': True,
-            'prediction': result
+            'model': predictor.status()
         })
     
-    except Exception as e:
-        print(f"Error during prediction: {str(e)}")
-        print(traceback.format_exc())
+    if not predictor.reload_in_background():
+        return jsonify({
+            'error': 'A reload is already in progress'
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'status': 'reloading',
+        'active_version': predictor.model_version
+    }), 202
+
+@app.route('/api/predict', methods=['POST'])
+def predict():
+    """
+    Prediction endpoint.
+    Expects JSON with customer features. Invalid input gets a 400 listing
+    every failing field under 'fields'. With ?explain=true (and optionally
+    top_k=N) the prediction also lists its top reason codes.
+    """
+    if predictor is None:
         return jsonify({
-            'error': f'Prediction failed: {str(e)}'
+            'error': 'Model not loaded. Please train the model first.'
         }), 500
+    
+    try:
+        top_k = parse_explain(request.args)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    
+    content, status = predict_request(predictor, request.get_data(), top_k, batcher)
+    return Response(content, status=status, mimetype='application/json')
 
 @app.route('/api/predict/batch', methods=['POST'])
 def predict_batch():
     """
     Batch prediction endpoint.
-    Expects JSON with list of customer features.
+    Expects JSON with list of customer features; takes ?explain=true like
+    /api/predict.
     """
     if predictor is None:
         return jsonify({
@@ -103,68 +253,248 @@ def predict_batch():
         }), 500
     
     try:
-        # Get input data
+        top_k = parse_explain(request.args)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    
+    content, status = predict_batch_request(predictor, request.get_data(), top_k)
+    return Response(content, status=status, mimetype='application/json')
+
+@app.route('/api/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Streaming bulk prediction endpoint.
+    Expects a CSV (text/csv) or NDJSON (application/x-ndjson) request body
+    and streams one result per row back as NDJSON, or CSV with ?output=csv.
+    """
+    if predictor is None:
+        return jsonify({
+            'error': 'Model not loaded. Please train the model first.'
+        }), 500
+    
+    if request.mimetype == 'text/csv':
+        chunks = read_csv_chunks(request.stream, config.STREAM_CHUNK_SIZE)
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        chunks = read_ndjson_chunks(request.stream, config.STREAM_CHUNK_SIZE)
+    else:
+        return jsonify({
+            'error': 'Content-Type must be text/csv or application/x-ndjson'
+        }), 415
+    
+    output = request.args.get('output', 'ndjson')
+    if output not in ('csv', 'ndjson'):
+        return jsonify({
+            'error': 'output must be csv or ndjson'
+        }), 400
+    
+    def generate():
+        try:
+            results = score_chunks(predictor, chunks)
+            formatter = format_csv if output == 'csv' else format_ndjson
+            for text in formatter(results):
+                yield text
+        except Exception as e:
+            # Headers are already sent, so the error can only end the stream
+            print(f"Error during streaming prediction: {str(e)}")
+            print(traceback.format_exc())
+            raise
+    
+    mimetype = 'text/csv' if output == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a bulk scoring job.
+    Accepts {"customers": [...]}, a CSV (text/csv) or NDJSON
+    (application/x-ndjson) body, or a multipart upload in the 'file' field.
+    Returns 202 with the job id right away; poll GET /api/jobs/<id> and
+    download GET /api/jobs/<id>/results (NDJSON, or CSV with ?output=csv).
+    """
+    if predictor is None:
+        return jsonify({
+            'error': 'Model not loaded. Please train the model first.'
+        }), 500
+    
+    output = request.args.get('output', 'ndjson')
+    if output not in ('csv', 'ndjson'):
+        return jsonify({
+            'error': 'output must be csv or ndjson'
+        }), 400
+    
+    upload = request.files.get('file')
+    if upload is not None:
+        source = upload.stream
+        is_csv = upload.filename.endswith('.csv') or upload.mimetype == 'text/csv'
+        input_format = 'csv' if is_csv else 'ndjson'
+    elif request.mimetype == 'text/csv':
+        source, input_format = request.stream, 'csv'
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        source, input_format = request.stream, 'ndjson'
+    elif request.is_json:
         data = request.get_json()
-        
-        if not data or 'customers' not in data:
+        if not isinstance(data, dict) or not isinstance(data.get('customers'), list):
             return jsonify({
                 'error': 'No input data provided. Expected {"customers": [...]}'
             }), 400
-        
-        customers = data['customers']
-        
-        if not isinstance(customers, list):
+        source, input_format = data['customers'], 'ndjson'
+    else:
+        return jsonify({
+            'error': 'Send JSON, text/csv, application/x-ndjson or a multipart file'
+        }), 415
+    
+    job = job_runner.store.submit(source, input_format, output)
+    job_runner.notify()
+    return jsonify({
+        'success': True,
+        'job': public_job(job),
+        'status_url': url_for('get_job', job_id=job['id']),
+        'results_url': url_for('get_job_results', job_id=job['id'])
+    }), 202
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Most recent bulk scoring jobs."""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        'jobs': [public_job(job) for job in job_runner.store.recent(limit)]
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of a bulk scoring job."""
+    job = job_runner.store.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Job not found'
+        }), 404
+    return jsonify(public_job(job))
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+def get_job_results(job_id):
+    """Download the results of a finished bulk scoring job."""
+    store = job_runner.store
+    job = store.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Job not found'
+        }), 404
+    if job['status'] != SUCCEEDED:
+        return jsonify({
+            'error': f"Job is {job['status']}",
+            'job': public_job(job)
+        }), 409
+    
+    mimetype = 'text/csv' if job['output_format'] == 'csv' else 'application/x-ndjson'
+    return send_file(store.results_path(job), mimetype=mimetype, as_attachment=True,
+                     download_name=f"{job_id}.{job['output_format']}")
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Request, stage latency and model metrics in Prometheus text format."""
+    if not config.METRICS_ENABLED:
+        return jsonify({
+            'error': 'Metrics are disabled (METRICS_ENABLED=false)'
+        }), 404
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profile/<action>', methods=['POST'])
+def profile(action):
+    """
+    Sampling profiler toggle.
+    POST /api/profile/start?interval_ms=5 starts sampling the stacks of all
+    threads in this worker; POST /api/profile/stop stops it and returns the
+    hottest stacks plus all stacks in folded (flame graph) format.
+    """
+    if not config.PROFILER_ENABLED:
+        return jsonify({
+            'error': 'Profiler is disabled (PROFILER_ENABLED=false)'
+        }), 404
+    
+    if action == 'start':
+        try:
+            interval_ms = float(request.args.get('interval_ms', 5))
+        except ValueError:
+            interval_ms = 0
+        if interval_ms <= 0:
             return jsonify({
-                'error': 'customers must be a list'
+                'error': 'interval_ms must be a positive number'
             }), 400
-        
-        # Make predictions
-        results = predictor.predict_batch(customers)
-        
-        # Return results
+        if not profiler.start(interval_ms):
+            return jsonify({
+                'error': 'The profiler is already running'
+            }), 409
         return jsonify({
             'success': True,
-            'predictions': results,
-            'count': len(results)
-        })
+            'status': 'profiling',
+            'interval_ms': interval_ms,
+            'pid': os.getpid()
+        }), 202
     
-    except Exception as e:
-        print(f"Error during batch prediction: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({
-            'error': f'Batch prediction failed: {str(e)}'
-        }), 500
+    if action == 'stop':
+        return jsonify(dict(profiler.stop(top=request.args.get('top', 50, type=int)),
+                            pid=os.getpid()))
+    
+    return jsonify({
+        'error': 'action must be start or stop'
+    }), 404
 
 @app.route('/api/features', methods=['GET'])
 def get_features():
     """Get information about required features."""
-    feature_info = {
-        'categorical_features': {
-            'gender': ['Male', 'Female'],
-            'SeniorCitizen': ['0', '1'],
-            'Partner': ['Yes', 'No'],
-            'Dependents': ['Yes', 'No'],
-            'PhoneService': ['Yes', 'No'],
-            'MultipleLines': ['Yes', 'No', 'No phone service'],
-            'InternetService': ['DSL', 'Fiber optic', 'No'],
-            'OnlineSecurity': ['Yes', 'No', 'No internet service'],
-            'OnlineBackup': ['Yes', 'No', 'No internet service'],
-            'DeviceProtection': ['Yes', 'No', 'No internet service'],
-            'TechSupport': ['Yes', 'No', 'No internet service'],
-            'StreamingTV': ['Yes', 'No', 'No internet service'],
-            'StreamingMovies': ['Yes', 'No', 'No internet service'],
-            'Contract': ['Month-to-month', 'One year', 'Two year'],
-            'PaperlessBilling': ['Yes', 'No'],
-            'PaymentMethod': ['Electronic check', 'Mailed check', 'Bank transfer (automatic)', 'Credit card (automatic)']
-        },
-        'numerical_features': {
-            'tenure': {'min': 0, 'max': 72, 'description': 'Months with company'},
-            'MonthlyCharges': {'min': 0, 'max': 200, 'description': 'Monthly charges in dollars'},
-            'TotalCharges': {'min': 0, 'max': 10000, 'description': 'Total charges in dollars'}
-        }
-    }
+    if predictor is None:
+        return jsonify({
+            'error': 'Model not loaded. Please train the model first.'
+        }), 500
+    
+    # Categories come from the loaded encoders, ranges from config.NUMERIC_RANGES
+    feature_info = predictor.schema.describe()
     
     return jsonify(feature_info)
 
+@app.route('/api/drift', methods=['GET'])
+def drift():
+    """
+    Input drift of this worker's traffic against the training data.
+    Lists each field's PSI (and KS for numeric fields) over the last
+    DRIFT_WINDOWS windows; fields flagged as drift are listed in 'drifted'.
+    """
+    if predictor is None:
+        return jsonify({
+            'error': 'Model not loaded. Please train the model first.'
+        }), 500
+    
+    artifacts = predictor.artifacts
+    if artifacts.drift_monitor is None:
+        return jsonify({
+            'error': 'Drift monitor is off: DRIFT_MONITOR_ENABLED is false or '
+                     f'model {artifacts.version} has no drift reference; retrain to create one'
+        }), 404
+    
+    return jsonify(dict(artifacts.drift_monitor.report(),
+                        model_version=artifacts.version, pid=os.getpid()))
+
+@app.route('/api/shadow', methods=['GET'])
+def shadow():
+    """
+    Champion/challenger comparison of this worker's traffic.
+    For each challenger in CHALLENGER_BUNDLES: label agreement with the
+    champion, score deltas and shadow scoring time, plus the rows dropped
+    because the shadow queue was full.
+    """
+    if predictor is None:
+        return jsonify({
+            'error': 'Model not loaded. Please train the model first.'
+        }), 500
+    
+    if predictor.shadow is None:
+        return jsonify({
+            'error': 'No challengers loaded; set CHALLENGER_BUNDLES to shadow score bundles'
+        }), 404
+    
+    return jsonify(dict(predictor.shadow.report(), pid=os.getpid()))
+
 if __name__ == '__main__':
     app.run(host=config.API_HOST, port=config.API_PORT, debug=config.DEBUG)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Async (ASGI) entry point serving the same routes as app.py:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+Predictions run on a bounded InferencePool (see src/inference_pool.py), so
+the event loop stays free for health checks and /api/features while big
+batches are scored, and requests beyond ASYNC_MAX_PENDING get an immediate
+503 instead of queueing. The other routes are answered by the Flask app
+itself on a separate pool of ASYNC_WSGI_THREADS threads.
+"""
+import contextlib
+import os
+import sys
+import time
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as wsgi
+from src.inference_pool import InferencePool, PoolSaturated
+from src.metrics import REGISTRY
+from src.prediction_requests import predict_batch_request, predict_request
+from src.reason_codes import parse_explain
+import config
+
+pool = InferencePool(workers=config.ASYNC_INFERENCE_WORKERS,
+                     max_pending=config.ASYNC_MAX_PENDING, kind=config.ASYNC_EXECUTOR)
+
+# Pool threads share the Flask app's micro-batcher; a pool process only
+# ever has one prediction of its own to batch
+batcher = wsgi.batcher if pool.kind == 'thread' else None
+
+REGISTRY.gauge(
+    'churn_inference_pool_pending', 'Predictions admitted to the inference pool, running or waiting',
+    lambda: pool.stats()['pending']
+)
+REGISTRY.gauge(
+    'churn_inference_pool_rejected_total', 'Predictions turned away because the inference pool was full',
+    lambda: pool.stats()['rejected'], kind='counter'
+)
+
+MODEL_NOT_LOADED = {'error': 'Model not loaded. Please train the model first.'}
+
+# Native routes; see app below for the rest
+ROUTES = []
+
+
+def route(path, endpoint, methods=('GET',)):
+    """
+    Route for a native async handler, with the request metrics and CORS
+    headers the Flask app adds to its own responses.
+
+    Args:
+        endpoint (str): Name of the matching Flask view, used as the
+            metrics label
+    """
+    def decorator(handler):
+        async def wrapper(request):
+            start = time.perf_counter()
+            response = await handler(request)
+            if REGISTRY.enabled:
+                wsgi.HTTP_SECONDS.observe(time.perf_counter() - start, endpoint, request.method)
+                wsgi.HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+            origin = request.headers.get('origin')
+            if origin and ('*' in config.CORS_ORIGINS or origin in config.CORS_ORIGINS):
+                response.headers['Access-Control-Allow-Origin'] = origin
+                response.headers['Vary'] = 'Origin'
+            return response
+        ROUTES.append(Route(path, wrapper, methods=list(methods)))
+        return handler
+    return decorator
+
+
+@route('/', 'home')
+async def home(request):
+    return JSONResponse({
+        'message': 'Customer Churn Prediction API',
+        'status': 'running',
+        'version': '1.0.0'
+    })
+
+
+@route('/api/health', 'health_check')
+async def health_check(request):
+    return JSONResponse(dict(wsgi.health_status(), inference_pool=pool.stats()))
+
+
+@route('/api/features', 'get_features')
+async def get_features(request):
+    if wsgi.predictor is None:
+        return JSONResponse(MODEL_NOT_LOADED, status_code=500)
+    return JSONResponse(wsgi.predictor.schema.describe())
+
+
+@route('/api/metrics', 'metrics')
+async def metrics(request):
+    if not config.METRICS_ENABLED:
+        return JSONResponse({'error': 'Metrics are disabled (METRICS_ENABLED=false)'},
+                            status_code=404)
+    return Response(REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+
+async def _score(request, func, *args):
+    """Run a prediction request body on the pool and return its JSON response."""
+    if wsgi.predictor is None:
+        return JSONResponse(MODEL_NOT_LOADED, status_code=500)
+    try:
+        top_k = parse_explain(request.query_params)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    body = await request.body()
+    try:
+        content, status = await pool.run(func, wsgi.predictor, body, top_k, *args)
+    except PoolSaturated:
+        return JSONResponse({'error': 'Too many predictions in progress, retry shortly'},
+                            status_code=503, headers={'Retry-After': '1'})
+    return Response(content, status_code=status, media_type='application/json')
+
+
+@route('/api/predict', 'predict', methods=['POST'])
+async def predict(request):
+    return await _score(request, predict_request, batcher)
+
+
+@route('/api/predict/batch', 'predict_batch', methods=['POST'])
+async def predict_batch(request):
+    return await _score(request, predict_batch_request)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    # What app.py's before_request hooks start on the first request
+    if wsgi.predictor is not None:
+        wsgi.predictor.ensure_watcher(config.MODEL_RELOAD_INTERVAL)
+        wsgi.job_runner.ensure_started()
+    yield
+
+
+# Everything else (jobs, streaming, reload, profiling) is served by Flask
+app = Starlette(
+    routes=ROUTES + [Mount('/', app=WSGIMiddleware(wsgi.app, workers=config.ASYNC_WSGI_THREADS))],
+    lifespan=lifespan
+)
@@ -0,0 +1,391 @@
+"""
+Throughput, latency and memory benchmark suite for the prediction API.
+
+Realistic payloads are built from data/raw/churnRushi.csv: customers as a
+client sends them, cycling through the whole file. The prediction cache is
+off unless --prediction-cache is given, so runs measure scoring rather
+than cache lookups. Each target is driven with closed-loop clients through a
+matrix of runs: /api/predict at increasing concurrency, and
+/api/predict/batch at increasing batch sizes and concurrency. Targets:
+  test-client   Flask's test client in this process: the app's own cost,
+                without HTTP or a server in the way
+  flask         a local gunicorn server (app:app)
+  async         a local uvicorn server (asgi:app)
+For every run the report gives requests and rows per second, p50/p95/p99
+latency, non-200 statuses and memory (summed PSS of the server processes,
+or of this process for the test client). For /api/predict it also names
+the concurrency at which throughput saturates.
+
+Results are saved as JSON under benchmarks/results/, named after the git
+commit, so runs can be compared across commits:
+
+    python benchmarks/api_benchmark.py
+    python benchmarks/api_benchmark.py --compare benchmarks/results/<baseline>.json
+
+With --compare the exit status is 1 when a run lost more than --tolerance
+of its throughput or grew its p99 latency by more than that.
+
+Requires a trained model under config.MODEL_DIR (set the MODEL_DIR
+environment variable to benchmark another model directory).
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import process_memory
+import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+SERVERS = {
+    'flask': lambda port, workers: [sys.executable, '-m', 'gunicorn', '-w', str(workers),
+                                    '-b', f'127.0.0.1:{port}', 'app:app'],
+    'async': lambda port, workers: [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers',
+                                    str(workers), '--port', str(port), '--log-level', 'warning'],
+}
+TARGETS = ['test-client'] + list(SERVERS)
+
+# Throughput within this fraction of the best counts as saturated
+SATURATION = 0.9
+
+
+def load_customers(n=None):
+    """Customers from the raw CSV as the API receives them (no id or label)."""
+    import pandas as pd
+    df = pd.read_csv(config.RAW_DATA_PATH, nrows=n).drop(columns=['customerID', 'Churn'])
+    df = df.astype(object).where(df.notna(), '')
+    return df.to_dict(orient='records')
+
+
+class Payloads:
+    """Request bodies covering all customers, prebuilt so clients only send."""
+
+    def __init__(self, customers, batch_size=None, count=None):
+        """
+        Args:
+            batch_size (int): Customers per batch body, None for single bodies
+            count (int): Bodies to build, by default enough to cover every customer
+        """
+        size = batch_size or 1
+        count = count or -(-len(customers) // size)
+        self.bodies = []
+        for k in range(count):
+            start = (k * size) % len(customers)
+            rows = (customers[start:] + customers[:start])[:size]
+            body = rows[0] if batch_size is None else {'customers': rows}
+            self.bodies.append(json.dumps(body).encode())
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            self._next = (self._next + 1) % len(self.bodies)
+            return self.bodies[self._next]
+
+
+class Client:
+    """Keep-alive HTTP client that returns the latency and status of each request."""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            status = 'error'
+        return time.perf_counter() - start, status
+
+
+class TestClientTarget:
+    """The Flask app in this process, through its test client."""
+
+    name = 'test-client'
+
+    def __init__(self, env):
+        os.environ.update(env)
+        for name, value in env.items():
+            setattr(config, name, type(getattr(config, name))(value))
+        import app
+        if app.predictor is None:
+            raise RuntimeError(f'No model could be loaded from {config.MODEL_DIR}')
+        self.app = app.app
+
+    def client(self):
+        test_client = self.app.test_client()
+
+        class _Client:
+            def request(self, method, path, body=None):
+                start = time.perf_counter()
+                response = test_client.open(path, method=method, data=body,
+                                            content_type='application/json')
+                return time.perf_counter() - start, response.status_code
+
+        return _Client()
+
+    def memory(self):
+        return process_memory()
+
+    def stop(self):
+        pass
+
+
+def _children(pid):
+    """All descendant pids of a process."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+    return children + [grandchild for child in children for grandchild in _children(child)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ServerTarget:
+    """A local server started from backend/, in a subprocess."""
+
+    def __init__(self, name, workers, env=None, timeout=120):
+        self.name = name
+        self.port = free_port()
+        env = dict(os.environ, JOB_WORKERS='0', MODEL_RELOAD_INTERVAL='0', **(env or {}))
+        self.process = subprocess.Popen(SERVERS[name](self.port, workers), cwd=BACKEND_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while self.client().request('GET', '/api/health')[1] != 200:
+            if time.monotonic() > deadline or self.process.poll() is not None:
+                self.stop()
+                raise RuntimeError(f'{name} server did not start')
+            time.sleep(0.2)
+
+    def client(self):
+        return Client(self.port)
+
+    def memory(self):
+        """Summed memory of the server and its workers."""
+        total = {}
+        for pid in [self.process.pid] + _children(self.process.pid):
+            try:
+                memory = process_memory(pid)
+            except OSError:  # exited meanwhile
+                continue
+            for kind, mb in memory.items():
+                total[kind] = total.get(kind, 0.0) + mb
+        return total
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def summarize(samples, duration, rows_per_request=1):
+    """Throughput, latency percentiles (of 200s, in ms) and status counts of (seconds, status) samples."""
+    latencies = np.array([seconds for seconds, status in samples if status == 200]) * 1000
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    summary = {
+        'requests': len(samples),
+        'requests_per_second': round(len(latencies) / duration, 1),
+        'rows_per_second': round(len(latencies) * rows_per_request / duration, 1),
+        'statuses': statuses,
+    }
+    if len(latencies):
+        for q in (50, 95, 99):
+            summary[f'p{q}_ms'] = round(float(np.percentile(latencies, q)), 2)
+        summary['max_ms'] = round(float(latencies.max()), 2)
+    return summary
+
+
+def run(target, path, payloads, concurrency, duration, rows_per_request=1):
+    """Drive path with concurrency closed-loop clients for duration seconds."""
+    samples = []
+    stop = threading.Event()
+
+    def closed_loop():
+        client = target.client()
+        local = []
+        while not stop.is_set():
+            local.append(client.request('POST', path, payloads.next()))
+        samples.extend(local)
+
+    threads = [threading.Thread(target=closed_loop) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.perf_counter() - start, rows_per_request)
+
+
+def saturation(runs):
+    """Lowest /api/predict concurrency reaching SATURATION of the best throughput, per target."""
+    points = {}
+    for result in runs:
+        if result['endpoint'] == '/api/predict':
+            points.setdefault(result['target'], []).append(result)
+    saturated = {}
+    for target, results in points.items():
+        best = max(result['requests_per_second'] for result in results)
+        knee = min((result for result in results if result['requests_per_second'] >= SATURATION * best),
+                   key=lambda result: result['concurrency'])
+        saturated[target] = {'concurrency': knee['concurrency'], 'requests_per_second': best}
+    return saturated
+
+
+def benchmark(args):
+    customers = load_customers()
+    env = {} if args.prediction_cache else {'PREDICTION_CACHE_SIZE': '0'}
+    runs = []
+    for name in args.targets:
+        target = TestClientTarget(env) if name == 'test-client' else ServerTarget(name, args.workers, env)
+        try:
+            # Warm up caches, lazy imports and the native model fallback
+            warmup = target.client()
+            for body in Payloads(customers[:max(args.batch_sizes)], max(args.batch_sizes), 2).bodies:
+                warmup.request('POST', '/api/predict/batch', body)
+            for body in Payloads(customers, None, 20).bodies:
+                warmup.request('POST', '/api/predict', body)
+
+            cells = [('/api/predict', None, c) for c in args.concurrency]
+            cells += [('/api/predict/batch', size, c)
+                      for size in args.batch_sizes for c in args.batch_concurrency]
+            for path, batch_size, concurrency in cells:
+                result = run(target, path, Payloads(customers, batch_size), concurrency,
+                             args.duration, batch_size or 1)
+                result = dict({'target': name, 'endpoint': path, 'batch_size': batch_size,
+                               'concurrency': concurrency},
+                              **result, memory_mb={kind: round(mb, 1)
+                                                   for kind, mb in target.memory().items()})
+                runs.append(result)
+                print(f"{name:12} {path:20} batch={batch_size or 1:<5} c={concurrency:<3} "
+                      f"{result['requests_per_second']:8.1f} req/s {result['rows_per_second']:10.1f} rows/s "
+                      f"p50={result.get('p50_ms', float('nan')):8.2f} ms "
+                      f"p99={result.get('p99_ms', float('nan')):8.2f} ms", flush=True)
+        finally:
+            target.stop()
+    return runs
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Where and on what the benchmark ran, saved with the results."""
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'model_dir': str(config.MODEL_DIR),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change of each run against the matching run of a baseline.
+
+    Returns:
+        list: Descriptions of the runs that regressed by more than tolerance
+    """
+    def key(result):
+        return result['target'], result['endpoint'], result['batch_size'], result['concurrency']
+
+    before = {key(result): result for result in baseline['runs']}
+    regressions = []
+    print(f"\nAgainst {baseline['environment'].get('commit')} "
+          f"({baseline['environment'].get('created_at')}):")
+    for result in results['runs']:
+        old = before.get(key(result))
+        if old is None or not old['requests_per_second'] or 'p99_ms' not in old:
+            continue
+        throughput = result['requests_per_second'] / old['requests_per_second'] - 1
+        p99 = result.get('p99_ms', float('inf')) / old['p99_ms'] - 1
+        label = f"{result['target']} {result['endpoint']} batch={result['batch_size'] or 1} c={result['concurrency']}"
+        print(f"  {label:50} throughput {throughput:+7.1%}  p99 {p99:+7.1%}")
+        if throughput < -tolerance or p99 > tolerance:
+            regressions.append(label)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=['test-client', 'flask'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes of the servers')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64],
+                        help='Concurrent clients for /api/predict')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Rows per /api/predict/batch request')
+    parser.add_argument('--batch-concurrency', type=int, nargs='+', default=[1, 4],
+                        help='Concurrent clients for /api/predict/batch')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+    parser.add_argument('--prediction-cache', action='store_true',
+                        help='Keep the prediction cache on (repeat customers are then cache hits)')
+    parser.add_argument('-o', '--output',
+                        help='Results file, defaults to benchmarks/results/<commit>-<time>.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='Results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative throughput loss or p99 growth that counts as a regression')
+    args = parser.parse_args()
+
+    runs = benchmark(args)
+    results = {
+        'environment': environment(),
+        'settings': {key: value for key, value in vars(args).items()
+                     if key not in ('output', 'compare', 'tolerance')},
+        'saturation': saturation(runs),
+        'runs': runs,
+    }
+    for target, point in results['saturation'].items():
+        print(f"{target}: /api/predict saturates at {point['requests_per_second']} req/s "
+              f"from {point['concurrency']} concurrent clients")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"{results['environment']['commit'] or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} run(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare throughput and tail latency of the Flask (gunicorn) and async
+(uvicorn asgi:app) servers under a mixed load.
+
+Each server is started from backend/ with the same number of worker
+processes, then for --duration seconds it is sent, concurrently:
+  - single predictions from --clients closed-loop clients,
+  - --batch-rows row batches from --batch-clients closed-loop clients,
+  - a /api/health probe every --probe-interval seconds, which shows how
+    long lightweight requests wait behind the scoring.
+Per request kind, the report gives throughput, latency percentiles and
+status counts (503s from the async server's full inference pool count as
+rejected, not as latency samples).
+
+Usage:
+    python benchmarks/async_load_test.py [--workers 2] [--duration 20] [-o load.json]
+
+Requires gunicorn, uvicorn and a trained model under config.MODEL_DIR (set
+the MODEL_DIR environment variable to test another model directory).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_benchmark import SERVERS, ServerTarget, load_customers, summarize
+import config
+
+
+def run_load(server_name, args, customers):
+    """Start a server, put it under the mixed load and return its summary."""
+    server = ServerTarget(server_name, args.workers)
+    try:
+        single = json.dumps(customers[0]).encode()
+        batch = json.dumps({'customers': customers[:args.batch_rows]}).encode()
+        samples = {'single': [], 'batch': [], 'health': []}
+        stop = threading.Event()
+
+        def closed_loop(kind, path, body):
+            client = server.client()
+            while not stop.is_set():
+                samples[kind].append(client.request('POST', path, body))
+
+        def probe():
+            client = server.client()
+            while not stop.is_set():
+                samples['health'].append(client.request('GET', '/api/health'))
+                stop.wait(args.probe_interval)
+
+        threads = [threading.Thread(target=closed_loop, args=('single', '/api/predict', single))
+                   for _ in range(args.clients)]
+        threads += [threading.Thread(target=closed_loop, args=('batch', '/api/predict/batch', batch))
+                    for _ in range(args.batch_clients)]
+        threads.append(threading.Thread(target=probe))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        return {
+            'single': summarize(samples['single'], duration),
+            'batch': summarize(samples['batch'], duration, args.batch_rows),
+            'health': summarize(samples['health'], duration),
+        }
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load per server')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent single-prediction clients')
+    parser.add_argument('--batch-clients', type=int, default=2, help='Concurrent batch clients')
+    parser.add_argument('--batch-rows', type=int, default=2000, help='Rows per batch request')
+    parser.add_argument('--probe-interval', type=float, default=0.05,
+                        help='Seconds between health probes')
+    parser.add_argument('-o', '--output', default='-', help="JSON results file; '-' writes to stdout")
+    args = parser.parse_args()
+
+    customers = load_customers(args.batch_rows)
+    results = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'model_dir': str(config.MODEL_DIR),
+        'servers': {name: run_load(name, args, customers) for name in args.servers},
+    }
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure what reason codes (explain mode) add to batch scoring.
+
+For each batch size, ChurnPredictor.predict_batch is timed in-process with
+and without top_k, both alone and including the JSON encoding of the
+response, and the report gives the median seconds and the explain/plain
+ratio. The prediction cache is disabled so every run scores every row.
+
+Usage:
+    python benchmarks/explain_benchmark.py [--batch-sizes 1 100 10000 50000] [-o explain.json]
+
+Requires a trained model under config.MODEL_DIR (set the MODEL_DIR
+environment variable to benchmark another model directory).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+
+from api_benchmark import load_customers
+import config
+
+
+def _median_seconds(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def measure(predictor, customers, top_k, repeats):
+    """Median seconds of a batch without and with reason codes."""
+    result = {'rows': len(customers)}
+    for name, k in (('plain', None), ('explain', top_k)):
+        result[f'{name}_seconds'] = _median_seconds(
+            lambda: predictor.predict_batch(customers, top_k=k), repeats
+        )
+        result[f'{name}_response_seconds'] = _median_seconds(
+            lambda: json.dumps({'predictions': predictor.predict_batch(customers, top_k=k)}), repeats
+        )
+    result['ratio'] = result['explain_seconds'] / result['plain_seconds']
+    result['response_ratio'] = result['explain_response_seconds'] / result['plain_response_seconds']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10000, 50000])
+    parser.add_argument('--top-k', type=int, default=config.EXPLAIN_TOP_K)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-o', '--output', default='-', help="JSON results file; '-' writes to stdout")
+    args = parser.parse_args()
+
+    from src.predict import ChurnPredictor
+    predictor = ChurnPredictor()
+    customers = load_customers()
+
+    batches = []
+    for size in args.batch_sizes:
+        batch = (customers * -(-size // len(customers)))[:size]
+        batches.append(measure(predictor, batch, args.top_k, args.repeats))
+        print(f"{size:>6} rows: x{batches[-1]['ratio']:.2f} scoring, "
+              f"x{batches[-1]['response_ratio']:.2f} with JSON", file=sys.stderr)
+
+    results = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'model_dir': str(config.MODEL_DIR),
+        'model': predictor.status()['type'],
+        'batches': batches,
+    }
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Time create_features on a large synthetic frame, for both the encoded and
+scaled frame used in training and raw string columns, against the previous
+pandas implementation (row-wise apply for ServiceCount, pd.cut for groups).
+
+Usage:
+    python benchmarks/feature_engineering_benchmark.py [--rows 1000000] [--skip-legacy]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.feature_engineering import SERVICE_COLS, create_features
+
+
+def legacy_create_features(df):
+    """create_features as it was before the feature registry."""
+    df = df.copy()
+    df['AvgCharges'] = df['TotalCharges'] / (df['tenure'] + 1)
+    if df[SERVICE_COLS[0]].dtype == 'object':
+        df['ServiceCount'] = df[SERVICE_COLS].apply(lambda x: (x == 'Yes').sum(), axis=1)
+    else:
+        df['ServiceCount'] = df[SERVICE_COLS].sum(axis=1)
+    if df['tenure'].dtype in ['int64', 'float64']:
+        df['TenureGroup'] = pd.cut(df['tenure'], bins=[-1, 12, 24, 48, 100],
+                                   labels=[0, 1, 2, 3], include_lowest=True).cat.codes
+    if df['MonthlyCharges'].dtype in ['int64', 'float64']:
+        df['ChargeGroup'] = pd.cut(df['MonthlyCharges'], bins=[-1, 35, 70, 100, 200],
+                                   labels=[0, 1, 2, 3], include_lowest=True).cat.codes
+    return df
+
+
+def synthetic_frames(rows, seed=0):
+    """(scaled numeric frame, raw string frame) with the training columns."""
+    rng = np.random.default_rng(seed)
+    numeric = {
+        'tenure': rng.integers(0, 73, rows).astype(np.float64),
+        'MonthlyCharges': rng.uniform(18, 119, rows),
+    }
+    numeric['TotalCharges'] = numeric['tenure'] * numeric['MonthlyCharges']
+    scaled = pd.DataFrame({col: rng.standard_normal(rows) for col in SERVICE_COLS})
+    raw = pd.DataFrame({col: rng.choice(['Yes', 'No', 'No internet service'], rows)
+                        for col in SERVICE_COLS})
+    for col, values in numeric.items():
+        scaled[col] = (values - values.mean()) / values.std()
+        raw[col] = values
+    return scaled, raw
+
+
+def best_of(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Rows per frame')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='Skip the previous implementation (its row-wise apply is slow)')
+    args = parser.parse_args()
+
+    scaled, raw = synthetic_frames(args.rows)
+    results = {'rows': args.rows}
+    for name, df in [('scaled', scaled), ('raw', raw)]:
+        result = {'vectorized_seconds': best_of(create_features, df, args.repeat)}
+        if not args.skip_legacy:
+            legacy_repeat = args.repeat if name == 'scaled' else 1
+            result['legacy_seconds'] = best_of(legacy_create_features, df, legacy_repeat)
+            expected = legacy_create_features(df)
+            actual = create_features(df)
+            result['matches_legacy'] = all(
+                np.array_equal(actual[col].to_numpy(), expected[col].to_numpy())
+                for col in expected.columns
+            )
+            result['speedup'] = result['legacy_seconds'] / result['vectorized_seconds']
+        results[name] = result
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Measure total serving memory against the number of gunicorn workers, with
+the model loaded in every worker versus preloaded once in the master.
+
+For each mode and worker count a gunicorn server is started from backend/,
+sent enough single and batch predictions that every worker has served
+both (batches larger than COMPILED_MODEL_MAX_ROWS make tree models load
+their native fallback), and then measured. The total is the summed PSS of
+the master and all workers: shared pages are counted once, so it is the
+memory the node really spends on serving. The summed RSS, which counts
+shared pages in every worker, is reported alongside for comparison.
+
+Usage:
+    python benchmarks/memory_benchmark.py [--workers 1 2 4 8] [-o memory.json]
+
+Requires Linux (/proc) and a trained model under config.MODEL_DIR (set the
+MODEL_DIR environment variable to benchmark another model directory).
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import process_memory
+import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'per-worker': {'PRELOAD_WORKERS': 'false'},
+    'preloaded': {'PRELOAD_WORKERS': 'true'},
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.load(response)
+
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def _sample_customers(n):
+    import pandas as pd
+    df = pd.read_csv(config.RAW_DATA_PATH, nrows=n, dtype=str, keep_default_na=False)
+    return df.drop(columns=['customerID', 'Churn']).to_dict(orient='records')
+
+
+def measure(mode, workers, customers, batch_rows, timeout=120):
+    """Start gunicorn, warm every worker up and return the memory of the process tree."""
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, **MODES[mode], JOB_WORKERS='0', MODEL_RELOAD_INTERVAL='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                health = json.load(urllib.request.urlopen(f'{base}/api/health', timeout=5))
+                if len(_children(server.pid)) == workers:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f'gunicorn ({mode}, {workers} workers) did not start')
+            time.sleep(0.2)
+
+        # Requests land on workers at random; keep going until every worker
+        # has answered both kinds of request (or a generous cap is reached)
+        warmed = set()
+        for _ in range(workers * 50):
+            _post(f'{base}/api/predict', customers[0])
+            _post(f'{base}/api/predict/batch', {'customers': customers[:batch_rows]})
+            health = json.load(urllib.request.urlopen(f'{base}/api/health', timeout=5))
+            warmed.add(health['memory']['pid'])
+            if len(warmed) == workers:
+                break
+
+        pids = [server.pid] + _children(server.pid)
+        memory = [process_memory(pid) for pid in pids]
+        return {
+            'workers': workers,
+            'preloaded': health['model']['preloaded'],
+            'model_type': health['model']['type'],
+            'model_source': health['model']['source'],
+            'total_pss_mb': round(sum(m['pss_mb'] for m in memory), 1),
+            'total_rss_mb': round(sum(m['rss_mb'] for m in memory), 1),
+            'master_pss_mb': round(memory[0]['pss_mb'], 1),
+            'worker_pss_mb': round(sum(m['pss_mb'] for m in memory[1:]) / workers, 1),
+            'worker_private_mb': round(sum(m['private_mb'] for m in memory[1:]) / workers, 1),
+            'workers_warmed': len(warmed),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker counts to measure')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--batch-rows', type=int, default=500,
+                        help='Rows per warm-up batch request')
+    parser.add_argument('-o', '--output', default='-', help="JSON results file; '-' writes to stdout")
+    args = parser.parse_args()
+
+    customers = _sample_customers(args.batch_rows)
+    results = {
+        'model_dir': str(config.MODEL_DIR),
+        'runs': [dict(measure(mode, workers, customers, args.batch_rows), mode=mode)
+                 for mode in args.modes for workers in args.workers],
+    }
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Measure what shadow scoring with challengers adds to the champion's latency.
+
+Single predictions and batches are timed in-process with ChurnPredictor,
+first without and then with the given challenger bundles. The shadow
+process is warmed up before the timed runs. The report gives the median
+and p99 seconds of both, plus how many rows the challengers scored and
+how many were dropped because the shadow queue was full. The prediction
+cache is disabled so every run scores every row.
+
+Usage:
+    python benchmarks/shadow_benchmark.py BUNDLE_DIR [BUNDLE_DIR ...] [--requests 3000] [-o shadow.json]
+
+Requires a trained model under config.MODEL_DIR (set the MODEL_DIR
+environment variable to benchmark another model directory) and
+challenger bundles written by models/train_model.py.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+
+from api_benchmark import load_customers
+import config
+
+
+def _timings(func, items):
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {'median_seconds': statistics.median(timings),
+            'p99_seconds': timings[int(len(timings) * 0.99)]}
+
+
+def measure(predictor, customers, requests, batch_size, batches):
+    """Latency of single predictions and of batches."""
+    singles = (customers * -(-requests // len(customers)))[:requests]
+    batch = (customers * -(-batch_size // len(customers)))[:batch_size]
+    return {
+        'single': _timings(predictor.predict, singles),
+        'batch': _timings(predictor.predict_batch, [batch] * batches),
+    }
+
+
+def _wait_for_shadow(predictor, timeout=60):
+    """Score a small batch and wait until every challenger has compared it."""
+    predictor.predict_batch(load_customers()[:100])
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        challengers = predictor.shadow.report()['challengers'].values()
+        if all(challenger['rows'] or challenger['errors'] for challenger in challengers):
+            return
+        time.sleep(0.1)
+    raise RuntimeError('The shadow process did not score the warm-up batch in time')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('challengers', nargs='+', help='Challenger bundle directories')
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('-o', '--output', default='-', help="JSON results file; '-' writes to stdout")
+    args = parser.parse_args()
+
+    from src.predict import ChurnPredictor
+    customers = load_customers()
+
+    config.CHALLENGER_BUNDLES = []
+    results = {'plain': measure(ChurnPredictor(), customers, args.requests,
+                                args.batch_size, args.batches)}
+
+    config.CHALLENGER_BUNDLES = args.challengers
+    predictor = ChurnPredictor()
+    if predictor.shadow is None:
+        sys.exit('No challenger could be loaded')
+    _wait_for_shadow(predictor)
+    results['shadow'] = measure(predictor, customers, args.requests, args.batch_size, args.batches)
+    report = predictor.shadow.report()
+
+    for kind in ('single', 'batch'):
+        plain, shadow = results['plain'][kind], results['shadow'][kind]
+        print(f"{kind:>6}: median {plain['median_seconds'] * 1e3:.3f} -> "
+              f"{shadow['median_seconds'] * 1e3:.3f} ms, p99 {plain['p99_seconds'] * 1e3:.3f} -> "
+              f"{shadow['p99_seconds'] * 1e3:.3f} ms", file=sys.stderr)
+
+    results = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'model_dir': str(config.MODEL_DIR),
+        'model': predictor.status()['type'],
+        'max_pending': config.SHADOW_MAX_PENDING,
+        'latency': results,
+        'shadow_queue': report['queue'],
+        'challengers': {version: {key: challenger[key] for key in ('type', 'rows', 'agreement', 'ms_per_row')}
+                        for version, challenger in report['challengers'].items()},
+    }
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure API worker cold start: time to import app.py (which loads the
+predictor) and the resulting peak RSS, loading from the pickles versus the
+memory-mapped artifact bundle.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat 5]
+
+Both the pickles and a bundle must exist under config.MODEL_DIR (set the
+MODEL_DIR environment variable to benchmark another model directory).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+assert app.predictor is not None, 'predictor failed to load'
+print(json.dumps({
+    'seconds': elapsed,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': [m for m in ('sklearn', 'xgboost', 'pandas') if m in sys.modules],
+}))
+"""
+
+
+def measure(use_bundle, repeat):
+    env = dict(os.environ, USE_ARTIFACT_BUNDLE=str(use_bundle))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'startup_seconds': statistics.median(run['seconds'] for run in runs),
+        'max_rss_mb': statistics.median(run['max_rss_mb'] for run in runs),
+        'heavy_modules': runs[0]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Cold starts per mode')
+    args = parser.parse_args()
+
+    results = {
+        'model_dir': str(config.MODEL_DIR),
+        'pickles': measure(False, args.repeat),
+        'bundle': measure(True, args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,18 +10,144 @@ RAW_DATA_DIR = DATA_DIR / 'raw'
 PROCESSED_DATA_DIR = DATA_DIR / 'processed'
 
 # Model directory
-MODEL_DIR = BASE_DIR / 'models'
+MODEL_DIR = Path(os.getenv('MODEL_DIR', BASE_DIR / 'models'))
 
 # File paths
 RAW_DATA_PATH = RAW_DATA_DIR / 'churnRushi.csv'
-PROCESSED_DATA_PATH = PROCESSED_DATA_DIR / 'processed_data.csv'
+# Columnar cache of the processed training data (see src/processed_cache.py)
+PROCESSED_DATA_PATH = PROCESSED_DATA_DIR / 'processed_data'
 MODEL_PATH = MODEL_DIR / 'model.pkl'
 SCALER_PATH = MODEL_DIR / 'scaler.pkl'
+LABEL_ENCODERS_PATH = MODEL_DIR / 'label_encoders.pkl'
+COMPILED_MODEL_PATH = MODEL_DIR / 'compiled_model.npz'
+BUNDLE_DIR = MODEL_DIR / 'bundles'
+RELOAD_TRIGGER_PATH = MODEL_DIR / 'RELOAD'
+# Input statistics of the training data, for the drift monitor
+DRIFT_REFERENCE_PATH = MODEL_DIR / 'drift_reference.json'
 
 # Model parameters
 TEST_SIZE = 0.2
 RANDOM_STATE = 42
 
+# Training: total core budget for parallel model selection, k-fold
+# cross-validation folds (0 or 1 = single train/test split) and early
+# stopping patience for the boosted models (0 disables)
+TRAIN_N_JOBS = int(os.getenv('TRAIN_N_JOBS', os.cpu_count() or 1))
+CV_FOLDS = int(os.getenv('CV_FOLDS', 0))
+EARLY_STOPPING_ROUNDS = int(os.getenv('EARLY_STOPPING_ROUNDS', 10))
+VALIDATION_FRACTION = 0.1
+
+# Incremental training (python models/train_model.py --incremental SNAPSHOT):
+# trees or boosting rounds added per update, older rows replayed per new
+# training row, increments whose holdouts form the rolling holdout, how much
+# a gated metric may drop before the update is not published, and the
+# feature mean drift (in standard deviations) that calls for a full retrain
+INCREMENTAL_ESTIMATORS = int(os.getenv('INCREMENTAL_ESTIMATORS', 20))
+INCREMENTAL_REPLAY_RATIO = float(os.getenv('INCREMENTAL_REPLAY_RATIO', 1.0))
+INCREMENTAL_HOLDOUT_WINDOW = int(os.getenv('INCREMENTAL_HOLDOUT_WINDOW', 4))
+INCREMENTAL_TOLERANCE = float(os.getenv('INCREMENTAL_TOLERANCE', 0.005))
+INCREMENTAL_MAX_SCALER_DRIFT = float(os.getenv('INCREMENTAL_MAX_SCALER_DRIFT', 0.25))
+
+# Hyperparameter search (python models/train_model.py --search): wall-clock
+# budget in seconds (cores come from TRAIN_N_JOBS), configurations in the
+# first successive halving rung, the fraction of them kept per rung (1/eta),
+# the training fraction of the first rung, cross-validation folds, and the
+# file every trial is recorded to
+SEARCH_TIME_BUDGET = float(os.getenv('SEARCH_TIME_BUDGET', 600))
+SEARCH_TRIALS = int(os.getenv('SEARCH_TRIALS', 32))
+SEARCH_ETA = int(os.getenv('SEARCH_ETA', 3))
+SEARCH_MIN_FRACTION = float(os.getenv('SEARCH_MIN_FRACTION', 0.1))
+SEARCH_FOLDS = int(os.getenv('SEARCH_FOLDS', 3))
+SEARCH_RESULTS_PATH = MODEL_DIR / 'search_trials.jsonl'
+
+# Rows per chunk for out-of-core preprocessing of large raw files; 0 loads
+# the whole file into memory instead
+PREPROCESS_CHUNK_SIZE = int(os.getenv('PREPROCESS_CHUNK_SIZE', 0))
+
+# Serve from the memory-mapped artifact bundle (see src/artifact_bundle.py)
+# when one exists, instead of unpickling model.pkl and friends
+USE_ARTIFACT_BUNDLE = os.getenv('USE_ARTIFACT_BUNDLE', 'True').lower() == 'true'
+
+# Load the app and model once in the gunicorn master and fork the workers
+# from it, so they share the model's memory (see gunicorn.conf.py)
+PRELOAD_WORKERS = os.getenv('PRELOAD_WORKERS', 'True').lower() == 'true'
+
+# Hot reload: seconds between checks of the artifact files (0 disables the
+# watcher) and an optional token required by POST /api/reload
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 0))
+RELOAD_TOKEN = os.getenv('RELOAD_TOKEN', '')
+
+# Compiled NumPy inference (see src/compiled_model.py). Tree ensembles fall
+# back to the native model above this many rows, where its Cython code wins.
+USE_COMPILED_MODEL = os.getenv('USE_COMPILED_MODEL', 'True').lower() == 'true'
+COMPILED_MODEL_MAX_ROWS = int(os.getenv('COMPILED_MODEL_MAX_ROWS', 128))
+
+# Churn probability above which a customer is labelled as churning.
+# Lower it to trade precision for recall without retraining.
+DECISION_THRESHOLD = float(os.getenv('DECISION_THRESHOLD', 0.5))
+
+# Reason codes returned per customer by /api/predict?explain=true when the
+# request gives no top_k (see src/reason_codes.py).
+EXPLAIN_TOP_K = int(os.getenv('EXPLAIN_TOP_K', 3))
+
+# Micro-batching of concurrent /api/predict requests (see src/microbatch.py).
+# Only useful with threaded workers, e.g. gunicorn -k gthread --threads 32.
+MICROBATCH_ENABLED = os.getenv('MICROBATCH_ENABLED', 'False').lower() == 'true'
+MICROBATCH_MAX_SIZE = int(os.getenv('MICROBATCH_MAX_SIZE', 64))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv('MICROBATCH_MAX_WAIT_MS', 2.0))
+
+# Async entry point (asgi.py): predictions running at once on its inference
+# pool ('thread', or 'process' for one model copy per pool process), how many
+# may be admitted (running or waiting) before it answers 503, and threads
+# serving the routes it hands to the Flask app
+ASYNC_EXECUTOR = os.getenv('ASYNC_EXECUTOR', 'thread')
+ASYNC_INFERENCE_WORKERS = int(os.getenv('ASYNC_INFERENCE_WORKERS', 4))
+ASYNC_MAX_PENDING = int(os.getenv('ASYNC_MAX_PENDING', 64))
+ASYNC_WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', 10))
+
+# Rows per chunk for streaming bulk scoring (/api/predict/stream, src/stream_scoring.py)
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 5000))
+
+# Asynchronous bulk scoring jobs (see src/scoring_jobs.py): where jobs are
+# stored, scoring processes of the store's one dispatcher, elected among the
+# API workers by a lock file (0 leaves jobs to a standalone
+# `python src/scoring_jobs.py` worker), and when a running job that stopped
+# checkpointing is considered abandoned and resumed elsewhere
+JOBS_DIR = Path(os.getenv('JOBS_DIR', BASE_DIR / 'jobs'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+
+# In-process prediction cache (see src/prediction_cache.py); size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 10000))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', 3600))
+
+# Prometheus metrics at /api/metrics, and the on-demand sampling profiler
+# at /api/profile/* (off by default: it exposes stack traces)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False').lower() == 'true'
+
+# Input drift monitor (see src/drift_monitor.py, served at /api/drift):
+# quantile bins per numeric field in the reference saved at training, the
+# window length and number of windows kept, the rows needed before a field
+# is scored, and the PSI from which a field is flagged as warning or drift
+DRIFT_MONITOR_ENABLED = os.getenv('DRIFT_MONITOR_ENABLED', 'True').lower() == 'true'
+DRIFT_BINS = int(os.getenv('DRIFT_BINS', 20))
+DRIFT_WINDOW_SECONDS = float(os.getenv('DRIFT_WINDOW_SECONDS', 3600))
+DRIFT_WINDOWS = int(os.getenv('DRIFT_WINDOWS', 24))
+DRIFT_MIN_ROWS = int(os.getenv('DRIFT_MIN_ROWS', 200))
+DRIFT_PSI_WARNING = float(os.getenv('DRIFT_PSI_WARNING', 0.1))
+DRIFT_PSI_ALERT = float(os.getenv('DRIFT_PSI_ALERT', 0.2))
+
+# Champion/challenger shadow scoring (see src/shadow_scoring.py, served at
+# /api/shadow): comma-separated challenger bundle directories (or bundle
+# versions under BUNDLE_DIR) that score a copy of the live traffic in the
+# background, and how many scored requests may wait for them before more
+# are dropped from shadow scoring
+CHALLENGER_BUNDLES = [name for name in os.getenv('CHALLENGER_BUNDLES', '').split(',') if name]
+SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', 32))
+
 # API configuration
 API_HOST = os.getenv('API_HOST', '0.0.0.0')
 API_PORT = int(os.getenv('API_PORT', 5000))
@@ -38,4 +164,23 @@ CATEGORICAL_FEATURES = [
     'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
     'TechSupport', 'StreamingTV', 'StreamingMovies',
     'Contract', 'PaperlessBilling', 'PaymentMethod'
-]
\ No newline at end of file
+]
+
+# Raw input fields in the order the scaler was fitted on
+INPUT_FEATURES = [
+    'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure',
+    'PhoneService', 'MultipleLines', 'InternetService',
+    'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+    'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'Contract', 'PaperlessBilling', 'PaymentMethod',
+    'MonthlyCharges', 'TotalCharges'
+]
+
+# Accepted range of each numerical input, also served by /api/features
+NUMERIC_RANGES = {
+    'tenure': {'min': 0, 'max': 72, 'description': 'Months with company'},
+    'MonthlyCharges': {'min': 0, 'max': 200, 'description': 'Monthly charges in dollars'},
+    'TotalCharges': {'min': 0, 'max': 10000, 'description': 'Total charges in dollars'}
+}
+# Numerical inputs outside NUMERIC_RANGES are rejected, clipped to the range or allowed
+OUT_OF_RANGE_POLICY = os.getenv('OUT_OF_RANGE_POLICY', 'reject')
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn runs from backend/:
+
+    gunicorn -w 32 app:app
+
+With PRELOAD_WORKERS (the default) app.py, and with it the model, is
+imported once in the master process and every worker is forked from it.
+The workers then share the model's pages instead of each loading a copy;
+see app.prepare_for_fork.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Module-level names are read as settings, so don't bind the name 'config'
+from config import API_HOST, API_PORT, PRELOAD_WORKERS
+
+bind = f'{API_HOST}:{API_PORT}'
+preload_app = PRELOAD_WORKERS
+
+
+def when_ready(server):
+    if preload_app:
+        import app
+        app.prepare_for_fork()
@@ -1,11 +1,20 @@
 import sys
 import os
+import argparse
+import copy
+import json
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import (accuracy_score, precision_score, recall_score, 
@@ -15,61 +24,228 @@ from xgboost import XGBClassifier
 import warnings
 warnings.filterwarnings('ignore')
 
-from src.data_preprocessing import preprocess_data
-from src.feature_engineering import create_features
+from src.processed_cache import (PREPROCESSING_NAME, append_processed_data,
+                                 load_processed_data, processed_frame, update_increment)
+from src.columnar_store import read_columns, read_frame, read_meta
+from src.compiled_model import export_compiled_model, check_parity
+from src.artifact_bundle import write_bundle
+from src.drift_monitor import build_reference, save_reference
 import config
 
-def train_and_evaluate_models(X_train, X_test, y_train, y_test):
-    """Train multiple models and return the best one."""
+# Metrics an incremental update must not lose on the rolling holdout
+INCREMENTAL_GATE_METRICS = ['f1', 'roc_auc']
+
+# Hyperparameter search space of each candidate: a list is sampled uniformly,
+# ('log', low, high) log-uniformly and ('int', low, high) as an integer in [low, high]
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'C': ('log', 1e-3, 1e2),
+        'class_weight': [None, 'balanced'],
+    },
+    'Random Forest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 8, 12, 16],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': ['sqrt', 0.5, 1.0],
+        'class_weight': [None, 'balanced'],
+    },
+    'Gradient Boosting': {
+        'n_estimators': [100, 200, 400],
+        'learning_rate': ('log', 0.02, 0.3),
+        'max_depth': ('int', 2, 5),
+        'subsample': [0.6, 0.8, 1.0],
+        'min_samples_leaf': [1, 5, 20],
+    },
+    'XGBoost': {
+        'n_estimators': [100, 200, 400],
+        'learning_rate': ('log', 0.02, 0.3),
+        'max_depth': ('int', 2, 8),
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': ('log', 1, 10),
+        'reg_lambda': ('log', 0.1, 10),
+    },
+}
+
+# Processed data columns, scaler and CV folds of a search worker, set by _init_search_worker
+_search_data = None
+
+def build_candidates(n_jobs=1):
+    """
+    Candidate models with their default settings.
     
-    models = {
+    Args:
+        n_jobs (int): Cores each multi-threaded model (Random Forest, XGBoost) may use
+    """
+    early_stopping = config.EARLY_STOPPING_ROUNDS > 0
+    return {
         'Logistic Regression': LogisticRegression(max_iter=1000, random_state=config.RANDOM_STATE),
-        'Random Forest': RandomForestClassifier(n_estimators=100, random_state=config.RANDOM_STATE),
-        'Gradient Boosting': GradientBoostingClassifier(n_estimators=100, random_state=config.RANDOM_STATE),
-        'XGBoost': XGBClassifier(n_estimators=100, random_state=config.RANDOM_STATE, eval_metric='logloss')
+        'Random Forest': RandomForestClassifier(n_estimators=100, random_state=config.RANDOM_STATE,
+                                                n_jobs=n_jobs),
+        'Gradient Boosting': GradientBoostingClassifier(
+            n_estimators=100, random_state=config.RANDOM_STATE,
+            n_iter_no_change=config.EARLY_STOPPING_ROUNDS if early_stopping else None,
+            validation_fraction=config.VALIDATION_FRACTION
+        ),
+        'XGBoost': XGBClassifier(
+            n_estimators=100, random_state=config.RANDOM_STATE, eval_metric='logloss',
+            n_jobs=n_jobs,
+            early_stopping_rounds=config.EARLY_STOPPING_ROUNDS if early_stopping else None
+        )
+    }
+
+def fit_model(model, X_train, y_train, **fit_params):
+    """Fit a candidate, holding out a validation split when XGBoost early-stops."""
+    if getattr(model, 'early_stopping_rounds', None):
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X_train, y_train, test_size=config.VALIDATION_FRACTION,
+            random_state=config.RANDOM_STATE, stratify=y_train
+        )
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False, **fit_params)
+    else:
+        model.fit(X_train, y_train, **fit_params)
+    return model
+
+def warm_start_model(model, X_train, y_train, n_estimators=None):
+    """
+    Continue training a copy of a fitted model on new rows.
+    
+    Boosted models get n_estimators more rounds fitted to the residuals of
+    the existing ones, a Random Forest gets n_estimators more trees grown
+    on the new rows, and Logistic Regression restarts its solver from the
+    current coefficients. The fitted model is left untouched.
+    
+    Args:
+        n_estimators (int): Rounds or trees to add, defaults to
+            config.INCREMENTAL_ESTIMATORS
+    """
+    n_estimators = n_estimators or config.INCREMENTAL_ESTIMATORS
+    model = copy.deepcopy(model)
+    if isinstance(model, XGBClassifier):
+        booster = model.get_booster()
+        model.set_params(n_estimators=n_estimators)
+        return fit_model(model, X_train, y_train, xgb_model=booster)
+    
+    if isinstance(model, GradientBoostingClassifier):
+        model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_estimators)
+    elif isinstance(model, RandomForestClassifier):
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_estimators)
+    elif isinstance(model, LogisticRegression):
+        model.set_params(warm_start=True)
+    else:
+        raise ValueError(f'Cannot warm-start a {type(model).__name__}; run a full retrain')
+    model.fit(X_train, y_train)
+    # A later fit on this model starts from scratch again
+    model.set_params(warm_start=False)
+    return model
+
+def evaluate_model(model, X_test, y_test):
+    """Classification metrics of a fitted model on a held-out set."""
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    return {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred),
+        'recall': recall_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred),
+        'roc_auc': roc_auc_score(y_test, y_pred_proba)
     }
+
+def _fit_and_score(model, X_train, X_test, y_train, y_test, return_model=True):
+    """
+    Worker task: fit one model on one split and score it.
+    
+    Runs in a fresh process, so its peak RSS is the memory this model needed.
+    """
+    start = time.perf_counter()
+    fit_model(model, X_train, y_train)
+    metrics = evaluate_model(model, X_test, y_test)
+    metrics['fit_seconds'] = time.perf_counter() - start
+    metrics['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return (model if return_model else None), metrics
+
+def _run_tasks(tasks, workers):
+    """Run (key, args) tasks on a process pool and return {key: result}."""
+    # One task per process keeps each task's peak RSS separate
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             max_tasks_per_child=1) as executor:
+        futures = {key: executor.submit(_fit_and_score, *args) for key, args in tasks}
+        return {key: future.result() for key, future in futures.items()}
+
+def train_and_evaluate_models(X_train, X_test, y_train, y_test, n_jobs=None, cv_folds=None):
+    """
+    Train multiple models in parallel and return the best one.
+    
+    Candidates are fitted on a process pool limited to n_jobs cores in
+    total. With cv_folds > 1 the pick is the best mean F1 over stratified
+    k-fold cross-validation of the training set (all folds run in
+    parallel) and the winner is then refitted on the whole training set;
+    otherwise each candidate is scored once on the test set.
     
-    results = {}
+    Args:
+        n_jobs (int): Core budget, defaults to config.TRAIN_N_JOBS
+        cv_folds (int): Number of folds, defaults to config.CV_FOLDS
+    """
+    n_jobs = max(1, n_jobs or config.TRAIN_N_JOBS)
+    cv_folds = config.CV_FOLDS if cv_folds is None else cv_folds
+    names = list(build_candidates())
     
-    print("Training and evaluating models...\n")
+    if cv_folds > 1:
+        folds = list(StratifiedKFold(n_splits=cv_folds, shuffle=True,
+                                     random_state=config.RANDOM_STATE).split(X_train, y_train))
+        n_tasks = len(names) * len(folds)
+    else:
+        n_tasks = len(names)
+    
+    # Split the core budget between parallel tasks and threads per model
+    workers = min(n_jobs, n_tasks)
+    candidates = build_candidates(n_jobs=max(1, n_jobs // workers))
+    
+    print(f"Training and evaluating models on {workers} parallel worker(s), "
+          f"{n_jobs} core(s) in total...\n")
     print("-" * 80)
     
-    for name, model in models.items():
-        print(f"\nTraining {name}...")
-        
-        # Train model
-        model.fit(X_train, y_train)
-        
-        # Predictions
-        y_pred = model.predict(X_test)
-        y_pred_proba = model.predict_proba(X_test)[:, 1]
-        
-        # Metrics
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred)
-        recall = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        roc_auc = roc_auc_score(y_test, y_pred_proba)
-        
-        results[name] = {
-            'model': model,
-            'accuracy': accuracy,
-            'precision': precision,
-            'recall': recall,
-            'f1': f1,
-            'roc_auc': roc_auc
-        }
-        
-        print(f"Accuracy: {accuracy:.4f}")
-        print(f"Precision: {precision:.4f}")
-        print(f"Recall: {recall:.4f}")
-        print(f"F1 Score: {f1:.4f}")
-        print(f"ROC AUC: {roc_auc:.4f}")
+    if cv_folds > 1:
+        tasks = [
+            ((name, k), (clone(candidates[name]),
+                         X_train.iloc[train_idx], X_train.iloc[val_idx],
+                         y_train.iloc[train_idx], y_train.iloc[val_idx], False))
+            for name in names for k, (train_idx, val_idx) in enumerate(folds)
+        ]
+        fold_results = _run_tasks(tasks, workers)
+        results = {}
+        for name in names:
+            runs = [fold_results[(name, k)][1] for k in range(len(folds))]
+            results[name] = {key: float(np.mean([run[key] for run in runs])) for key in runs[0]}
+            results[name]['fit_seconds'] = float(np.sum([run['fit_seconds'] for run in runs]))
+            results[name]['peak_rss_mb'] = float(np.max([run['peak_rss_mb'] for run in runs]))
+    else:
+        tasks = [(name, (candidates[name], X_train, X_test, y_train, y_test)) for name in names]
+        results = {}
+        for name, (model, metrics) in _run_tasks(tasks, workers).items():
+            results[name] = dict(metrics, model=model)
+    
+    scope = f"{cv_folds}-fold CV mean" if cv_folds > 1 else "test set"
+    for name in names:
+        metrics = results[name]
+        print(f"\n{name} ({scope}):")
+        print(f"Accuracy: {metrics['accuracy']:.4f}")
+        print(f"Precision: {metrics['precision']:.4f}")
+        print(f"Recall: {metrics['recall']:.4f}")
+        print(f"F1 Score: {metrics['f1']:.4f}")
+        print(f"ROC AUC: {metrics['roc_auc']:.4f}")
+        print(f"Wall time: {metrics['fit_seconds']:.2f}s, peak memory: {metrics['peak_rss_mb']:.0f} MB")
     
     print("\n" + "-" * 80)
     
     # Find best model based on F1 score
     best_model_name = max(results, key=lambda x: results[x]['f1'])
+    
+    if cv_folds > 1:
+        print(f"\nRefitting {best_model_name} on the full training set...")
+        refit = build_candidates(n_jobs=n_jobs)[best_model_name]
+        results[best_model_name]['model'] = fit_model(refit, X_train, y_train)
     best_model = results[best_model_name]['model']
     
     print(f"\nBest Model: {best_model_name}")
@@ -77,26 +253,231 @@ def train_and_evaluate_models(X_train, X_test, y_train, y_test):
     
     return best_model, results
 
-def main():
-    """Main training pipeline."""
+def sample_params(space, rng):
+    """Draw one configuration from a SEARCH_SPACES entry."""
+    params = {}
+    for name, values in space.items():
+        if isinstance(values, list):
+            params[name] = values[rng.integers(len(values))]
+        elif values[0] == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(values[1]), np.log(values[2]))))
+        else:
+            params[name] = int(rng.integers(values[1], values[2] + 1))
+    return params
+
+def _init_search_worker(cache_path, folds):
+    global _search_data
+    scaler = joblib.load(Path(cache_path) / PREPROCESSING_NAME)['scaler']
+    _search_data = (read_columns(cache_path), scaler, folds)
+
+def _search_trial(name, params, fraction, threads):
+    """
+    Worker task: cross-validate one configuration on a fraction of each fold.
     
-    print("Starting model training pipeline...\n")
+    Every trial of a rung trains on the same stratified subsample of each
+    fold's training rows and is scored on the whole validation fold.
+    """
+    columns, scaler, folds = _search_data
+    y = columns['Churn']
+    start = time.perf_counter()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    runs = []
+    train_rows = 0
+    try:
+        for train_idx, val_idx in folds:
+            if fraction < 1.0:
+                train_idx, _ = train_test_split(train_idx, train_size=fraction, stratify=y[train_idx],
+                                                random_state=config.RANDOM_STATE)
+            X_fit, y_fit = _rows(columns, scaler, np.sort(train_idx))
+            X_val, y_val = _rows(columns, scaler, val_idx)
+            model = build_candidates(n_jobs=threads)[name].set_params(**params)
+            runs.append(evaluate_model(fit_model(model, X_fit, y_fit), X_val, y_val))
+            train_rows += len(train_idx)
+        result = {'status': 'completed',
+                  'metrics': {key: float(np.mean([run[key] for run in runs])) for key in runs[0]}}
+    except Exception as e:
+        result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    result.update({
+        'train_rows': train_rows,
+        'fit_seconds': time.perf_counter() - start,
+        'cpu_seconds': (after.ru_utime + after.ru_stime) - (usage.ru_utime + usage.ru_stime),
+    })
+    return result
+
+def search_models(cache_path, train_rows, n_jobs=None, budget=None, trials=None, eta=None,
+                  min_fraction=None, results_path=None):
+    """
+    Successive halving search over the candidates' SEARCH_SPACES.
+    
+    The first rung cross-validates `trials` configurations, spread evenly
+    over the candidates and including each one's defaults, on
+    min_fraction of every fold's training rows; each following rung keeps
+    the best 1/eta of them by F1 and trains on eta times as many rows, up
+    to the whole folds. Trials run in parallel on a process pool within
+    the n_jobs core budget. Its workers memory-map the processed data cache
+    and receive the folds once, so a trial only sends its parameters.
+    
+    The search stops when the wall-clock budget runs out, cutting short
+    the trials still running. Every trial of every rung is appended to
+    results_path as a JSON line with its parameters, metrics and cost.
+    
+    Args:
+        cache_path (Path): Processed data cache, as built by load_processed_data
+        train_rows (ndarray): Rows of the cache to search on
+        n_jobs (int): Core budget, defaults to config.TRAIN_N_JOBS
+        budget (float): Wall-clock seconds, defaults to config.SEARCH_TIME_BUDGET
+        trials (int): Configurations in the first rung, defaults to config.SEARCH_TRIALS
+        eta (int): Rung reduction factor, defaults to config.SEARCH_ETA
+        min_fraction (float): Training fraction of the first rung, defaults
+            to config.SEARCH_MIN_FRACTION
+        results_path (Path): JSON lines file, defaults to config.SEARCH_RESULTS_PATH
+    
+    Returns:
+        tuple: (candidate name, parameters, trial records) of the best
+        configuration of the highest rung reached
+    
+    Raises:
+        RuntimeError: No trial completed within the budget
+    """
+    n_jobs = max(1, n_jobs or config.TRAIN_N_JOBS)
+    budget = config.SEARCH_TIME_BUDGET if budget is None else budget
+    trials = trials or config.SEARCH_TRIALS
+    eta = max(2, eta or config.SEARCH_ETA)
+    min_fraction = min_fraction or config.SEARCH_MIN_FRACTION
+    results_path = Path(results_path or config.SEARCH_RESULTS_PATH)
+    deadline = time.perf_counter() + budget
+    
+    fractions = [1.0]
+    while fractions[0] / eta >= min_fraction:
+        fractions.insert(0, fractions[0] / eta)
+    
+    names = list(SEARCH_SPACES)
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    configs = [(names[i % len(names)], {} if i < len(names) else
+                sample_params(SEARCH_SPACES[names[i % len(names)]], rng))
+               for i in range(max(trials, len(names)))]
+    
+    y = np.asarray(read_columns(cache_path)['Churn'])[train_rows]
+    folds = [(train_rows[train_idx], train_rows[val_idx]) for train_idx, val_idx in
+             StratifiedKFold(n_splits=config.SEARCH_FOLDS, shuffle=True,
+                             random_state=config.RANDOM_STATE).split(train_rows, y)]
+    
+    workers = min(n_jobs, len(configs))
+    threads = max(1, n_jobs // workers)
+    search_id = time.strftime('%Y%m%d-%H%M%S')
+    print(f"Successive halving over {len(configs)} configurations, rungs at "
+          f"{', '.join(f'{fraction:.0%}' for fraction in fractions)} of the training folds, "
+          f"{workers} parallel worker(s), {budget:.0f}s budget...")
+    
+    records = []
+    alive = list(range(len(configs)))
+    context = multiprocessing.get_context('spawn')
+    pool = context.Pool(workers, initializer=_init_search_worker, initargs=(cache_path, folds))
+    try:
+        for rung, fraction in enumerate(fractions):
+            if time.perf_counter() >= deadline:
+                break
+            pending = {trial: pool.apply_async(_search_trial, (*configs[trial], fraction, threads))
+                       for trial in alive}
+            results = {}
+            for trial, async_result in pending.items():
+                try:
+                    results[trial] = async_result.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except multiprocessing.TimeoutError:
+                    results[trial] = {'status': 'stopped', 'error': 'search budget exhausted'}
+            
+            completed = sorted((trial for trial in alive if results[trial]['status'] == 'completed'),
+                               key=lambda trial: -results[trial]['metrics']['f1'])
+            promoted = set(completed[:max(1, len(alive) // eta)]) if rung + 1 < len(fractions) else set()
+            rung_records = []
+            for trial in alive:
+                name, params = configs[trial]
+                rung_records.append(dict(
+                    search_id=search_id, trial=trial, model=name, params=params, rung=rung,
+                    fraction=fraction, promoted=trial in promoted, **results[trial]
+                ))
+            with open(results_path, 'a') as f:
+                for record in rung_records:
+                    f.write(json.dumps(record) + '\n')
+            records.extend(rung_records)
+            
+            if completed:
+                best = results[completed[0]]
+                print(f"Rung {rung} ({fraction:.0%} of rows): {len(completed)}/{len(alive)} trials "
+                      f"completed, best {configs[completed[0]][0]} F1 {best['metrics']['f1']:.4f}")
+            if any(result['status'] == 'stopped' for result in results.values()):
+                break
+            alive = [trial for trial in completed if trial in promoted]
+    finally:
+        # Kills trials still running past the budget
+        pool.terminate()
+        pool.join()
+    
+    finished = [record for record in records if record['status'] == 'completed']
+    if not finished:
+        raise RuntimeError(f'No search trial completed within {budget:.0f}s; raise the budget')
+    best = max(finished, key=lambda record: (record['rung'], record['metrics']['f1']))
+    return best['model'], best['params'], records
+
+def save_artifacts(model, scaler, label_encoders, X_check, reference_inputs=None):
+    """
+    Save a model and its preprocessing objects, and publish a serving bundle.
+    
+    The compiled model carries the reason-code contribution tables of every
+    tree leaf, or for Logistic Regression the X_check feature means its
+    contributions are measured from.
+    
+    Args:
+        X_check (DataFrame): Rows to check the compiled model against the model on
+        reference_inputs (DataFrame): Encoded, unscaled inputs of the
+            training rows, as stored in the processed data cache, whose
+            statistics the drift monitor compares live traffic with
+    """
+    # Save model and preprocessing objects
+    print(f"\nSaving model to {config.MODEL_PATH}")
+    joblib.dump(model, config.MODEL_PATH)
+    
+    print(f"Saving scaler to {config.SCALER_PATH}")
+    joblib.dump(scaler, config.SCALER_PATH)
+    
+    # Save label encoders
+    print(f"Saving label encoders to {config.LABEL_ENCODERS_PATH}")
+    joblib.dump(label_encoders, config.LABEL_ENCODERS_PATH)
+    
+    # Export the NumPy inference engine and check it against the model
+    print(f"Saving compiled model to {config.COMPILED_MODEL_PATH}")
+    compiled = export_compiled_model(model, config.COMPILED_MODEL_PATH, reference=X_check)
+    parity = check_parity(compiled, model, X_check)
+    print(f"Compiled model parity on held-out data: max |Δp| = {parity['max_abs_diff']:.2e}, "
+          f"label agreement = {parity['label_agreement']:.2%}")
+    
+    drift_reference = None
+    if reference_inputs is not None:
+        print(f"Saving drift reference to {config.DRIFT_REFERENCE_PATH}")
+        drift_reference = build_reference(reference_inputs, label_encoders)
+        save_reference(drift_reference, config.DRIFT_REFERENCE_PATH)
     
+    # Memory-mappable bundle the API workers load at startup
+    bundle_dir = write_bundle(model, scaler, label_encoders, reference=X_check,
+                              drift_reference=drift_reference)
+    print(f"Saving artifact bundle to {bundle_dir}")
+    return bundle_dir
+
+def _load_split():
+    """Processed data from the cache, split into train and test sets."""
     # Create directories if they don't exist
     config.MODEL_DIR.mkdir(parents=True, exist_ok=True)
     config.PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
     
     # Load and preprocess data
     print("Loading and preprocessing data...")
-    df, label_encoders, scaler = preprocess_data(config.RAW_DATA_PATH, fit=True)
-    
-    # Create additional features
-    print("Creating features...")
-    df = create_features(df)
-    
-    # Save processed data
-    df.to_csv(config.PROCESSED_DATA_PATH, index=False)
-    print(f"Processed data saved to {config.PROCESSED_DATA_PATH}")
+    # Refit the scaling on any snapshots appended since the last full retrain
+    df, label_encoders, scaler, cache_hit = load_processed_data(refit=True)
+    if cache_hit:
+        print(f"Loaded processed data from cache {config.PROCESSED_DATA_PATH}")
+    else:
+        print(f"Processed data saved to {config.PROCESSED_DATA_PATH}")
     
     # Split features and target
     X = df.drop('Churn', axis=1)
@@ -112,11 +493,10 @@ def main():
     
     print(f"\nTrain set size: {X_train.shape}")
     print(f"Test set size: {X_test.shape}")
-    
-    # Train and evaluate models
-    best_model, results = train_and_evaluate_models(X_train, X_test, y_train, y_test)
-    
-    # Final evaluation on best model
+    return X_train, X_test, y_train, y_test, scaler, label_encoders
+
+def _evaluate_and_save(best_model, X_train, X_test, y_test, scaler, label_encoders):
+    """Report the chosen model on the test set and save its artifacts."""
     print("\n" + "=" * 80)
     print("FINAL MODEL EVALUATION")
     print("=" * 80)
@@ -128,22 +508,205 @@ def main():
     print("\nConfusion Matrix:")
     print(confusion_matrix(y_test, y_pred))
     
-    # Save model and preprocessing objects
-    print(f"\nSaving model to {config.MODEL_PATH}")
-    joblib.dump(best_model, config.MODEL_PATH)
-    
-    print(f"Saving scaler to {config.SCALER_PATH}")
-    joblib.dump(scaler, config.SCALER_PATH)
-    
-    # Save label encoders
-    encoders_path = config.MODEL_DIR / 'label_encoders.pkl'
-    print(f"Saving label encoders to {encoders_path}")
-    joblib.dump(label_encoders, encoders_path)
+    reference_inputs = read_frame(config.PROCESSED_DATA_PATH).iloc[X_train.index]
+    save_artifacts(best_model, scaler, label_encoders, X_test, reference_inputs)
     
     print("\n✅ Training completed successfully!")
     print(f"Model accuracy: {accuracy_score(y_test, y_pred):.4f}")
+
+def main():
+    """Main training pipeline."""
     
+    print("Starting model training pipeline...\n")
+    X_train, X_test, y_train, y_test, scaler, label_encoders = _load_split()
+    
+    # Train and evaluate models
+    best_model, results = train_and_evaluate_models(X_train, X_test, y_train, y_test)
+    
+    _evaluate_and_save(best_model, X_train, X_test, y_test, scaler, label_encoders)
     return best_model, scaler, label_encoders
 
+def train_with_search(budget=None, trials=None):
+    """
+    Training pipeline with a hyperparameter search instead of the defaults.
+    
+    Runs search_models on the training split, recording every trial to
+    config.SEARCH_RESULTS_PATH, then refits the winning configuration on
+    the whole training split with all TRAIN_N_JOBS cores and saves it
+    like main() does. The refit is not counted in the search budget.
+    """
+    print("Starting model training pipeline with hyperparameter search...\n")
+    X_train, X_test, y_train, y_test, scaler, label_encoders = _load_split()
+    
+    print()
+    start = time.perf_counter()
+    name, params, records = search_models(config.PROCESSED_DATA_PATH, X_train.index.to_numpy(),
+                                          budget=budget, trials=trials)
+    print(f"\nSearched {len({record['trial'] for record in records})} configurations in "
+          f"{time.perf_counter() - start:.1f}s, {len(records)} trials recorded to "
+          f"{config.SEARCH_RESULTS_PATH}")
+    print(f"Best Model: {name} {params}")
+    
+    best_model = build_candidates(n_jobs=config.TRAIN_N_JOBS)[name].set_params(**params)
+    fit_model(best_model, X_train, y_train)
+    _evaluate_and_save(best_model, X_train, X_test, y_test, scaler, label_encoders)
+    return best_model, scaler, label_encoders
+
+def rolling_holdout(y, increments, window=None):
+    """
+    Split the appended increments into training and holdout rows.
+    
+    Each increment holds out its own stratified holdout_fraction of rows;
+    the holdout is the union of those of the last window increments, so it
+    always covers the most recent customers and none of its rows has been
+    trained on. Increments marked 'refit' were trained on by a full
+    retrain and are left out.
+    
+    Args:
+        y (ndarray): Churn column of the processed data
+        increments (list): Increment records from the cache's meta.json
+        window (int): Increments in the holdout, defaults to
+            config.INCREMENTAL_HOLDOUT_WINDOW
+    
+    Returns:
+        tuple: (training rows of the last increment, holdout rows)
+    """
+    window = window or config.INCREMENTAL_HOLDOUT_WINDOW
+    holdout = []
+    train_idx = np.empty(0, dtype=np.int64)
+    increments = [increment for increment in increments if not increment.get('refit')]
+    for increment in increments[-window:]:
+        idx = np.arange(increment['start'], increment['start'] + increment['rows'])
+        if len(idx) < 2:
+            train_idx, holdout_idx = idx, idx[:0]
+        else:
+            split = dict(test_size=increment['holdout_fraction'], random_state=config.RANDOM_STATE)
+            try:
+                train_idx, holdout_idx = train_test_split(idx, stratify=y[idx], **split)
+            except ValueError:
+                # Too few rows of a class to stratify
+                train_idx, holdout_idx = train_test_split(idx, **split)
+        holdout.append(np.sort(holdout_idx))
+    return np.sort(train_idx), np.concatenate(holdout) if holdout else train_idx[:0]
+
+def _rows(columns, scaler, idx):
+    """Features and target of some rows of the processed data columns."""
+    df = processed_frame(columns, scaler, idx)
+    return df.drop('Churn', axis=1), df['Churn']
+
+def train_incremental(snapshot_path, cache_path=None, n_estimators=None):
+    """
+    Incremental training pipeline: update the published model with a snapshot of new customers.
+    
+    The snapshot's rows are appended to the processed data cache, and the
+    current model is warm-started on the new training rows plus a replay
+    sample of INCREMENTAL_REPLAY_RATIO as many older rows, so it doesn't
+    forget the history. The old and updated models are then scored on the
+    rolling holdout of recent increments, and the update is only published
+    (model.pkl, compiled model and a new bundle version) if no metric in
+    INCREMENTAL_GATE_METRICS drops by more than INCREMENTAL_TOLERANCE.
+    Nothing is published either when the running scaler statistics have
+    drifted by more than INCREMENTAL_MAX_SCALER_DRIFT standard deviations,
+    since a full retrain is then needed to refit the scaling; it refits the
+    encoders and scaler over the raw CSV and every appended snapshot.
+    
+    Work scales with the size of the snapshot, not with the history. The
+    outcome is recorded on the increment in the cache's meta.json, and a
+    snapshot that was already applied is not applied twice.
+    
+    Returns:
+        dict: The increment record, with the outcome
+    """
+    start = time.perf_counter()
+    cache_path = Path(cache_path or config.PROCESSED_DATA_PATH)
+    
+    print(f"Appending {snapshot_path} to the processed data...")
+    increment, appended = append_processed_data(snapshot_path, cache_path)
+    if 'published' in increment:
+        print(f"Snapshot was already applied on {increment['appended_at']}, nothing to do")
+        return increment
+    if appended:
+        print(f"Appended {increment['rows']} rows after the first {increment['start']}")
+    
+    def finish(**outcome):
+        outcome['seconds'] = time.perf_counter() - start
+        record = update_increment(increment['sha256'], cache_path, **outcome)
+        verdict = "✅ Published" if record['published'] else "❌ Not published"
+        print(f"\n{verdict}: {record['reason']} ({record['seconds']:.2f}s)")
+        return record
+    
+    drift = increment['scaler_drift']
+    print(f"Scaler drift: {drift:.3f} standard deviations")
+    if drift > config.INCREMENTAL_MAX_SCALER_DRIFT:
+        return finish(published=False, reason=(
+            f"feature means drifted {drift:.3f} standard deviations from the scaler "
+            f"(limit {config.INCREMENTAL_MAX_SCALER_DRIFT}); run a full retrain"
+        ))
+    
+    increments = read_meta(cache_path)['increments']
+    preprocessing = joblib.load(cache_path / PREPROCESSING_NAME)
+    columns = read_columns(cache_path)
+    train_idx, holdout_idx = rolling_holdout(columns['Churn'], increments)
+    
+    # Replay a sample of older rows, none of them from the holdout
+    n_replay = int(round(config.INCREMENTAL_REPLAY_RATIO * len(train_idx)))
+    replay_idx = np.empty(0, dtype=np.int64)
+    if n_replay and increment['start']:
+        rng = np.random.default_rng([config.RANDOM_STATE, len(increments)])
+        sample = rng.choice(increment['start'], replace=False,
+                            size=min(increment['start'], n_replay + len(holdout_idx)))
+        replay_idx = np.sort(sample[~np.isin(sample, holdout_idx)][:n_replay])
+    
+    scaler = preprocessing['scaler']
+    X_train, y_train = _rows(columns, scaler, np.concatenate([train_idx, replay_idx]))
+    X_holdout, y_holdout = _rows(columns, scaler, holdout_idx)
+    print(f"Training rows: {len(train_idx)} new + {len(replay_idx)} replayed, "
+          f"rolling holdout: {len(holdout_idx)} rows")
+    outcome = {'train_rows': len(train_idx), 'replay_rows': len(replay_idx),
+               'holdout_rows': len(holdout_idx)}
+    if y_holdout.nunique() < 2 or y_train.nunique() < 2:
+        return finish(published=False, reason='too few rows of each class to train and evaluate',
+                      **outcome)
+    
+    model = joblib.load(config.MODEL_PATH)
+    outcome['model_type'] = type(model).__name__
+    candidate = warm_start_model(model, X_train, y_train, n_estimators)
+    current_metrics = evaluate_model(model, X_holdout, y_holdout)
+    candidate_metrics = evaluate_model(candidate, X_holdout, y_holdout)
+    outcome['metrics'] = {'current': current_metrics, 'candidate': candidate_metrics}
+    
+    print(f"\n{outcome['model_type']} on the rolling holdout:")
+    for name in current_metrics:
+        print(f"{name}: {current_metrics[name]:.4f} -> {candidate_metrics[name]:.4f}")
+    
+    regressions = [name for name in INCREMENTAL_GATE_METRICS
+                   if candidate_metrics[name] < current_metrics[name] - config.INCREMENTAL_TOLERANCE]
+    if regressions:
+        return finish(published=False, reason=f"{', '.join(regressions)} dropped on the rolling holdout",
+                      **outcome)
+    
+    # The drift reference covers every cached training row, not just this update's sample
+    reference_rows = np.setdiff1d(np.arange(len(columns['Churn'])), holdout_idx)
+    reference_inputs = pd.DataFrame({col: values[reference_rows] for col, values in columns.items()})
+    bundle_dir = save_artifacts(candidate, scaler, preprocessing['label_encoders'],
+                                X_holdout, reference_inputs)
+    return finish(published=True, reason='metrics held on the rolling holdout',
+                  bundle=bundle_dir.name, **outcome)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the churn prediction model')
+    parser.add_argument('--incremental', metavar='SNAPSHOT',
+                        help='CSV of new labelled customers to update the published model with, '
+                             'instead of retraining from scratch')
+    parser.add_argument('--search', action='store_true',
+                        help='Search each candidate\'s hyperparameters by successive halving '
+                             'instead of training the defaults')
+    parser.add_argument('--budget', type=float, help='Search wall-clock budget in seconds')
+    parser.add_argument('--trials', type=int, help='Configurations in the first search rung')
+    args = parser.parse_args()
+    if args.incremental:
+        train_incremental(args.incremental)
+    elif args.search:
+        train_with_search(budget=args.budget, trials=args.trials)
+    else:
+        main()
\ No newline at end of file
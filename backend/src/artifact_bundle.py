@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.compiled_model import CompiledModel, compile_model
+from src.drift_monitor import REFERENCE_NAME, load_reference, save_reference
+from src.feature_transform import CompiledTransform
+import config
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+LATEST_NAME = 'LATEST'
+NATIVE_MODEL_NAME = 'model.pkl'
+
+
+def _write_atomic(path, text):
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
+def write_bundle(model, scaler, label_encoders, root=None, reference=None, drift_reference=None):
+    """
+    Save a fitted model and its preprocessing objects as a serving bundle.
+
+    A bundle is a directory of .npy arrays (compiled model, scaler mean and
+    scale) plus a JSON manifest with the category tables and scalar model
+    parameters. Workers memory-map the arrays, so they share pages and never
+    unpickle sklearn or xgboost objects; a copy of the pickled model is kept
+    alongside for the rare native fallback. Each bundle gets its own
+    versioned directory under root and the LATEST file is switched to it
+    atomically.
+
+    Args:
+        reference (DataFrame): Rows whose feature means anchor a linear
+            model's reason codes (see compile_model)
+        drift_reference (dict): Input statistics for the drift monitor,
+            from build_reference
+
+    Returns:
+        Path: Directory of the new bundle
+    """
+    root = Path(root or config.BUNDLE_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+
+    transform = CompiledTransform.from_fitted(label_encoders, scaler)
+    compiled = compile_model(model, reference)
+    churn_labels = [
+        str(label) for label in label_encoders['Churn'].inverse_transform(model.classes_)
+    ]
+
+    arrays = {f'model_{key}': np.asarray(value) for key, value in compiled.items()
+              if np.ndim(value) > 0}
+    arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+    model_params = {key: np.asarray(value).item() for key, value in compiled.items()
+                    if np.ndim(value) == 0}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'input_features': transform.input_features,
+        'feature_names': transform.feature_names,
+        'categories': {col: [str(c) for c in label_encoders[col].classes_]
+                       for col in transform.input_features if col in label_encoders},
+        'churn_labels': churn_labels,
+        'model_params': model_params,
+        'arrays': {name: {'dtype': str(array.dtype), 'shape': list(array.shape)}
+                   for name, array in arrays.items()},
+    }
+
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode())
+    for name in sorted(arrays):
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest.hexdigest()[:8]}"
+    manifest['version'] = version
+    manifest['created_at'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+
+    bundle_dir = root / version
+    tmp_dir = root / f'.{version}.tmp'
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir()
+    for name, array in arrays.items():
+        np.save(tmp_dir / f'{name}.npy', np.ascontiguousarray(array), allow_pickle=False)
+    # Native model for the rare paths that need it; only unpickled on demand
+    import joblib
+    joblib.dump(model, tmp_dir / NATIVE_MODEL_NAME)
+    if drift_reference is not None:
+        save_reference(drift_reference, tmp_dir / REFERENCE_NAME)
+    (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    if bundle_dir.exists():
+        shutil.rmtree(bundle_dir)
+    os.replace(tmp_dir, bundle_dir)
+
+    _write_atomic(root / LATEST_NAME, version)
+    return bundle_dir
+
+
+def current_bundle_dir(root=None):
+    """Directory named by root/LATEST, or None if there is no bundle."""
+    root = Path(root or config.BUNDLE_DIR)
+    try:
+        version = (root / LATEST_NAME).read_text().strip()
+    except FileNotFoundError:
+        return None
+    bundle_dir = root / version
+    return bundle_dir if (bundle_dir / MANIFEST_NAME).exists() else None
+
+
+class ArtifactBundle:
+    """A loaded bundle: manifest, feature transform and compiled model."""
+
+    def __init__(self, bundle_dir, mmap=True):
+        """
+        Args:
+            bundle_dir (Path): Directory written by write_bundle
+            mmap (bool): Memory-map the arrays instead of reading them
+        """
+        self.path = Path(bundle_dir)
+        self.manifest = json.loads((self.path / MANIFEST_NAME).read_text())
+        if self.manifest['format_version'] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported bundle format {self.manifest['format_version']} in {self.path}"
+            )
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(self.path / f'{name}.npy', mmap_mode=mmap_mode, allow_pickle=False)
+            for name in self.manifest['arrays']
+        }
+
+        self.version = self.manifest['version']
+        self.native_model_path = self.path / NATIVE_MODEL_NAME
+        self.model_type = self.manifest['model_type']
+        self.churn_labels = self.manifest['churn_labels']
+        self.drift_reference = load_reference(self.path / REFERENCE_NAME)
+        self.transform = CompiledTransform(
+            self.manifest['input_features'], self.manifest['categories'],
+            arrays['scaler_mean'], arrays['scaler_scale']
+        )
+        if self.transform.feature_names != self.manifest['feature_names']:
+            raise ValueError(
+                f"Bundle {self.path} was built for features {self.manifest['feature_names']}, "
+                f"but the feature registry gives {self.transform.feature_names}"
+            )
+
+        model_arrays = dict(self.manifest['model_params'])
+        model_arrays.update({name[len('model_'):]: array for name, array in arrays.items()
+                             if name.startswith('model_')})
+        self.compiled_model = CompiledModel(model_arrays)
+
+
+def main():
+    """Build a bundle from the pickled artifacts of the last training run."""
+    import joblib
+
+    model = joblib.load(config.MODEL_PATH)
+    scaler = joblib.load(config.SCALER_PATH)
+    label_encoders = joblib.load(config.LABEL_ENCODERS_PATH)
+    bundle_dir = write_bundle(model, scaler, label_encoders)
+    print(f"✅ Artifact bundle written to {bundle_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+META_NAME = 'meta.json'
+
+
+class ColumnarWriter:
+    """
+    Append DataFrame chunks to an on-disk columnar store.
+
+    The store is a directory with one flat binary file per column plus a
+    meta.json describing names, dtypes and the row count. Chunks are
+    appended column by column, so memory use is bounded by the chunk size.
+    The store is written to a temporary directory and moved into place by
+    close(), so readers never see a half-written store.
+    """
+
+    def __init__(self, path, dtypes=None, default_dtype=None, metadata=None):
+        """
+        Args:
+            path (Path): Directory of the store; replaced if it exists
+            dtypes (dict): Optional column -> NumPy dtype to store, e.g. int8
+            default_dtype: Dtype of the other columns, e.g. float32; by
+                default each keeps the dtype of the first chunk
+            metadata (dict): Extra JSON-serializable entries for meta.json
+        """
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f'.{self.path.name}.tmp')
+        self.dtypes = dict(dtypes or {})
+        self.default_dtype = default_dtype
+        self.metadata = dict(metadata or {})
+        self.columns = None
+        self.rows = 0
+        self._files = {}
+
+        if self.tmp_path.exists():
+            shutil.rmtree(self.tmp_path)
+        self.tmp_path.mkdir(parents=True)
+
+    def append(self, df):
+        """Append a chunk; its columns must match the first chunk's."""
+        if self.columns is None:
+            self.columns = list(df.columns)
+            for col in self.columns:
+                self.dtypes.setdefault(col, self.default_dtype or df[col].to_numpy().dtype.str)
+                self._files[col] = open(self.tmp_path / f'{col}.bin', 'wb')
+        elif list(df.columns) != self.columns:
+            raise ValueError(f'Chunk columns {list(df.columns)} do not match {self.columns}')
+
+        for col in self.columns:
+            values = np.ascontiguousarray(df[col].to_numpy(dtype=np.dtype(self.dtypes[col])))
+            self._files[col].write(values.tobytes())
+        self.rows += len(df)
+
+    def close(self):
+        """Write meta.json and atomically move the store into place."""
+        for f in self._files.values():
+            f.close()
+        meta = dict(self.metadata)
+        meta.update({
+            'rows': self.rows,
+            'columns': [{'name': col, 'dtype': np.dtype(self.dtypes[col]).str}
+                        for col in (self.columns or [])],
+        })
+        (self.tmp_path / META_NAME).write_text(json.dumps(meta, indent=2))
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+
+class ColumnarAppender:
+    """
+    Append DataFrame chunks to an existing columnar store, in place.
+
+    Only the new rows are written, so the cost does not depend on the size
+    of the store. The appended rows become visible when close() atomically
+    rewrites meta.json; until then, or if the process dies first, readers
+    see the old row count and ignore the extra bytes, which the next
+    appender truncates away.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (Path): Directory of a store written by ColumnarWriter
+        """
+        self.path = Path(path)
+        self.meta = read_meta(self.path)
+        if self.meta is None:
+            raise FileNotFoundError(f'No columnar store at {self.path}')
+        self.columns = [column['name'] for column in self.meta['columns']]
+        self.dtypes = {column['name']: np.dtype(column['dtype']) for column in self.meta['columns']}
+        self.start = self.meta['rows']
+        self.rows = 0
+        self._files = {}
+        for col in self.columns:
+            f = open(self.path / f'{col}.bin', 'r+b')
+            f.truncate(self.start * self.dtypes[col].itemsize)
+            f.seek(0, os.SEEK_END)
+            self._files[col] = f
+
+    def append(self, df):
+        """Append a chunk; its columns must match the store's."""
+        if list(df.columns) != self.columns:
+            raise ValueError(f'Chunk columns {list(df.columns)} do not match {self.columns}')
+        for col in self.columns:
+            values = np.ascontiguousarray(df[col].to_numpy(dtype=self.dtypes[col]))
+            self._files[col].write(values.tobytes())
+        self.rows += len(df)
+
+    def close(self, metadata=None):
+        """
+        Flush the columns and publish the new rows.
+
+        Args:
+            metadata (dict): Entries to update in meta.json in the same write
+
+        Returns:
+            dict: The new meta.json
+        """
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self.meta.update(metadata or {})
+        self.meta['rows'] = self.start + self.rows
+        write_meta(self.path, self.meta)
+        return self.meta
+
+
+def write_meta(path, meta):
+    """Atomically replace the meta.json of a store."""
+    meta_path = Path(path) / META_NAME
+    tmp_path = meta_path.with_name(f'.{META_NAME}.tmp')
+    tmp_path.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp_path, meta_path)
+
+
+def read_meta(path):
+    """meta.json of a store, or None if there is no complete store at path."""
+    try:
+        return json.loads((Path(path) / META_NAME).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def read_columns(path, mmap=True):
+    """
+    Open a store as a dict of column arrays.
+
+    Args:
+        path (Path): Directory written by ColumnarWriter
+        mmap (bool): Memory-map the columns instead of reading them
+
+    Returns:
+        dict: Column name -> 1D NumPy array (read-only memmap when mmap=True)
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f'No columnar store at {path}')
+
+    columns = {}
+    for column in meta['columns']:
+        dtype = np.dtype(column['dtype'])
+        file_path = path / f"{column['name']}.bin"
+        if meta['rows'] == 0:
+            columns[column['name']] = np.empty(0, dtype=dtype)
+        elif mmap:
+            columns[column['name']] = np.memmap(file_path, dtype=dtype, mode='r',
+                                                shape=(meta['rows'],))
+        else:
+            columns[column['name']] = np.fromfile(file_path, dtype=dtype)
+    return columns
+
+
+def read_frame(path, columns=None, mmap=True):
+    """Load a store (or some of its columns) as a DataFrame."""
+    arrays = read_columns(path, mmap=mmap)
+    if columns is not None:
+        arrays = {col: arrays[col] for col in columns}
+    return pd.DataFrame(arrays, copy=False)
+
+
+def iter_chunks(path, chunk_size, columns=None):
+    """Yield a store as DataFrames of at most chunk_size rows."""
+    arrays = read_columns(path, mmap=True)
+    if columns is not None:
+        arrays = {col: arrays[col] for col in columns}
+    rows = read_meta(path)['rows']
+    for start in range(0, rows, chunk_size):
+        yield pd.DataFrame({col: np.asarray(values[start:start + chunk_size])
+                            for col, values in arrays.items()})
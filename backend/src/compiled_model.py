@@ -0,0 +1,468 @@
+import json
+
+import numpy as np
+
+# Rows scored per chunk; bounds the (rows x trees) node-index working set
+CHUNK_SIZE = 4096
+
+
+def _expit(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _path_contributions(feature, left, right, value, weight, n_features):
+    """
+    Per-leaf feature contributions of one tree (Saabas' method).
+
+    Internal nodes take the weighted mean of their children's values, and
+    every step down a root-to-leaf path is credited to the feature split
+    on, so the contributions of a leaf add up to its value minus the root's.
+
+    Returns:
+        tuple: (root value, leaf node indices, contributions of shape
+        (leaves, n_features))
+    """
+    order = [0]
+    for node in order:
+        if left[node] >= 0:
+            order.extend((left[node], right[node]))
+
+    expected = np.array(value, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    for node in reversed(order):
+        l, r = left[node], right[node]
+        if l >= 0:
+            total = weight[l] + weight[r]
+            expected[node] = ((weight[l] * expected[l] + weight[r] * expected[r]) / total
+                              if total > 0 else (expected[l] + expected[r]) / 2)
+
+    paths = np.zeros((len(expected), n_features))
+    for node in order:
+        if left[node] >= 0:
+            for child in (left[node], right[node]):
+                paths[child] = paths[node]
+                paths[child, feature[node]] += expected[child] - expected[node]
+    leaves = [node for node in order if left[node] < 0]
+    return expected[0], leaves, paths[leaves]
+
+
+class _NodeArrays:
+    """Accumulates the nodes of several trees into flat contiguous arrays."""
+
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.feature = []
+        self.threshold = []
+        self.left = []
+        self.right = []
+        self.default_left = []
+        self.value = []
+        self.roots = []
+        self.max_depth = 0
+        # Contribution table rows, one per leaf, and the row of each node (-1 if internal)
+        self.contributions = []
+        self.contribution_row = []
+        self.root_values = []
+
+    def add_tree(self, feature, threshold, left, right, default_left, value, depth, weight):
+        """
+        Append one tree; child indices are local to the tree (-1 for leaves).
+
+        weight holds the training weight (samples or hessian cover) reaching
+        each node, used to build the tree's contribution table.
+        """
+        offset = len(self.feature)
+        self.roots.append(offset)
+        self.max_depth = max(self.max_depth, depth)
+
+        root_value, leaves, contributions = _path_contributions(
+            feature, left, right, value, weight, self.n_features
+        )
+        row = np.full(len(value), -1, dtype=np.int32)
+        row[leaves] = len(self.contributions) + np.arange(len(leaves))
+        self.contributions.extend(contributions)
+        self.contribution_row.extend(row)
+        self.root_values.append(root_value)
+        for i, (f, t, l, r, d, v) in enumerate(
+            zip(feature, threshold, left, right, default_left, value)
+        ):
+            if l < 0:
+                # Leaves point at themselves so every row can walk max_depth steps
+                self.feature.append(0)
+                self.threshold.append(0.0)
+                self.left.append(offset + i)
+                self.right.append(offset + i)
+                self.default_left.append(True)
+            else:
+                self.feature.append(f)
+                self.threshold.append(t)
+                self.left.append(offset + l)
+                self.right.append(offset + r)
+                self.default_left.append(d)
+            self.value.append(v)
+
+    def to_dict(self):
+        return {
+            'feature': np.asarray(self.feature, dtype=np.int32),
+            'threshold': np.asarray(self.threshold, dtype=np.float64),
+            'left': np.asarray(self.left, dtype=np.int32),
+            'right': np.asarray(self.right, dtype=np.int32),
+            'default_left': np.asarray(self.default_left, dtype=bool),
+            'value': np.asarray(self.value, dtype=np.float64),
+            'roots': np.asarray(self.roots, dtype=np.int32),
+            'max_depth': np.int32(self.max_depth),
+            'contributions': np.asarray(self.contributions, dtype=np.float32).reshape(-1, self.n_features),
+            'contribution_row': np.asarray(self.contribution_row, dtype=np.int32),
+        }
+
+
+def _add_sklearn_tree(nodes, tree, leaf_value):
+    missing_left = getattr(tree, 'missing_go_to_left', None)
+    if missing_left is None:
+        missing_left = np.ones(tree.node_count, dtype=bool)
+    nodes.add_tree(
+        tree.feature, tree.threshold, tree.children_left, tree.children_right,
+        np.asarray(missing_left, dtype=bool), leaf_value, tree.max_depth,
+        tree.weighted_n_node_samples
+    )
+
+
+def _compile_linear(model, reference):
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    if reference is not None:
+        feature_means = np.asarray(reference, dtype=np.float64).mean(axis=0)
+    else:
+        feature_means = np.zeros_like(coef)
+    return {
+        'kind': np.array('linear'),
+        'coef': coef,
+        'intercept': np.float64(model.intercept_[0]),
+        'feature_means': feature_means,
+    }
+
+
+def _compile_random_forest(model):
+    nodes = _NodeArrays(model.n_features_in_)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1)
+        totals[totals == 0] = 1.0
+        _add_sklearn_tree(nodes, tree, counts[:, 1] / totals)
+    arrays = nodes.to_dict()
+    # Trees are averaged, so are their contributions
+    arrays['contributions'] /= len(model.estimators_)
+    arrays.update({
+        'kind': np.array('trees'),
+        'aggregation': np.array('mean'),
+        'comparison': np.array('le'),
+        'base_score': np.float64(0.0),
+        'expected_value': np.float64(np.mean(nodes.root_values)),
+    })
+    return arrays
+
+
+def _compile_gradient_boosting(model):
+    nodes = _NodeArrays(model.n_features_in_)
+    for stage in model.estimators_:
+        tree = stage[0].tree_
+        _add_sklearn_tree(nodes, tree, model.learning_rate * tree.value[:, 0, 0])
+    probe = np.zeros((1, model.n_features_in_), dtype=np.float32)
+    base_score = model._raw_predict_init(probe)[0, 0]
+    arrays = nodes.to_dict()
+    arrays.update({
+        'kind': np.array('trees'),
+        'aggregation': np.array('logit'),
+        'comparison': np.array('le'),
+        'base_score': np.float64(base_score),
+        'expected_value': np.float64(base_score + np.sum(nodes.root_values)),
+    })
+    return arrays
+
+
+def _compile_xgboost(model):
+    booster = model.get_booster()
+    feature_names = booster.feature_names or [f'f{i}' for i in range(model.n_features_in_)]
+    feature_index = {name: i for i, name in enumerate(feature_names)}
+
+    dumps = booster.get_dump(dump_format='json', with_stats=True)
+    try:
+        dumps = dumps[:model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    nodes = _NodeArrays(model.n_features_in_)
+    for dump in dumps:
+        flat = {}
+        stack = [(json.loads(dump), 0)]
+        depth = 0
+        while stack:
+            node, node_depth = stack.pop()
+            flat[node['nodeid']] = node
+            depth = max(depth, node_depth)
+            stack.extend((child, node_depth + 1) for child in node.get('children', []))
+
+        size = max(flat) + 1
+        feature = np.zeros(size, dtype=np.int32)
+        threshold = np.zeros(size, dtype=np.float64)
+        left = np.full(size, -1, dtype=np.int32)
+        right = np.full(size, -1, dtype=np.int32)
+        default_left = np.ones(size, dtype=bool)
+        value = np.zeros(size, dtype=np.float64)
+        cover = np.zeros(size, dtype=np.float64)
+        for node_id, node in flat.items():
+            cover[node_id] = node['cover']
+            if 'leaf' in node:
+                value[node_id] = np.float32(node['leaf'])
+                continue
+            feature[node_id] = feature_index[node['split']]
+            threshold[node_id] = np.float32(node['split_condition'])
+            left[node_id] = node['yes']
+            right[node_id] = node['no']
+            default_left[node_id] = node['missing'] == node['yes']
+        nodes.add_tree(feature, threshold, left, right, default_left, value, depth, cover)
+
+    learner = json.loads(booster.save_config())['learner']
+    base_score = float(learner['learner_model_param']['base_score'])
+    base_margin = np.log(base_score / (1.0 - base_score))
+    arrays = nodes.to_dict()
+    arrays.update({
+        'kind': np.array('trees'),
+        'aggregation': np.array('logit'),
+        'comparison': np.array('lt'),
+        'base_score': np.float64(base_margin),
+        'expected_value': np.float64(base_margin + np.sum(nodes.root_values)),
+    })
+    return arrays
+
+
+def compile_model(model, reference=None):
+    """
+    Flatten a fitted churn model into plain NumPy arrays.
+
+    Supports the candidates trained in train_model.py: LogisticRegression,
+    RandomForestClassifier, GradientBoostingClassifier and XGBClassifier.
+    Tree models also get the per-leaf contribution tables CompiledModel.explain
+    reads reason codes from.
+
+    Args:
+        model: Fitted model
+        reference (array-like): Rows whose feature means are the baseline of
+            a linear model's contributions; zeros if not given
+
+    Returns:
+        dict: Arrays describing the model, as saved by export_compiled_model
+    """
+    name = type(model).__name__
+    if name == 'LogisticRegression':
+        arrays = _compile_linear(model, reference)
+    elif name == 'RandomForestClassifier':
+        arrays = _compile_random_forest(model)
+    elif name == 'GradientBoostingClassifier':
+        arrays = _compile_gradient_boosting(model)
+    elif name == 'XGBClassifier':
+        arrays = _compile_xgboost(model)
+    else:
+        raise ValueError(f'Cannot compile model of type {name}')
+
+    arrays['classes'] = np.asarray(model.classes_)
+    arrays['n_features'] = np.int32(model.n_features_in_)
+    arrays['model_type'] = np.array(name)
+    return arrays
+
+
+def export_compiled_model(model, path, reference=None):
+    """Compile a fitted model and save it as an .npz file."""
+    arrays = compile_model(model, reference)
+    np.savez(path, **arrays)
+    return CompiledModel(arrays)
+
+
+class CompiledModel:
+    """Vectorized NumPy evaluator for a model flattened by compile_model."""
+
+    def __init__(self, arrays):
+        self.kind = str(arrays['kind'])
+        self.model_type = str(arrays['model_type'])
+        self.classes_ = np.asarray(arrays['classes'])
+        self.n_features = int(arrays['n_features'])
+
+        if self.kind == 'linear':
+            self.coef = np.asarray(arrays['coef'], dtype=np.float64).reshape(-1, 1)
+            self.intercept = float(arrays['intercept'])
+            self.feature_means = np.asarray(
+                arrays.get('feature_means', np.zeros(self.n_features)), dtype=np.float64
+            )
+            self.expected_value = self.intercept + float(self.feature_means @ self.coef.ravel())
+            self.has_contributions = True
+        else:
+            self.feature = np.asarray(arrays['feature'])
+            self.threshold = np.asarray(arrays['threshold'])
+            self.left = np.asarray(arrays['left'])
+            self.right = np.asarray(arrays['right'])
+            self.default_left = np.asarray(arrays['default_left'])
+            self.value = np.asarray(arrays['value'])
+            self.roots = np.asarray(arrays['roots'])
+            self.is_leaf = self.left == np.arange(len(self.left))
+            self.max_depth = int(arrays['max_depth'])
+            self.aggregation = str(arrays['aggregation'])
+            self.strict = str(arrays['comparison']) == 'lt'
+            self.base_score = float(arrays['base_score'])
+            # Compiled before reason codes existed; see ModelArtifacts.explainer
+            self.has_contributions = 'contributions' in arrays
+            if self.has_contributions:
+                self.contributions = np.asarray(arrays['contributions'])
+                self.contribution_row = np.asarray(arrays['contribution_row'])
+                self.expected_value = float(arrays['expected_value'])
+        # Random forests average probabilities; the other models add up log-odds
+        self.contribution_units = (
+            'probability' if getattr(self, 'aggregation', None) == 'mean' else 'log_odds'
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a compiled model saved by export_compiled_model."""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        return cls(arrays)
+
+    def _leaf_indices(self, X):
+        """Leaf node reached in every tree, shape (rows, trees)."""
+        # Trees compare float32 features, as sklearn and xgboost do
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_trees = len(X), len(self.roots)
+        flat_X = X.ravel()
+        row_offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+
+        # One cursor per (row, tree); cursors drop out once they hit a leaf
+        idx = np.tile(self.roots, n_rows)
+        active = np.flatnonzero(~self.is_leaf[idx])
+        for _ in range(self.max_depth):
+            if not len(active):
+                break
+            node = idx[active]
+            x = flat_X[row_offset[active] + self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x < threshold if self.strict else x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+            idx[active] = node
+            active = active[~self.is_leaf[node]]
+        return idx.reshape(n_rows, n_trees)
+
+    def _aggregate(self, leaf_values):
+        if self.aggregation == 'mean':
+            return leaf_values.mean(axis=1)
+        return _expit(self.base_score + leaf_values.sum(axis=1))
+
+    def _positive_probability(self, X):
+        if self.kind == 'linear':
+            return _expit((X @ self.coef).ravel() + self.intercept)
+
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_SIZE):
+            leaves = self._leaf_indices(X[start:start + CHUNK_SIZE])
+            out[start:start + CHUNK_SIZE] = self._aggregate(self.value[leaves])
+        return out
+
+    def predict_proba(self, X):
+        """
+        Class probabilities for a 2D feature array.
+
+        Args:
+            X (np.ndarray): Features ordered as the model was trained on
+
+        Returns:
+            np.ndarray: Array of shape (rows, 2) like sklearn's predict_proba
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        positive = self._positive_probability(X)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        """Class labels for a 2D feature array."""
+        probabilities = self.predict_proba(X)
+        return self.classes_[probabilities.argmax(axis=1)]
+
+    def explain(self, X, leaves=None):
+        """
+        Class probabilities plus each feature's contribution to them.
+
+        Tree models look up the contribution table row of every leaf the
+        rows reach, in the same traversal that scores them; linear models
+        use coefficient times distance from the reference means. A row's
+        contributions add up to its score minus expected_value, in
+        contribution_units (probability for random forests, log-odds
+        otherwise).
+
+        Args:
+            X (np.ndarray): Features ordered as the model was trained on
+            leaves (np.ndarray): Leaf reached in every tree, shape (rows,
+                trees), numbered within each tree like the native model's
+                apply(); skips the traversal where the native model finds
+                the leaves faster
+
+        Returns:
+            tuple: (probabilities of shape (rows, 2), contributions of shape
+            (rows, features))
+        """
+        if not self.has_contributions:
+            raise ValueError(f'Compiled {self.model_type} has no contribution tables')
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if self.kind == 'linear':
+            contributions = (X - self.feature_means) * self.coef.ravel()
+            positive = self._positive_probability(X)
+        else:
+            from scipy.sparse import csr_matrix
+
+            contributions = np.empty(X.shape, dtype=np.float64)
+            positive = np.empty(len(X), dtype=np.float64)
+            for start in range(0, len(X), CHUNK_SIZE):
+                if leaves is None:
+                    nodes = self._leaf_indices(X[start:start + CHUNK_SIZE])
+                else:
+                    nodes = self.roots + np.asarray(leaves[start:start + CHUNK_SIZE], dtype=np.int64)
+                positive[start:start + CHUNK_SIZE] = self._aggregate(self.value[nodes])
+                # Sum the table rows of the reached leaves as a (rows x leaves) 0/1 matrix product
+                n_rows, n_trees = nodes.shape
+                reached = csr_matrix(
+                    (np.ones(nodes.size, dtype=np.float32), self.contribution_row[nodes].ravel(),
+                     np.arange(0, nodes.size + 1, n_trees)),
+                    shape=(n_rows, len(self.contributions))
+                )
+                contributions[start:start + CHUNK_SIZE] = reached @ self.contributions
+        return np.column_stack([1.0 - positive, positive]), contributions
+
+
+def check_parity(compiled, model, X, atol=1e-6):
+    """
+    Compare the compiled evaluator against the original model.
+
+    Args:
+        compiled (CompiledModel): Evaluator to check
+        model: Original fitted model
+        X (pd.DataFrame): Feature frame, e.g. the held-out test split
+        atol (float): Largest allowed absolute probability difference
+
+    Returns:
+        dict: max_abs_diff and label_agreement over X
+    """
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(np.asarray(X, dtype=np.float64))
+    max_abs_diff = float(np.abs(expected - actual).max()) if len(X) else 0.0
+    label_agreement = float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))) if len(X) else 1.0
+
+    if max_abs_diff > atol:
+        raise ValueError(
+            f'Compiled model differs from {type(model).__name__}: '
+            f'max probability difference {max_abs_diff:.3g} > {atol:.3g}'
+        )
+
+    return {'max_abs_diff': max_abs_diff, 'label_agreement': label_agreement}
@@ -1,7 +1,26 @@
+import shutil
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 
+from src.columnar_store import ColumnarWriter, iter_chunks
+from src.feature_engineering import create_features
+
+# Explicit raw dtypes for chunked reading; TotalCharges stays text because
+# blank values are converted by clean_data
+RAW_CATEGORICAL_COLUMNS = [
+    'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'PhoneService',
+    'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'Contract', 'PaperlessBilling', 'PaymentMethod', 'Churn'
+]
+RAW_DTYPES = dict(
+    {col: 'category' for col in RAW_CATEGORICAL_COLUMNS},
+    customerID=str, tenure='float64', MonthlyCharges='float64', TotalCharges=str
+)
+
 def load_data(filepath):
     """Load the dataset from CSV file."""
     df = pd.read_csv(filepath)
@@ -119,4 +138,136 @@ def prepare_input_data(input_dict, label_encoders, scaler):
     # Scale features
     df, _ = scale_features(df, scaler, fit=False)
     
-    return df
\ No newline at end of file
+    return df
+
+def read_raw_chunks(filepath, chunk_size, usecols=None):
+    """Read the raw CSV in chunks with explicit dtypes."""
+    dtypes = RAW_DTYPES if usecols is None else {
+        col: dtype for col, dtype in RAW_DTYPES.items() if col in usecols
+    }
+    return pd.read_csv(filepath, chunksize=chunk_size, dtype=dtypes, usecols=usecols)
+
+def fit_label_encoders_chunked(filepath, chunk_size):
+    """
+    Fit the label encoders in one pass over the categorical columns.
+    
+    Only the set of values seen so far is kept per column, so memory does
+    not grow with the file. The encoders end up with the same sorted
+    classes_ as LabelEncoder.fit on the whole column.
+    """
+    seen = {col: set() for col in RAW_CATEGORICAL_COLUMNS}
+    for chunk in read_raw_chunks(filepath, chunk_size, usecols=RAW_CATEGORICAL_COLUMNS):
+        for col in RAW_CATEGORICAL_COLUMNS:
+            values = chunk[col]
+            seen[col].update(str(c) for c in values.dropna().unique())
+            if values.isna().any():
+                # astype(str) in encode_features turns missing values into 'nan'
+                seen[col].add('nan')
+    
+    label_encoders = {}
+    for col, classes in seen.items():
+        le = LabelEncoder()
+        le.classes_ = np.array(sorted(classes), dtype=object)
+        label_encoders[col] = le
+    return label_encoders
+
+def _encode_chunk(df, label_encoders):
+    """Label-encode a cleaned chunk; unknown values raise like LabelEncoder."""
+    for col in RAW_CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        classes = label_encoders[col].classes_
+        codes = pd.Categorical(df[col].astype(str), categories=classes).codes
+        if (codes < 0).any():
+            unseen = sorted(set(df[col].astype(str)[codes < 0]))
+            raise ValueError(f"Unseen values in {col}: {unseen}")
+        df[col] = codes.astype(np.int64)
+    return df
+
+def encode_data_chunked(filepath, output_path, chunk_size=100_000, label_encoders=None,
+                        fit=True, dtypes=None, default_dtype=None):
+    """
+    Clean and label-encode the raw file chunk by chunk into a columnar store.
+    
+    With fit, one pass over the categorical columns fits the label encoders
+    first, unless they are given, and a StandardScaler is fitted on the
+    encoded features with partial_fit as the chunks are written. The store holds the encoded,
+    unscaled columns in the order preprocess_data scales them.
+    
+    Args:
+        filepath (Path): Raw CSV with the same schema as the training data
+        output_path (Path): Directory of the encoded columnar store
+        chunk_size (int): Rows per chunk
+        label_encoders (dict): Fitted encoders, required when fit=False
+        fit (bool): Fit a scaler, and the encoders if not given, on this file
+        dtypes (dict), default_dtype: Storage dtypes of the encoded
+            columns, as for ColumnarWriter
+    
+    Returns:
+        tuple: (label_encoders, scaler, or None when fit=False)
+    """
+    scaler = None
+    if fit:
+        if label_encoders is None:
+            label_encoders = fit_label_encoders_chunked(filepath, chunk_size)
+        scaler = StandardScaler()
+    elif label_encoders is None:
+        raise ValueError("label_encoders must be provided when fit=False")
+    
+    writer = ColumnarWriter(output_path, dtypes=dtypes, default_dtype=default_dtype,
+                            metadata={'chunk_size': chunk_size})
+    for chunk in read_raw_chunks(filepath, chunk_size):
+        chunk = _encode_chunk(clean_data(chunk), label_encoders)
+        if fit:
+            features = chunk.drop(columns=['Churn'], errors='ignore')
+            scaler.partial_fit(features.astype(np.float64))
+        writer.append(chunk)
+    writer.close()
+    return label_encoders, scaler
+
+def preprocess_data_chunked(filepath, output_path, chunk_size=100_000,
+                            label_encoders=None, scaler=None, fit=True,
+                            dtypes=None, default_dtype=None):
+    """
+    Out-of-core version of preprocess_data followed by create_features.
+    
+    The raw file is read chunk by chunk: encode_data_chunked fits the
+    label encoders and scaler and spills the encoded chunks to a temporary
+    columnar store, and a final pass over that store scales the chunks,
+    adds the engineered features and writes them to output_path. Peak
+    memory is a few chunks, whatever the size of the file.
+    
+    Args:
+        filepath (Path): Raw CSV with the same schema as the training data
+        output_path (Path): Directory of the processed columnar store
+        chunk_size (int): Rows per chunk
+        label_encoders (dict): Fitted encoders, required when fit=False
+        scaler (StandardScaler): Fitted scaler, required when fit=False
+        fit (bool): Fit the encoders and scaler on this file
+        dtypes (dict), default_dtype: Storage dtypes of the processed
+            columns, as for ColumnarWriter
+    
+    Returns:
+        tuple: (output_path, label_encoders, scaler)
+    """
+    output_path = Path(output_path)
+    if not fit and (label_encoders is None or scaler is None):
+        raise ValueError("label_encoders and scaler must be provided when fit=False")
+    
+    encoded_path = output_path.with_name(f'.{output_path.name}.encoded')
+    label_encoders, fitted_scaler = encode_data_chunked(filepath, encoded_path, chunk_size,
+                                                        None if fit else label_encoders, fit)
+    if fit:
+        scaler = fitted_scaler
+    
+    writer = ColumnarWriter(output_path, dtypes=dtypes, default_dtype=default_dtype,
+                            metadata={'chunk_size': chunk_size})
+    try:
+        for chunk in iter_chunks(encoded_path, chunk_size):
+            chunk, _ = scale_features(chunk, scaler, fit=False)
+            writer.append(create_features(chunk))
+        writer.close()
+    finally:
+        shutil.rmtree(encoded_path, ignore_errors=True)
+    
+    return output_path, label_encoders, scaler
@@ -0,0 +1,287 @@
+import json
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+import config
+
+REFERENCE_NAME = 'drift_reference.json'
+
+# Reported quantiles of the numeric fields
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Floor for empty bins, so PSI stays finite
+_EPSILON = 1e-4
+
+
+def build_reference(inputs, label_encoders, bins=None):
+    """
+    Reference statistics of the model inputs, for DriftMonitor.
+
+    Categorical fields keep the share of each encoder class. Numeric fields
+    are cut at the reference quantiles into (at most) `bins` bins of about
+    equal reference mass, which also serve as the monitor's sketch of the
+    live values. The inputs are the exact category codes and numbers live
+    rows are validated to, so both are binned the same way.
+
+    Args:
+        inputs (DataFrame): Encoded, unscaled training inputs, as stored in
+            the processed data cache; a Churn column is ignored
+        label_encoders (dict): Fitted label encoders
+        bins (int): Bins per numeric field, defaults to config.DRIFT_BINS
+
+    Returns:
+        dict: JSON-serializable reference statistics
+    """
+    bins = bins or config.DRIFT_BINS
+    inputs = inputs.drop(columns=['Churn'], errors='ignore')
+
+    fields = {}
+    for col in inputs.columns:
+        values = np.asarray(inputs[col], dtype=np.float64)
+        if col in label_encoders:
+            classes = [str(c) for c in label_encoders[col].classes_]
+            counts = np.bincount(values.astype(np.int64), minlength=len(classes))
+            fields[col] = {'kind': 'categorical', 'categories': classes,
+                           'proportions': (counts / len(values)).tolist()}
+        else:
+            # Discrete fields get fewer, unique edges
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side='right'),
+                                 minlength=len(edges) + 1)
+            fields[col] = {
+                'kind': 'numeric', 'edges': edges.tolist(),
+                'proportions': (counts / len(values)).tolist(),
+                'min': float(values.min()), 'max': float(values.max()),
+                'quantiles': {str(q): float(np.quantile(values, q)) for q in QUANTILES},
+            }
+
+    return {'rows': int(len(inputs)), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'fields': fields}
+
+
+def save_reference(reference, path):
+    Path(path).write_text(json.dumps(reference))
+
+
+def load_reference(path):
+    """Reference statistics saved by save_reference, or None if there are none."""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def psi(reference, live):
+    """Population stability index between two distributions over the same bins."""
+    reference = np.maximum(reference, _EPSILON)
+    live = np.maximum(live, _EPSILON)
+    return float(np.sum((live - reference) * np.log(live / reference)))
+
+
+def _quantile(counts, edges, low, high, q):
+    """Quantile estimated from binned counts, interpolating within the bin."""
+    cumulative = np.cumsum(counts)
+    target = q * cumulative[-1]
+    b = int(np.searchsorted(cumulative, target))
+    lower = edges[b - 1] if b > 0 else low
+    upper = edges[b] if b < len(edges) else high
+    before = cumulative[b - 1] if b > 0 else 0
+    share = (target - before) / counts[b] if counts[b] else 0.0
+    return float(lower + share * (max(upper, lower) - lower))
+
+
+class DriftMonitor:
+    """
+    Fixed-size sketches of the validated inputs, compared with a reference.
+
+    Each categorical field is counted per category and each numeric field
+    per reference quantile bin, all in one flat count vector. The vectors
+    of the last `windows` windows of window_seconds each are kept in a ring,
+    with the smallest and largest value of each numeric field, so memory
+    does not grow with traffic and old traffic ages out. Rows are recorded
+    as category codes and numbers in input_features order, as InputSchema
+    returns them.
+    """
+
+    def __init__(self, reference, input_features, window_seconds=None, windows=None):
+        """
+        Args:
+            reference (dict): Statistics from build_reference
+            input_features (list): Order of the fields in observed rows;
+                fields missing from the reference are not monitored
+            window_seconds (float): Defaults to config.DRIFT_WINDOW_SECONDS
+            windows (int): Defaults to config.DRIFT_WINDOWS
+        """
+        self.reference = reference
+        self.window_seconds = window_seconds or config.DRIFT_WINDOW_SECONDS
+        self.windows = windows or config.DRIFT_WINDOWS
+
+        # (name, position in a row, kind, offset into the counts, bins, edges)
+        self.fields = []
+        offset = 0
+        for j, col in enumerate(input_features):
+            spec = reference['fields'].get(col)
+            if spec is None:
+                continue
+            n_bins = len(spec['proportions'])
+            edges = spec.get('edges')
+            self.fields.append((col, j, spec['kind'], offset, n_bins, edges))
+            offset += n_bins
+        self.size = offset
+        self._edges = [np.asarray(edges) if edges is not None else None
+                       for _, _, _, _, _, edges in self.fields]
+        numeric = [field for field in self.fields if field[2] == 'numeric']
+        self._numeric_index = {field[0]: k for k, field in enumerate(numeric)}
+        self._numeric_positions = [field[1] for field in numeric]
+
+        self.counts = np.zeros((self.windows, self.size), dtype=np.int64)
+        self.rows = np.zeros(self.windows, dtype=np.int64)
+        self.low = np.full((self.windows, len(numeric)), np.inf)
+        self.high = np.full((self.windows, len(numeric)), -np.inf)
+        # Single rows are counted in plain lists, which is much cheaper per
+        # row than NumPy, and flushed into the current window by _flush
+        self._pending = [0] * self.size
+        self._pending_rows = 0
+        self._pending_low = [float('inf')] * len(numeric)
+        self._pending_high = [float('-inf')] * len(numeric)
+        self.started_at = time.time()
+        self._window = int(self.started_at // self.window_seconds)
+        self._window_end = (self._window + 1) * self.window_seconds
+        self._lock = threading.Lock()
+
+    def _flush(self):
+        if self._pending_rows:
+            slot = self._window % self.windows
+            self.counts[slot] += self._pending
+            self.rows[slot] += self._pending_rows
+            np.minimum(self.low[slot], self._pending_low, out=self.low[slot])
+            np.maximum(self.high[slot], self._pending_high, out=self.high[slot])
+            self._pending = [0] * self.size
+            self._pending_rows = 0
+            self._pending_low = [float('inf')] * len(self._pending_low)
+            self._pending_high = [float('-inf')] * len(self._pending_high)
+
+    def _advance(self, now):
+        """Move to the window holding now, clearing the ring slots of the windows since."""
+        if now < self._window_end:
+            return
+        self._flush()
+        window = int(now // self.window_seconds)
+        for skipped in range(self._window + 1, min(window, self._window + self.windows) + 1):
+            self.counts[skipped % self.windows] = 0
+            self.rows[skipped % self.windows] = 0
+            self.low[skipped % self.windows] = np.inf
+            self.high[skipped % self.windows] = -np.inf
+        self._window = window
+        self._window_end = (window + 1) * self.window_seconds
+
+    def observe_one(self, values):
+        """Record one validated row."""
+        with self._lock:
+            self._advance(time.time())
+            pending = self._pending
+            for col, j, kind, offset, n_bins, edges in self.fields:
+                if edges is None:
+                    pending[offset + int(values[j])] += 1
+                else:
+                    pending[offset + bisect_right(edges, values[j])] += 1
+            self._pending_rows += 1
+            low, high = self._pending_low, self._pending_high
+            for k, j in enumerate(self._numeric_positions):
+                value = values[j]
+                if value < low[k]:
+                    low[k] = value
+                if value > high[k]:
+                    high[k] = value
+
+    def observe_many(self, values):
+        """Record the rows of a validated matrix, as from InputSchema.validate_many."""
+        if not len(values):
+            return
+        index = np.empty((len(values), len(self.fields)), dtype=np.int64)
+        for k, (col, j, kind, offset, n_bins, edges) in enumerate(self.fields):
+            if edges is None:
+                index[:, k] = values[:, j]
+            else:
+                index[:, k] = np.searchsorted(self._edges[k], values[:, j], side='right')
+            index[:, k] += offset
+        counts = np.bincount(index.ravel(), minlength=self.size)
+        numbers = values[:, self._numeric_positions]
+        low, high = numbers.min(axis=0), numbers.max(axis=0)
+        with self._lock:
+            self._advance(time.time())
+            slot = self._window % self.windows
+            self.counts[slot] += counts
+            self.rows[slot] += len(values)
+            np.minimum(self.low[slot], low, out=self.low[slot])
+            np.maximum(self.high[slot], high, out=self.high[slot])
+
+    def report(self, min_rows=None):
+        """
+        Drift of every monitored field over the kept windows.
+
+        Every field gets its PSI against the reference; numeric fields also
+        get the KS statistic between the binned distributions and estimated
+        live quantiles, categorical fields the reference and live share of
+        each category. A field's status is 'drift' from DRIFT_PSI_ALERT,
+        'warning' from DRIFT_PSI_WARNING, else 'ok', or
+        'insufficient_data' below min_rows rows.
+
+        Args:
+            min_rows (int): Defaults to config.DRIFT_MIN_ROWS
+        """
+        min_rows = config.DRIFT_MIN_ROWS if min_rows is None else min_rows
+        with self._lock:
+            self._advance(time.time())
+            self._flush()
+            counts = self.counts.sum(axis=0)
+            rows = int(self.rows.sum())
+            low, high = self.low.min(axis=0).tolist(), self.high.max(axis=0).tolist()
+
+        fields = {}
+        for col, j, kind, offset, n_bins, edges in self.fields:
+            spec = self.reference['fields'][col]
+            field_counts = counts[offset:offset + n_bins]
+            expected = np.asarray(spec['proportions'])
+            live = field_counts / rows if rows else np.zeros(n_bins)
+            result = {'kind': kind, 'psi': psi(expected, live) if rows else None}
+            if kind == 'numeric':
+                result['ks'] = float(np.abs(np.cumsum(live) - np.cumsum(expected)).max()) if rows else None
+                result['reference_quantiles'] = spec['quantiles']
+                if rows:
+                    k = self._numeric_index[col]
+                    result['quantiles'] = {
+                        str(q): _quantile(field_counts, edges, min(low[k], spec['min']),
+                                          max(high[k], spec['max']), q)
+                        for q in QUANTILES
+                    }
+            else:
+                result['categories'] = {
+                    category: {'reference': float(p), 'live': float(q)}
+                    for category, p, q in zip(spec['categories'], expected, live)
+                }
+            if rows < min_rows:
+                result['status'] = 'insufficient_data'
+            elif result['psi'] >= config.DRIFT_PSI_ALERT:
+                result['status'] = 'drift'
+            elif result['psi'] >= config.DRIFT_PSI_WARNING:
+                result['status'] = 'warning'
+            else:
+                result['status'] = 'ok'
+            fields[col] = result
+
+        return {
+            'rows': rows,
+            'window_seconds': self.window_seconds,
+            'windows': self.windows,
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(
+                max(self.started_at, (self._window - self.windows + 1) * self.window_seconds))),
+            'reference': {'rows': self.reference['rows'],
+                          'created_at': self.reference['created_at']},
+            'drifted': sorted(col for col, result in fields.items() if result['status'] == 'drift'),
+            'fields': fields,
+        }
@@ -1,41 +1,114 @@
-import pandas as pd
+import numpy as np
+
+# Derived features in the order they are appended: name -> (input columns,
+# function of those columns as NumPy arrays, whether the inputs must be numeric).
+# Training (create_features) and serving (CompiledTransform) both compute
+# them from this registry, so a feature only has to be declared once.
+FEATURE_REGISTRY = {}
+
+SERVICE_COLS = ['OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+                'TechSupport', 'StreamingTV', 'StreamingMovies']
+
+
+class Bins:
+    """
+    Fixed bin edges with the codes pd.cut(..., include_lowest=True) gives.
+
+    The left edge is nudged down by one ulp so that a single searchsorted
+    also puts the edge value itself in the first bin; a lookup table then
+    maps below-range, above-range and NaN values to -1.
+    """
+
+    def __init__(self, edges):
+        self.edges = np.array(edges, dtype=np.float64)
+        self.edges[0] = np.nextafter(self.edges[0], -np.inf)
+        self.codes = np.array([-1] + list(range(len(edges) - 1)) + [-1], dtype=np.int8)
+
+    def __call__(self, values):
+        """int8 bin index per value (array or NumPy scalar)."""
+        return self.codes[self.edges.searchsorted(values)]
+
+
+TENURE_BINS = Bins([-1, 12, 24, 48, 100])
+CHARGE_BINS = Bins([-1, 35, 70, 100, 200])
+
+
+def derived_feature(name, inputs, numeric=True):
+    """
+    Register a derived feature.
+
+    Args:
+        name (str): Column name of the feature
+        inputs (list): Columns passed to the function, in order
+        numeric (bool): Skip the feature when an input is not numeric
+    """
+    def register(func):
+        FEATURE_REGISTRY[name] = (list(inputs), func, numeric)
+        return func
+    return register
+
+
+@derived_feature('AvgCharges', ['TotalCharges', 'tenure'])
+def avg_charges(total_charges, tenure):
+    # +1 to avoid division by zero
+    return total_charges / (tenure + 1)
+
+
+@derived_feature('ServiceCount', SERVICE_COLS, numeric=False)
+def service_count(*services):
+    if services[0].dtype == object:
+        # Before encoding, count 'Yes' values
+        return sum((service == 'Yes').astype(np.int64) for service in services)
+    # After encoding, 'Yes' might be 1 or another value; summed left to right
+    total = services[0] + services[1]
+    for service in services[2:]:
+        total += service
+    return total
+
+
+@derived_feature('TenureGroup', ['tenure'])
+def tenure_group(tenure):
+    return TENURE_BINS(tenure)
+
+
+@derived_feature('ChargeGroup', ['MonthlyCharges'])
+def charge_group(monthly_charges):
+    return CHARGE_BINS(monthly_charges)
+
+
+def derive_features(columns):
+    """
+    Compute the registered features from a mapping of columns.
+
+    Args:
+        columns (Mapping): Column name -> 1D NumPy array, or NumPy scalar
+            to derive the features of a single row
+
+    Returns:
+        dict: Feature name -> values, in registry order
+    """
+    features = {}
+    for name, (inputs, func, numeric) in FEATURE_REGISTRY.items():
+        values = [columns[col] for col in inputs]
+        if numeric and not all(v.dtype.kind in 'biuf' for v in values):
+            continue
+        features[name] = func(*values)
+    return features
+
 
 def create_features(df):
     """Create additional features for better prediction."""
-    df = df.copy()
-    
-    # Average charges per month
-    df['AvgCharges'] = df['TotalCharges'] / (df['tenure'] + 1)  # +1 to avoid division by zero
-    
-    # Service count (number of additional services)
-    service_cols = ['OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 
-                    'TechSupport', 'StreamingTV', 'StreamingMovies']
-    
-    # Before encoding, count 'Yes' values
-    if df[service_cols[0]].dtype == 'object':
-        df['ServiceCount'] = df[service_cols].apply(lambda x: (x == 'Yes').sum(), axis=1)
-    else:
-        # After encoding, 'Yes' might be 1 or another value
-        df['ServiceCount'] = df[service_cols].sum(axis=1)
-    
-    # Tenure groups
-    if df['tenure'].dtype in ['int64', 'float64']:
-        df['TenureGroup'] = pd.cut(df['tenure'], 
-                                   bins=[-1, 12, 24, 48, 100],
-                                   labels=[0, 1, 2, 3],
-                                   include_lowest=True)
-        df['TenureGroup'] = df['TenureGroup'].cat.codes
-    
-    # Monthly charges groups
-    if df['MonthlyCharges'].dtype in ['int64', 'float64']:
-        df['ChargeGroup'] = pd.cut(df['MonthlyCharges'],
-                                   bins=[-1, 35, 70, 100, 200],
-                                   labels=[0, 1, 2, 3],
-                                   include_lowest=True)
-        df['ChargeGroup'] = df['ChargeGroup'].cat.codes
-    
+    # Shallow copy: the new columns are not added to the caller's frame,
+    # and the existing columns are not copied
+    df = df.copy(deep=False)
+    # Division by a zero denominator gives inf/NaN silently, as in pandas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features = derive_features({col: df[col].to_numpy() for col in df.columns})
+    for name, values in features.items():
+        df[name] = values
     return df
 
+
 def select_important_features(df, feature_importance=None, top_n=15):
     """Select most important features based on feature importance."""
     if feature_importance is not None and 'Churn' in df.columns:
@@ -43,5 +116,5 @@ def select_important_features(df, feature_importance=None, top_n=15):
         top_features = feature_importance.nlargest(top_n).index.tolist()
         top_features.append('Churn')  # Always include target
         df = df[top_features]
-    
-    return df
\ No newline at end of file
+
+    return df
@@ -0,0 +1,89 @@
+import numpy as np
+
+from src.feature_engineering import FEATURE_REGISTRY, derive_features
+
+
+class CompiledTransform:
+    """
+    Pandas-free version of prepare_input_data followed by create_features.
+
+    The fitted label encoders and scaler are flattened once into per-column
+    category tables and scaling constants. Rows validated by InputSchema
+    (category codes and numbers) are scaled and the derived features added
+    with plain float arithmetic for one row, or NumPy for a matrix.
+    Outputs are bit-identical to the pandas path.
+    """
+
+    def __init__(self, input_features, categories, mean, scale):
+        """
+        Args:
+            input_features (list): Raw input columns in the scaler's order
+            categories (dict): Encoder classes per categorical column, in
+                code order
+            mean (array-like): Scaler mean per input column
+            scale (array-like): Scaler scale per input column
+        """
+        self.input_features = list(input_features)
+        self.feature_names = self.input_features + list(FEATURE_REGISTRY)
+
+        # One (column, lookup table or None, mean, scale) entry per input column
+        self.columns = []
+        for col, col_mean, col_scale in zip(self.input_features, mean, scale):
+            table = None
+            if col in categories:
+                classes = categories[col]
+                scaled = (np.arange(len(classes), dtype=np.float64) - col_mean) / col_scale
+                table = dict(zip((str(c) for c in classes), scaled.tolist()))
+            self.columns.append((col, table, float(col_mean), float(col_scale)))
+
+        self.mean = np.array(mean, dtype=np.float64)
+        self.scale = np.array(scale, dtype=np.float64)
+        self._mean_scale = list(zip(self.mean.tolist(), self.scale.tolist()))
+
+        # Input columns the derived features read, by position
+        derived_inputs = {col for inputs, _, _ in FEATURE_REGISTRY.values() for col in inputs}
+        self.derived_inputs = [(i, col) for i, col in enumerate(self.input_features)
+                               if col in derived_inputs]
+
+    @classmethod
+    def from_fitted(cls, label_encoders, scaler):
+        """Build the lookup tables from a fitted label encoder dict and StandardScaler."""
+        input_features = list(scaler.feature_names_in_)
+        n_features = len(input_features)
+        categories = {
+            col: list(encoder.classes_) for col, encoder in label_encoders.items()
+            if col in input_features
+        }
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        return cls(input_features, categories, mean, scale)
+
+    def scale_one(self, values):
+        """
+        Scale one row of category codes and numbers, as from InputSchema.validate_one.
+
+        Returns:
+            list: Scaled input values as Python floats, in input_features order
+        """
+        return [(value - col_mean) / col_scale
+                for value, (col_mean, col_scale) in zip(values, self._mean_scale)]
+
+    def scale_many(self, values):
+        """scale_one for a matrix of rows, as from InputSchema.validate_many."""
+        return (values - self.mean) / self.scale
+
+    def derive_one(self, values):
+        """Feature vector from the output of scale_one."""
+        # NumPy scalars keep the derived-feature arithmetic cheap for one row
+        columns = {col: np.float64(values[i]) for i, col in self.derived_inputs}
+        return np.array(values + list(derive_features(columns).values()), dtype=np.float64)
+
+    def derive_many(self, rows):
+        """Feature matrix from the scaled inputs returned by scale_many."""
+        features = np.empty((len(rows), len(self.feature_names)), dtype=np.float64)
+        n_inputs = len(self.input_features)
+        features[:, :n_inputs] = rows
+        columns = dict(zip(self.input_features, features[:, :n_inputs].T))
+        for j, values in enumerate(derive_features(columns).values(), start=n_inputs):
+            features[:, j] = values
+        return features
@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTORS = ('thread', 'process')
+
+# Predictor of a process pool worker, loaded by _load_predictor
+_process_predictor = None
+
+
+class PoolSaturated(Exception):
+    """The inference pool already holds as many requests as it admits."""
+
+
+def _load_predictor():
+    global _process_predictor
+    from src.metrics import REGISTRY
+    from src.predict import ChurnPredictor
+    import config
+    # Shadow scoring, drift counts and stage timings stay with the worker
+    # process that reports them on /api/shadow, /api/drift and /api/metrics
+    config.DRIFT_MONITOR_ENABLED = False
+    REGISTRY.enabled = False
+    _process_predictor = ChurnPredictor(shadow=False)
+
+
+def _call_with_predictor(func, *args):
+    return func(_process_predictor, *args)
+
+
+class InferencePool:
+    """
+    Bounded pool that runs model calls for async request handlers.
+
+    At most `workers` calls run at once; up to max_pending calls in total,
+    running or waiting, are admitted, and run() raises PoolSaturated for
+    any more instead of queueing them, so a burst of batches gets a fast
+    503 rather than an ever longer queue, and the event loop is always free
+    to answer lightweight requests.
+
+    With kind='thread' calls get the caller's predictor (NumPy and the
+    native models release the GIL for much of the work). With
+    kind='process' each worker process loads its own predictor, so calls
+    don't compete for the GIL at the cost of a model copy per process and
+    pickling the request and response bodies; the called function must
+    then be importable (defined at module level). Those processes don't
+    shadow score, count drift or time stages, since nothing would report
+    it.
+    """
+
+    def __init__(self, workers=4, max_pending=64, kind='thread'):
+        """
+        Args:
+            workers (int): Calls running at once
+            max_pending (int): Calls admitted at once, running or waiting
+            kind (str): 'thread' or 'process'
+        """
+        if kind not in EXECUTORS:
+            raise ValueError(f'kind must be one of {", ".join(EXECUTORS)}, got {kind!r}')
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.kind = kind
+        if kind == 'process':
+            # Spawned, like the training pool: the workers load the model themselves
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_load_predictor
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix='inference')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, func, predictor, *args):
+        """
+        Run func(predictor, *args) on the pool and return its result.
+
+        In process mode, the pool process's own predictor is passed instead.
+
+        Raises:
+            PoolSaturated: max_pending calls are already admitted
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f'{self.pending} inference calls already pending')
+            self.pending += 1
+        try:
+            if self.kind == 'process':
+                future = self.executor.submit(_call_with_predictor, func, *args)
+            else:
+                future = self.executor.submit(func, predictor, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # Released when the call finishes, even if the awaiting request is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        """Pool size, admitted calls and counters, as reported by /api/health."""
+        with self._lock:
+            return {
+                'kind': self.kind,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
@@ -0,0 +1,286 @@
+import math
+import operator
+from itertools import repeat
+
+import numpy as np
+
+import config
+
+# Error codes of per-field validation errors
+MISSING = 'missing'
+NOT_OBJECT = 'not_object'
+INVALID_CATEGORY = 'invalid_category'
+NOT_NUMERIC = 'not_numeric'
+OUT_OF_RANGE = 'out_of_range'
+
+OUT_OF_RANGE_POLICIES = ('reject', 'clip', 'allow')
+
+# clean_data turns blank or unparsable TotalCharges into 0 instead of failing
+ZERO_FILLED = {'TotalCharges'}
+
+
+def _to_numeric(value):
+    """Scalar equivalent of pd.to_numeric(value, errors='coerce')."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class ValidationError(ValueError):
+    """Rejected input; errors holds the per-field error dicts."""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def field_error(field, code, message, **details):
+    """One structured validation error, as returned by the API."""
+    return dict({'field': field, 'code': code, 'message': message}, **details)
+
+
+def error_message(errors):
+    """Single message for a row's field errors, missing fields grouped first."""
+    missing = [error['field'] for error in errors if error['code'] == MISSING]
+    messages = [f'Missing required fields: {", ".join(missing)}'] if missing else []
+    messages += [error['message'] for error in errors if error['code'] != MISSING]
+    return '; '.join(messages)
+
+
+class InputSchema:
+    """
+    Validator for raw prediction inputs, compiled from the fitted encoders.
+
+    Each categorical field accepts the encoder's classes (and the integers
+    they spell, so SeniorCitizen may be 0 or '0'); each numeric field
+    accepts anything float() parses and is checked against its configured
+    range. Values are coerced to what the model was trained on in the same
+    pass: category codes and floats, in input_features order, ready for
+    CompiledTransform.scale_one/scale_many. Every problem in a row is
+    reported, not only the first one.
+
+    validate_many works column by column on the whole batch, so the common
+    case of well-formed rows costs a few C-level passes per field; only
+    rows and values that fail those passes are revisited one by one to
+    build their error entries.
+    """
+
+    def __init__(self, input_features, categories, numeric_ranges=None, out_of_range='reject'):
+        """
+        Args:
+            input_features (list): Required fields, in the scaler's order
+            categories (dict): Encoder classes per categorical field, in
+                code order
+            numeric_ranges (dict): {'min', 'max'} per numeric field; fields
+                without one only have to be finite
+            out_of_range (str): 'reject' out-of-range values, 'clip' them
+                to the range or 'allow' them
+        """
+        if out_of_range not in OUT_OF_RANGE_POLICIES:
+            raise ValueError(
+                f'out_of_range must be one of {", ".join(OUT_OF_RANGE_POLICIES)}, got {out_of_range!r}'
+            )
+        self.input_features = list(input_features)
+        self.categories = {col: [str(c) for c in categories[col]]
+                           for col in self.input_features if col in categories}
+        self.numeric_ranges = {col: dict(spec) for col, spec in (numeric_ranges or {}).items()
+                               if col in self.input_features and col not in self.categories}
+        self.out_of_range = out_of_range
+
+        # Raw value -> category code, per categorical field
+        self.codes = {}
+        for col, classes in self.categories.items():
+            codes = {c: i for i, c in enumerate(classes)}
+            for c, i in list(codes.items()):
+                if c.lstrip('-').isdigit():
+                    codes.setdefault(int(c), i)
+            self.codes[col] = codes
+
+        self._getter = operator.itemgetter(*self.input_features)
+        if len(self.input_features) == 1:
+            getter = self._getter
+            self._getter = lambda row: (getter(row),)
+
+    @classmethod
+    def from_transform(cls, transform, numeric_ranges=None, out_of_range=None):
+        """Schema for the categories of a CompiledTransform and the configured ranges."""
+        categories = {col: list(table) for col, table, _, _ in transform.columns
+                      if table is not None}
+        return cls(
+            transform.input_features, categories,
+            config.NUMERIC_RANGES if numeric_ranges is None else numeric_ranges,
+            config.OUT_OF_RANGE_POLICY if out_of_range is None else out_of_range
+        )
+
+    def describe(self):
+        """Accepted fields and values, as served by /api/features."""
+        return {
+            'required_fields': self.input_features,
+            'categorical_features': self.categories,
+            'numerical_features': {
+                col: self.numeric_ranges.get(col, {}) for col in self.input_features
+                if col not in self.categories
+            },
+            'out_of_range': self.out_of_range,
+        }
+
+    def _code(self, col, raw):
+        """Category code of raw, or -1."""
+        codes = self.codes[col]
+        try:
+            code = codes.get(raw, -1)
+        except TypeError:  # unhashable
+            return -1
+        return codes.get(str(raw), -1) if code < 0 else code
+
+    def _category_error(self, col, raw):
+        return field_error(col, INVALID_CATEGORY, f'Invalid value for {col}: {raw!r}',
+                           value=raw, allowed=self.categories[col])
+
+    def _numeric_error(self, col, raw):
+        return field_error(col, NOT_NUMERIC, f'Invalid numeric value for {col}: {raw!r}', value=raw)
+
+    def _range_error(self, col, raw):
+        spec = self.numeric_ranges[col]
+        return field_error(col, OUT_OF_RANGE,
+                           f"{col} must be between {spec['min']} and {spec['max']}, got {raw!r}",
+                           value=raw, min=spec['min'], max=spec['max'])
+
+    def validate_one(self, input_dict):
+        """
+        Validate and coerce a single input.
+
+        Returns:
+            tuple: (list of category codes and numbers as floats in
+            input_features order, or None if invalid; list of field errors)
+        """
+        if not isinstance(input_dict, dict):
+            return None, [field_error(None, NOT_OBJECT, 'Input must be an object')]
+
+        values = []
+        errors = []
+        for col in self.input_features:
+            try:
+                raw = input_dict[col]
+            except KeyError:
+                errors.append(field_error(col, MISSING, 'Missing required field'))
+                continue
+
+            if col in self.codes:
+                code = self._code(col, raw)
+                if code < 0:
+                    errors.append(self._category_error(col, raw))
+                values.append(float(code))
+                continue
+
+            value = _to_numeric(raw)
+            if math.isnan(value) and col in ZERO_FILLED:
+                value = 0.0
+            if not math.isfinite(value):
+                errors.append(self._numeric_error(col, raw))
+                continue
+            spec = self.numeric_ranges.get(col)
+            if (spec is not None and self.out_of_range != 'allow'
+                    and not spec['min'] <= value <= spec['max']):
+                if self.out_of_range == 'reject':
+                    errors.append(self._range_error(col, raw))
+                value = float(min(max(value, spec['min']), spec['max']))
+            values.append(value)
+
+        return (None, errors) if errors else (values, errors)
+
+    def validate_many(self, input_list):
+        """
+        Validate and coerce a list of inputs, skipping invalid rows.
+
+        Returns:
+            tuple: (float64 matrix of the coerced values of the valid rows,
+            positions of those rows in input_list, dict mapping invalid
+            positions to their list of field errors)
+        """
+        n_fields = len(self.input_features)
+        getter = self._getter
+        errors = {}
+        try:
+            # Well-formed batches are split into rows of values in one pass
+            rows = list(map(getter, input_list))
+            positions = list(range(len(rows)))
+        except (KeyError, TypeError, IndexError):
+            rows = []
+            positions = []
+            for i, input_dict in enumerate(input_list):
+                try:
+                    rows.append(getter(input_dict))
+                except (KeyError, TypeError, IndexError):
+                    errors[i] = self.validate_one(input_dict)[1]
+                    continue
+                positions.append(i)
+
+        n_rows = len(rows)
+        # Column-major, so each field is written contiguously
+        values = np.empty((n_rows, n_fields), dtype=np.float64, order='F')
+        # Row (index into rows) -> field errors
+        row_errors = {}
+        columns = zip(*rows) if rows else [()] * n_fields
+        for j, (col, column) in enumerate(zip(self.input_features, columns)):
+            if col in self.codes:
+                bad = self._validate_categories(col, column, values[:, j])
+            else:
+                bad = self._validate_numbers(col, column, values[:, j])
+            for k, error in bad:
+                row_errors.setdefault(k, []).append(error)
+
+        if row_errors:
+            for k in sorted(row_errors):
+                errors[positions[k]] = row_errors[k]
+            valid = np.ones(n_rows, dtype=bool)
+            valid[list(row_errors)] = False
+            values = values[valid]
+            positions = [i for k, i in enumerate(positions) if k not in row_errors]
+            errors = dict(sorted(errors.items()))
+        return values, positions, errors
+
+    def _validate_categories(self, col, column, out):
+        """Write the codes of column into out; returns [(row, error)] for invalid values."""
+        codes = self.codes[col]
+        try:
+            out[:] = np.fromiter(map(codes.__getitem__, column), dtype=np.float64,
+                                 count=len(column))
+            return []
+        except KeyError:
+            out[:] = np.fromiter(map(codes.get, column, repeat(-1)), dtype=np.float64,
+                                 count=len(column))
+        except TypeError:  # unhashable values
+            out[:] = [self._code(col, raw) for raw in column]
+
+        bad = []
+        for k in np.flatnonzero(out < 0).tolist():
+            # Retry as text, e.g. numpy strings or other types that print as a class
+            out[k] = self._code(col, column[k])
+            if out[k] < 0:
+                bad.append((k, self._category_error(col, column[k])))
+        return bad
+
+    def _validate_numbers(self, col, column, out):
+        """Write column as floats into out; returns [(row, error)] for invalid values."""
+        try:
+            out[:] = np.array(column, dtype=np.float64)
+        except (TypeError, ValueError):
+            out[:] = [_to_numeric(raw) for raw in column]
+
+        if col in ZERO_FILLED:
+            out[np.isnan(out)] = 0.0
+        invalid = ~np.isfinite(out)
+        bad = [(k, self._numeric_error(col, column[k])) for k in np.flatnonzero(invalid).tolist()]
+
+        spec = self.numeric_ranges.get(col)
+        if spec is not None and self.out_of_range != 'allow':
+            if self.out_of_range == 'clip':
+                np.clip(out, spec['min'], spec['max'], out=out)
+            else:
+                outside = ~((out >= spec['min']) & (out <= spec['max'])) & ~invalid
+                bad += [(k, self._range_error(col, column[k]))
+                        for k in np.flatnonzero(outside).tolist()]
+                bad.sort(key=lambda item: item[0])
+        return bad
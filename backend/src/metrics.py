@@ -0,0 +1,295 @@
+import collections
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from time import perf_counter
+
+# Latency buckets in seconds, from 50 µs (one compiled prediction) to 10 s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] += amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """Latency histogram with fixed buckets and optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labelvalues):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += seconds
+
+    def count(self, *labelvalues):
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(labelvalues, list(counts), total)
+                     for labelvalues, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues,
+                                        [('le', _format_value(float(bound)))])
+                yield f'{self.name}_bucket', labels, cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Gauge:
+    """Value read from a callback when metrics are rendered."""
+
+    def __init__(self, name, documentation, callback, labelnames=(), kind='gauge'):
+        """
+        Args:
+            callback (callable): Returns a number (None to skip), or a dict
+                mapping label value tuples to numbers when labelnames are given
+            kind (str): Prometheus type; 'counter' for totals kept elsewhere
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self):
+        value = self.callback()
+        if value is None:
+            return
+        if not self.labelnames:
+            value = {(): value}
+        for labelvalues, v in value.items():
+            yield self.name, _format_labels(self.labelnames, labelvalues), v
+
+
+class MetricsRegistry:
+    """
+    Named metrics rendered in the Prometheus text exposition format.
+
+    Metrics live in the process that records them; under gunicorn each
+    worker exposes its own series, so scrape the workers individually or
+    aggregate by instance.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=(), kind='gauge'):
+        return self.register(Gauge(name, documentation, callback, labelnames, kind))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def render(self):
+        """All metrics as Prometheus text format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry and the per-stage latency of predictions
+REGISTRY = MetricsRegistry()
+STAGE_SECONDS = REGISTRY.histogram(
+    'churn_stage_duration_seconds',
+    'Time spent in each stage of handling a prediction (parse, validate, prepare, engineer, model, explain)',
+    ['stage']
+)
+
+
+def record_stage(stage, start):
+    """
+    Observe the time since start (a perf_counter value) for stage.
+
+    Returns:
+        float: perf_counter() now, to start timing the next stage
+    """
+    now = perf_counter()
+    if REGISTRY.enabled:
+        STAGE_SECONDS.observe(now - start, stage)
+    return now
+
+
+def process_memory(pid='self'):
+    """
+    Memory of a process in MB, from /proc/<pid>/smaps_rollup (Linux).
+
+    rss counts every resident page, including pages shared with other
+    workers; pss splits each shared page evenly between the processes
+    mapping it, so the pss of a master and its workers adds up to the
+    memory they really use together. shared and private split rss by
+    whether another process maps the page too. Where smaps_rollup is not
+    available, only the peak rss of this process is reported.
+    """
+    fields = {'Rss': 'rss_mb', 'Pss': 'pss_mb', 'Shared_Clean': 'shared_mb',
+              'Shared_Dirty': 'shared_mb', 'Private_Clean': 'private_mb',
+              'Private_Dirty': 'private_mb'}
+    memory = dict.fromkeys(fields.values(), 0.0)
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    memory[fields[name]] += int(value.split()[0]) / 1024
+    except OSError:
+        if pid != 'self':
+            raise
+        return {'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return memory
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler for a running worker.
+
+    While started, a background thread snapshots the stack of every other
+    thread every interval_ms with sys._current_frames() and counts each
+    distinct stack. Nothing is instrumented, so the cost is one stack walk
+    per thread per interval and zero when stopped.
+    """
+
+    def __init__(self, max_depth=64):
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._reset(0.005)
+
+    def _reset(self, interval):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=5.0):
+        """Start sampling; returns False if the profiler is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._reset(interval_ms / 1000.0)
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, top=50):
+        """Stop sampling and return the report."""
+        with self._lock:
+            thread = self._thread
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        self.stopped_at = self.stopped_at or time.time()
+        return self.report(top)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def report(self, top=50):
+        """Sample counts, the hottest stacks and all stacks in folded format."""
+        stacks = self.stacks.most_common()
+        return {
+            'running': self.running,
+            'interval_ms': self.interval * 1000.0,
+            'samples': self.samples,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'top_stacks': [{'stack': stack.split(';'), 'count': count}
+                           for stack, count in stacks[:top]],
+            # Input for flamegraph.pl / speedscope
+            'folded': '\n'.join(f'{stack} {count}' for stack, count in stacks),
+        }
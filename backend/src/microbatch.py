@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.input_schema import ValidationError
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single predictions into vectorized batch calls.
+
+    Request threads call submit() and block; a background thread collects
+    queued inputs for up to max_wait_ms (or until max_batch_size rows are
+    waiting), scores them with one predict_batch call and hands each result
+    back to its own caller.
+
+    The background thread is started lazily and restarted after a fork, so
+    the batcher can be created at import time under gunicorn --preload.
+    Batching only helps when a worker serves requests concurrently, e.g.
+    gunicorn's gthread worker class.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=64, max_wait_ms=2.0):
+        """
+        Args:
+            predict_batch (callable): Scores a list of inputs, returning one
+                result per input; error entries carry an 'error' key
+            max_batch_size (int): Largest number of rows scored at once
+            max_wait_ms (float): Longest time the first queued row waits
+                for others to join its batch
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        # Upper bounds of the batch-size histogram buckets
+        self.buckets = [1]
+        while self.buckets[-1] < max_batch_size:
+            self.buckets.append(min(self.buckets[-1] * 2, max_batch_size))
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.batch_count = 0
+        self.row_count = 0
+        self.histogram = [0] * len(self.buckets)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Fresh queue and stats in every process; a forked copy of the
+            # parent's queue would have no thread draining it
+            self._queue = queue.Queue()
+            self._reset_stats()
+            worker = threading.Thread(target=self._run, name='microbatcher', daemon=True)
+            worker.start()
+            self._pid = os.getpid()
+
+    def submit(self, input_data, timeout=None):
+        """
+        Score one input as part of the next micro-batch.
+
+        Args:
+            input_data (dict): Dictionary containing feature values
+            timeout (float): Seconds to wait for the result, None to wait forever
+
+        Returns:
+            dict: Prediction result for input_data
+
+        Raises:
+            ValidationError: If the input is rejected by predict_batch
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((input_data, future))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first queued item, then gather more until full or timed out."""
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            self._record(len(items))
+            try:
+                results = self.predict_batch([input_data for input_data, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                if 'error' in result:
+                    future.set_exception(ValidationError(result['error'], result.get('fields', ())))
+                else:
+                    future.set_result(result)
+
+    def _record(self, size):
+        with self._lock:
+            self.batch_count += 1
+            self.row_count += size
+            for i, bound in enumerate(self.buckets):
+                if size <= bound:
+                    self.histogram[i] += 1
+                    break
+
+    def stats(self):
+        """Queue depth and batch-size histogram for this worker process."""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize() if self._pid == os.getpid() else 0,
+                'batches': self.batch_count,
+                'rows': self.row_count,
+                'mean_batch_size': self.row_count / self.batch_count if self.batch_count else 0.0,
+                'batch_size_histogram': {
+                    str(bound): count for bound, count in zip(self.buckets, self.histogram)
+                },
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0
+            }
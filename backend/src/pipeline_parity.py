@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import json
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_preprocessing import clean_data, encode_features, scale_features
+from src.feature_engineering import create_features
+from src.input_schema import error_message
+import config
+
+REFERENCE_STAGES = ['prepare', 'encode', 'scale', 'engineer', 'model']
+SERVING_STAGES = ['validate', 'prepare', 'engineer', 'model']
+
+
+class StageTimer:
+    """Accumulates wall time per named stage."""
+
+    def __init__(self, stages):
+        self.seconds = dict.fromkeys(stages, 0.0)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+
+def reference_predict(df, model, label_encoders, scaler, feature_names, timer):
+    """
+    Run raw rows through the training pipeline and the native model.
+
+    Returns:
+        tuple: (float64 feature matrix, churn probability per row)
+    """
+    with timer.stage('prepare'):
+        df = clean_data(df)
+        if 'Churn' in df.columns:
+            df = df.drop('Churn', axis=1)
+    with timer.stage('encode'):
+        df, _ = encode_features(df, label_encoders, fit=False)
+    with timer.stage('scale'):
+        df, _ = scale_features(df, scaler, fit=False)
+    with timer.stage('engineer'):
+        df = create_features(df)[feature_names]
+    with timer.stage('model'):
+        probabilities = model.predict_proba(df)[:, 1]
+    return df.to_numpy(dtype=np.float64), probabilities
+
+
+def serving_predict(predictor, artifacts, records, timer):
+    """
+    Run raw records through the stages of ChurnPredictor.predict_batch, uncached.
+
+    Returns:
+        tuple: (float64 feature matrix, churn probability per row)
+    """
+    with timer.stage('validate'):
+        values, _, errors = artifacts.schema.validate_many(records)
+    if errors:
+        raise ValueError(f'Serving rejected {len(errors)} rows, '
+                         f'e.g. {error_message(next(iter(errors.values())))}')
+    with timer.stage('prepare'):
+        rows = artifacts.transform.scale_many(values)
+    with timer.stage('engineer'):
+        features = artifacts.transform.derive_many(rows)
+    with timer.stage('model'):
+        probabilities = predictor._predict_proba(artifacts, features)[:, 1]
+    return features, probabilities
+
+
+def serving_predict_one(predictor, artifacts, record, timer):
+    """
+    Run one raw record through the stages of ChurnPredictor.predict, uncached.
+
+    Returns:
+        float: Churn probability
+    """
+    with timer.stage('validate'):
+        values, errors = artifacts.schema.validate_one(record)
+    if errors:
+        raise ValueError(f'Serving rejected a row: {error_message(errors)}')
+    with timer.stage('prepare'):
+        values = artifacts.transform.scale_one(values)
+    with timer.stage('engineer'):
+        features = artifacts.transform.derive_one(values).reshape(1, -1)
+    with timer.stage('model'):
+        return float(predictor._predict_proba(artifacts, features)[0, 1])
+
+
+def _throughput(timer, rows, total_seconds):
+    return {
+        'rows_per_second': rows / total_seconds if total_seconds else None,
+        'total_seconds': total_seconds,
+        'stage_seconds': timer.seconds,
+        'stage_us_per_row': {stage: seconds / rows * 1e6 if rows else None
+                             for stage, seconds in timer.seconds.items()},
+    }
+
+
+def run_parity(predictor, raw_path=None, rows=None, single_rows=200,
+               feature_atol=1e-9, probability_atol=1e-6):
+    """
+    Replay the raw CSV through the training pipeline and the predictor.
+
+    Every row is scored in batch mode by both paths and the first
+    single_rows rows are also scored one at a time. Feature vectors and
+    churn probabilities of the two paths are compared within the given
+    absolute tolerances, and throughput and per-stage latency are measured
+    for each path and mode. The prediction cache is bypassed.
+
+    Args:
+        predictor (ChurnPredictor): Loaded predictor to check
+        raw_path (Path): Raw CSV, defaults to config.RAW_DATA_PATH
+        rows (int): Only use the first rows rows of the file
+        single_rows (int): Rows replayed one at a time
+        feature_atol (float): Tolerance on feature values
+        probability_atol (float): Tolerance on churn probabilities
+
+    Returns:
+        dict: JSON-serializable report; report['passed'] says whether
+        both paths agree within tolerance
+    """
+    raw_path = raw_path or config.RAW_DATA_PATH
+    raw = pd.read_csv(raw_path, nrows=rows)
+    # Serving sees the text values, as in /api/predict/stream
+    records = pd.read_csv(raw_path, nrows=rows, dtype=str,
+                          keep_default_na=False).to_dict(orient='records')
+
+    artifacts = predictor.artifacts
+    model = artifacts.model
+    label_encoders, scaler = artifacts.label_encoders, artifacts.scaler
+    if label_encoders is None or scaler is None:
+        # Bundles carry lookup tables instead; use the fitted objects from training
+        import joblib
+        label_encoders = joblib.load(config.LABEL_ENCODERS_PATH)
+        scaler = joblib.load(config.SCALER_PATH)
+    feature_names = artifacts.transform.feature_names
+    n_rows = len(raw)
+    single_rows = min(single_rows, n_rows)
+
+    report = {
+        'rows': n_rows,
+        'single_rows': single_rows,
+        'model_type': type(model).__name__,
+        'model_version': artifacts.version,
+        'serving_model': 'compiled' if artifacts.compiled_model is not None else 'native',
+    }
+
+    # Batch mode: the whole file in one call per path
+    reference_timer = StageTimer(REFERENCE_STAGES)
+    start = time.perf_counter()
+    reference_features, reference_proba = reference_predict(
+        raw, model, label_encoders, scaler, feature_names, reference_timer
+    )
+    reference_seconds = time.perf_counter() - start
+
+    serving_timer = StageTimer(SERVING_STAGES)
+    start = time.perf_counter()
+    serving_features, serving_proba = serving_predict(predictor, artifacts, records, serving_timer)
+    serving_seconds = time.perf_counter() - start
+
+    # Single-row mode: one call per row per path
+    single_reference_timer = StageTimer(REFERENCE_STAGES)
+    single_serving_timer = StageTimer(SERVING_STAGES)
+    single_reference_proba = np.empty(single_rows)
+    single_serving_proba = np.empty(single_rows)
+    single_reference_seconds = single_serving_seconds = 0.0
+    for i in range(single_rows):
+        start = time.perf_counter()
+        _, proba = reference_predict(raw.iloc[[i]], model, label_encoders, scaler,
+                                     feature_names, single_reference_timer)
+        single_reference_seconds += time.perf_counter() - start
+        single_reference_proba[i] = proba[0]
+
+        start = time.perf_counter()
+        single_serving_proba[i] = serving_predict_one(predictor, artifacts, records[i],
+                                                      single_serving_timer)
+        single_serving_seconds += time.perf_counter() - start
+
+    feature_diff = float(np.max(np.abs(serving_features - reference_features), initial=0.0))
+    probability_diff = float(np.max(np.abs(serving_proba - reference_proba), initial=0.0))
+    single_probability_diff = float(np.max(
+        np.abs(single_serving_proba - single_reference_proba), initial=0.0
+    ))
+    threshold = predictor.decision_threshold
+    report['parity'] = {
+        'feature_max_abs_diff': feature_diff,
+        'feature_atol': feature_atol,
+        'worst_feature': feature_names[int(np.argmax(
+            np.max(np.abs(serving_features - reference_features), axis=0)
+        ))] if feature_diff > 0 else None,
+        'probability_max_abs_diff': max(probability_diff, single_probability_diff),
+        'probability_atol': probability_atol,
+        'label_agreement': float(np.mean((serving_proba > threshold) == (reference_proba > threshold)))
+        if n_rows else 1.0,
+    }
+    report['passed'] = bool(feature_diff <= feature_atol
+                            and report['parity']['probability_max_abs_diff'] <= probability_atol)
+    report['batch'] = {
+        'reference': _throughput(reference_timer, n_rows, reference_seconds),
+        'serving': _throughput(serving_timer, n_rows, serving_seconds),
+    }
+    report['single'] = {
+        'reference': _throughput(single_reference_timer, single_rows, single_reference_seconds),
+        'serving': _throughput(single_serving_timer, single_rows, single_serving_seconds),
+    }
+    return report
+
+
+def main():
+    """python src/pipeline_parity.py [--rows N] [-o report.json]; exits 1 on a parity failure."""
+    parser = argparse.ArgumentParser(
+        description='Check training/serving feature and probability parity and time both paths.'
+    )
+    parser.add_argument('--raw-path', default=str(config.RAW_DATA_PATH), help='Raw CSV to replay')
+    parser.add_argument('--rows', type=int, help='Only replay the first ROWS rows')
+    parser.add_argument('--single-rows', type=int, default=200,
+                        help='Rows also replayed one at a time')
+    parser.add_argument('--feature-atol', type=float, default=1e-9)
+    parser.add_argument('--probability-atol', type=float, default=1e-6)
+    parser.add_argument('-o', '--output', default='-', help="JSON report file; '-' writes to stdout")
+    args = parser.parse_args()
+
+    from src.predict import ChurnPredictor
+    with contextlib.redirect_stdout(sys.stderr):
+        predictor = ChurnPredictor(shadow=False)
+
+    report = run_parity(predictor, args.raw_path, rows=args.rows, single_rows=args.single_rows,
+                        feature_atol=args.feature_atol, probability_atol=args.probability_atol)
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    if not report['passed']:
+        print(f"Parity check failed: {report['parity']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
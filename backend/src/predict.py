@@ -1,5 +1,6 @@
-import joblib
-import pandas as pd
+import itertools
+import threading
+import time
 import numpy as np
 from pathlib import Path
 import sys
@@ -7,79 +8,579 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.data_preprocessing import prepare_input_data
-from src.feature_engineering import create_features
+from src.feature_transform import CompiledTransform
+from src.input_schema import InputSchema, ValidationError, error_message
+from src.metrics import REGISTRY, record_stage
+from src.compiled_model import CompiledModel, compile_model
+from src.reason_codes import top_reasons
+from src.prediction_cache import PredictionCache, artifact_fingerprint
+from src.artifact_bundle import ArtifactBundle, current_bundle_dir
+from src.drift_monitor import DriftMonitor, load_reference
+from src.shadow_scoring import ShadowScorer
 import config
 
+_generations = itertools.count(1)
+
+PREDICTED_ROWS = REGISTRY.counter(
+    'churn_predicted_rows_total', 'Rows passed to predict/predict_batch, by outcome', ['outcome']
+)
+
+class ModelArtifacts:
+    """
+    One loaded model version: input schema, feature transform, model and
+    label table.
+    
+    ChurnPredictor replaces the whole object on reload, so a request that
+    picked up an instance keeps scoring with it even if a reload lands
+    mid-request.
+    """
+    
+    def __init__(self, transform, churn_labels, version, source, model_path,
+                 compiled_model=None, model=None, scaler=None, label_encoders=None,
+                 drift_reference=None):
+        self.transform = transform
+        self.schema = InputSchema.from_transform(transform)
+        # Counts start afresh with every model version, against its own training data
+        self.drift_monitor = None
+        if drift_reference is not None and config.DRIFT_MONITOR_ENABLED:
+            self.drift_monitor = DriftMonitor(drift_reference, transform.input_features)
+        self.churn_labels = churn_labels
+        self.version = version
+        self.source = source
+        self.model_path = model_path
+        self.compiled_model = compiled_model
+        self.scaler = scaler
+        self.label_encoders = label_encoders
+        self.generation = next(_generations)
+        self.pid = os.getpid()
+        self.loaded_at = time.time()
+        self.load_seconds = None
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._explainer = None
+    
+    @classmethod
+    def from_bundle(cls, bundle_dir):
+        """Artifacts of the memory-mapped bundle in bundle_dir (see ArtifactBundle)."""
+        bundle = ArtifactBundle(bundle_dir)
+        return cls(
+            bundle.transform, bundle.churn_labels, bundle.version, 'bundle',
+            bundle.native_model_path, compiled_model=bundle.compiled_model,
+            drift_reference=bundle.drift_reference
+        )
+    
+    @property
+    def model(self):
+        """Native sklearn/xgboost model, unpickled on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import joblib
+                    self._model = joblib.load(self.model_path)
+        return self._model
+    
+    @property
+    def explainer(self):
+        """
+        Compiled model with contribution tables, for reason codes.
+        
+        The compiled model itself unless it was exported before reason codes
+        existed, in which case the native model is compiled again on first use.
+        """
+        compiled = self.compiled_model
+        if compiled is not None and compiled.has_contributions:
+            return compiled
+        if self._explainer is None:
+            model = self.model
+            with self._model_lock:
+                if self._explainer is None:
+                    print(f"⚠️  Model {self.version} has no contribution tables; compiling them now")
+                    self._explainer = CompiledModel(compile_model(model))
+        return self._explainer
+    
+    def predict_proba(self, features):
+        """Score a 2D feature array with the compiled model when it is faster."""
+        compiled = self.compiled_model
+        if compiled is not None and (
+            compiled.kind == 'linear' or len(features) <= config.COMPILED_MODEL_MAX_ROWS
+        ):
+            return compiled.predict_proba(features)
+        
+        import pandas as pd
+        df = pd.DataFrame(features, columns=self.transform.feature_names)
+        return self.model.predict_proba(df)
+    
+    def freeze(self):
+        """Make the transform and compiled model arrays read-only."""
+        for owner in (self.transform, self.compiled_model):
+            for value in vars(owner).values() if owner is not None else ():
+                if isinstance(value, np.ndarray):
+                    value.setflags(write=False)
+
 class ChurnPredictor:
     """Class to handle churn prediction."""
     
-    def __init__(self):
-        """Initialize the predictor by loading model and preprocessing objects."""
-        self.model = None
-        self.scaler = None
-        self.label_encoders = None
+    def __init__(self, shadow=True):
+        """
+        Initialize the predictor by loading model and preprocessing objects.
+        
+        Args:
+            shadow (bool): Shadow score the traffic with the challengers in
+                config.CHALLENGER_BUNDLES, if any
+        """
+        self.artifacts = None
+        self.cache = None
+        self.reload_count = 0
+        self.last_reload_error = None
+        self._reload_lock = threading.Lock()
+        self._watcher_pid = None
+        self._watcher_stop = threading.Event()
+        self.decision_threshold = config.DECISION_THRESHOLD
+        if not 0.0 <= self.decision_threshold <= 1.0:
+            raise ValueError(f"DECISION_THRESHOLD must be in [0, 1], got {self.decision_threshold}")
         self.load_artifacts()
+        self.shadow = self._load_challengers() if shadow else None
+    
+    # Read-only views of the active artifacts
+    @property
+    def model(self):
+        return self.artifacts.model
+    
+    @property
+    def scaler(self):
+        return self.artifacts.scaler
+    
+    @property
+    def label_encoders(self):
+        return self.artifacts.label_encoders
+    
+    @property
+    def transform(self):
+        return self.artifacts.transform
+    
+    @property
+    def schema(self):
+        return self.artifacts.schema
+    
+    @property
+    def compiled_model(self):
+        return self.artifacts.compiled_model
+    
+    @property
+    def churn_labels(self):
+        return self.artifacts.churn_labels
+    
+    @property
+    def model_version(self):
+        return self.artifacts.version
+    
+    @property
+    def bundle_version(self):
+        return self.artifacts.version if self.artifacts.source == 'bundle' else None
     
     def load_artifacts(self):
         """Load trained model and preprocessing objects."""
         try:
-            self.model = joblib.load(config.MODEL_PATH)
-            self.scaler = joblib.load(config.SCALER_PATH)
-            encoders_path = config.MODEL_DIR / 'label_encoders.pkl'
-            self.label_encoders = joblib.load(encoders_path)
-            print("✅ Model and preprocessing objects loaded successfully")
+            self.artifacts = self._load()
         except FileNotFoundError as e:
             print(f"❌ Error loading artifacts: {e}")
             print("Please train the model first by running: python models/train_model.py")
             raise
+        
+        if config.PREDICTION_CACHE_SIZE > 0:
+            self.cache = PredictionCache(
+                config.PREDICTION_CACHE_SIZE,
+                config.PREDICTION_CACHE_TTL,
+                artifact_paths=self._watched_paths()
+            )
+    
+    def _watched_paths(self):
+        return [config.MODEL_PATH, config.SCALER_PATH, config.LABEL_ENCODERS_PATH,
+                config.BUNDLE_DIR / 'LATEST', config.RELOAD_TRIGGER_PATH]
+    
+    def _load(self):
+        """Load the current bundle, or the pickles if there is none."""
+        start = time.perf_counter()
+        bundle_dir = current_bundle_dir() if config.USE_ARTIFACT_BUNDLE else None
+        if bundle_dir is not None:
+            artifacts = self._load_bundle(bundle_dir)
+        else:
+            artifacts = self._load_pickles()
+        artifacts.load_seconds = time.perf_counter() - start
+        return artifacts
+    
+    def _load_bundle(self, bundle_dir):
+        """Load the memory-mapped artifact bundle; no pickles or sklearn imports."""
+        artifacts = ModelArtifacts.from_bundle(bundle_dir)
+        print(f"✅ Artifact bundle {artifacts.version} ({artifacts.compiled_model.model_type}) loaded")
+        return artifacts
+    
+    def _load_pickles(self):
+        """Load the pickled model, scaler and label encoders from training."""
+        import joblib
+        model = joblib.load(config.MODEL_PATH)
+        scaler = joblib.load(config.SCALER_PATH)
+        label_encoders = joblib.load(config.LABEL_ENCODERS_PATH)
+        transform = CompiledTransform.from_fitted(label_encoders, scaler)
+        # Decoded label for each model class, indexed like predict_proba columns
+        churn_labels = [
+            str(label) for label in
+            label_encoders['Churn'].inverse_transform(model.classes_)
+        ]
+        print("✅ Model and preprocessing objects loaded successfully")
+        
+        modified = os.stat(config.MODEL_PATH).st_mtime
+        version = 'pickles-' + time.strftime('%Y%m%d-%H%M%S', time.localtime(modified))
+        return ModelArtifacts(
+            transform, churn_labels, version, 'pickles', config.MODEL_PATH,
+            compiled_model=self._load_compiled_model(model, transform),
+            model=model, scaler=scaler, label_encoders=label_encoders,
+            drift_reference=load_reference(config.DRIFT_REFERENCE_PATH)
+        )
+    
+    def _load_challengers(self):
+        """ShadowScorer for the bundles in config.CHALLENGER_BUNDLES, or None."""
+        challengers = []
+        for name in config.CHALLENGER_BUNDLES:
+            bundle_dir = Path(name)
+            if not bundle_dir.is_dir():
+                bundle_dir = config.BUNDLE_DIR / name
+            try:
+                artifacts = self._load_bundle(bundle_dir)
+                self._validate(artifacts)
+            except Exception as e:
+                print(f"⚠️  Challenger {name} could not be loaded; ignoring it: {e}")
+                continue
+            challengers.append(artifacts)
+        if not challengers:
+            return None
+        return ShadowScorer(challengers, self.decision_threshold,
+                            max_pending=config.SHADOW_MAX_PENDING)
+    
+    def _load_compiled_model(self, model, transform):
+        """Load the compiled NumPy model if present and consistent with model.pkl."""
+        if not config.USE_COMPILED_MODEL or not config.COMPILED_MODEL_PATH.exists():
+            return None
+        
+        compiled = CompiledModel.load(config.COMPILED_MODEL_PATH)
+        
+        # Guard against a compiled file left over from a different model.pkl
+        import pandas as pd
+        probe = np.random.default_rng(config.RANDOM_STATE).normal(
+            size=(32, len(transform.feature_names))
+        )
+        expected = model.predict_proba(
+            pd.DataFrame(probe, columns=transform.feature_names)
+        )
+        if (compiled.n_features != probe.shape[1]
+                or not np.allclose(compiled.predict_proba(probe), expected, atol=1e-6)):
+            print(f"⚠️  {config.COMPILED_MODEL_PATH} does not match the loaded model; ignoring it")
+            return None
+        
+        print(f"✅ Compiled {compiled.model_type} loaded")
+        return compiled
+    
+    def prepare_for_fork(self):
+        """
+        Get the loaded model ready to be shared by forked workers.
+        
+        Called once in the gunicorn master when the app is preloaded (see
+        gunicorn.conf.py). If large batches of a tree model would fall back
+        to the native model, it is unpickled now, so the workers share one
+        copy instead of each loading its own on first use; and the model
+        arrays are made read-only, so a stray write can't copy their pages
+        into a single worker.
+        """
+        artifacts = self.artifacts
+        compiled = artifacts.compiled_model
+        if compiled is None or compiled.kind != 'linear':
+            artifacts.model
+        artifacts.freeze()
     
-    def predict(self, input_data):
+    def _validate(self, artifacts):
+        """Score a synthetic customer through the serving stages to check that new artifacts are usable."""
+        probe = {}
+        for col, table, _, _ in artifacts.transform.columns:
+            probe[col] = next(iter(table)) if table is not None else 0
+        values, errors = artifacts.schema.validate_one(probe)
+        if errors:
+            raise ValueError(f"Model {artifacts.version} rejects its own inputs: {error_message(errors)}")
+        features = artifacts.transform.derive_one(artifacts.transform.scale_one(values))
+        probability = self._predict_proba(artifacts, features.reshape(1, -1))
+        
+        if (np.shape(probability) != (1, 2) or not np.all(np.isfinite(probability))
+                or not np.isclose(probability.sum(), 1.0)):
+            raise ValueError(f"Model {artifacts.version} returned invalid probabilities")
+        if len(artifacts.churn_labels) != 2:
+            raise ValueError(f"Model {artifacts.version} has {len(artifacts.churn_labels)} labels")
+    
+    def reload(self):
+        """
+        Load and validate the current artifacts, then swap them in atomically.
+        
+        Requests already running keep the artifacts they started with. On
+        failure the active model is left untouched and the error re-raised.
+        
+        Returns:
+            str: Version of the newly active model
+        """
+        with self._reload_lock:
+            try:
+                artifacts = self._load()
+                self._validate(artifacts)
+            except Exception as e:
+                self.last_reload_error = f"{type(e).__name__}: {e}"
+                print(f"❌ Model reload failed, keeping {self.artifacts.version}: {e}")
+                raise
+            
+            self.artifacts = artifacts
+            self.reload_count += 1
+            self.last_reload_error = None
+            if self.cache is not None:
+                self.cache.clear()
+            print(f"✅ Model {artifacts.version} activated in {artifacts.load_seconds:.3f}s")
+            return artifacts.version
+    
+    def reload_in_background(self):
+        """
+        Start reload() on a background thread.
+        
+        Returns:
+            bool: False if a reload is already running
+        """
+        if self._reload_lock.locked():
+            return False
+        
+        def run():
+            try:
+                self.reload()
+            except Exception:
+                pass  # recorded in last_reload_error
+        
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
+        return True
+    
+    def ensure_watcher(self, interval):
+        """
+        Poll the artifact files every interval seconds and reload on change.
+        
+        Safe to call on every request: the thread is started once per
+        process, including in each forked gunicorn worker. A change must be
+        seen on two consecutive polls, so pickles still being written by
+        train_model.py are not picked up half-way.
+        """
+        if interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._reload_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            self._watcher_stop.clear()
+        
+        def watch():
+            active = artifact_fingerprint(self._watched_paths())
+            pending = None
+            while not self._watcher_stop.wait(interval):
+                current = artifact_fingerprint(self._watched_paths())
+                if current == active:
+                    pending = None
+                elif current != pending:
+                    pending = current
+                else:
+                    active = current
+                    pending = None
+                    try:
+                        self.reload()
+                    except Exception:
+                        pass  # recorded in last_reload_error
+        
+        threading.Thread(target=watch, name='model-watcher', daemon=True).start()
+    
+    def stop_watcher(self):
+        """Stop the artifact watcher thread of this process."""
+        self._watcher_stop.set()
+        self._watcher_pid = None
+    
+    def status(self):
+        """Active model details for /api/health."""
+        artifacts = self.artifacts
+        return {
+            'version': artifacts.version,
+            'source': artifacts.source,
+            'type': artifacts.compiled_model.model_type if artifacts.compiled_model
+                    else type(artifacts.model).__name__,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(artifacts.loaded_at)),
+            'load_seconds': artifacts.load_seconds,
+            # Loaded in the gunicorn master before fork, so shared with the other workers
+            'preloaded': artifacts.pid != os.getpid(),
+            'reloads': self.reload_count,
+            'last_reload_error': self.last_reload_error
+        }
+    
+    def _predict_proba(self, artifacts, features):
+        return artifacts.predict_proba(features)
+    
+    def _cached_predict_proba(self, artifacts, features):
+        """Score only the rows of a feature matrix that are not cached."""
+        if self.cache is None:
+            return self._predict_proba(artifacts, features)
+        
+        # Keys carry the model generation so results from a replaced model never hit
+        keys = [(artifacts.generation, row.tobytes()) for row in features]
+        probabilities = [self.cache.get(key) for key in keys]
+        missing = [i for i, probability in enumerate(probabilities) if probability is None]
+        if missing:
+            scored = self._predict_proba(artifacts, features[missing])
+            for i, probability in zip(missing, scored):
+                # Store plain floats, not views that would pin the whole batch array
+                probabilities[i] = (float(probability[0]), float(probability[1]))
+                self.cache.put(keys[i], probabilities[i])
+        
+        return probabilities
+    
+    def _format_result(self, artifacts, probability):
+        """Build the response for one row of predict_proba output."""
+        no_churn, churn = float(probability[0]), float(probability[1])
+        return {
+            'churn': artifacts.churn_labels[int(churn > self.decision_threshold)],
+            'churn_probability': churn,
+            'no_churn_probability': no_churn,
+            'confidence': max(no_churn, churn)
+        }
+    
+    def _native_leaves(self, artifacts, features, n_trees):
+        """Leaf of every row in every tree, found by the native model."""
+        model = artifacts.model
+        if type(model).__name__ == 'GradientBoostingClassifier':
+            # Checks its input against its first tree, which was fitted without column names
+            leaves = model.apply(features)
+        else:
+            import pandas as pd
+            leaves = model.apply(pd.DataFrame(features, columns=artifacts.transform.feature_names))
+        # Gradient boosting adds a trailing axis; xgboost counts rounds past early stopping
+        return leaves.reshape(len(features), -1)[:, :n_trees]
+    
+    def _explain(self, artifacts, features, top_k):
+        """Score a 2D feature array and pick the top_k reason codes of each row."""
+        start = time.perf_counter()
+        explainer = artifacts.explainer
+        leaves = None
+        if explainer.kind != 'linear' and len(features) > config.COMPILED_MODEL_MAX_ROWS:
+            # Same cut-over as predict_proba: the native model walks big batches faster
+            leaves = self._native_leaves(artifacts, features, len(explainer.roots))
+        probabilities, contributions = explainer.explain(features, leaves=leaves)
+        start = record_stage('model', start)
+        reasons = top_reasons(contributions, artifacts.transform.feature_names, top_k)
+        record_stage('explain', start)
+        return probabilities, reasons
+    
+    def predict(self, input_data, top_k=None):
         """
         Make prediction for a single input.
         
         Args:
             input_data (dict): Dictionary containing feature values
+            top_k (int): If given, also return the top_k reason codes under
+                'reasons' (see predict_batch)
             
         Returns:
             dict: Prediction result with churn label and probability
+            
+        Raises:
+            ValidationError: If a field is missing or has an invalid value;
+                its errors attribute lists every failing field
         """
-        # Prepare input
-        df = prepare_input_data(input_data, self.label_encoders, self.scaler)
+        artifacts = self.artifacts
         
-        # Create additional features
-        df = create_features(df)
+        # Validate, then prepare input and create additional features without pandas
+        start = time.perf_counter()
+        values, errors = artifacts.schema.validate_one(input_data)
+        if errors:
+            PREDICTED_ROWS.inc('invalid')
+            raise ValidationError(error_message(errors), errors)
+        if artifacts.drift_monitor is not None:
+            artifacts.drift_monitor.observe_one(values)
+        start = record_stage('validate', start)
+        scaled = artifacts.transform.scale_one(values)
+        start = record_stage('prepare', start)
+        features = artifacts.transform.derive_one(scaled)
+        start = record_stage('engineer', start)
         
-        # Make prediction
-        prediction = self.model.predict(df)[0]
-        probability = self.model.predict_proba(df)[0]
+        if top_k:
+            probabilities, reasons = self._explain(artifacts, features.reshape(1, -1), top_k)
+            PREDICTED_ROWS.inc('ok')
+            if self.shadow is not None:
+                self.shadow.submit(artifacts, [values], probabilities)
+            return dict(self._format_result(artifacts, probabilities[0]), reasons=reasons[0])
         
-        # Decode prediction
-        churn_label = self.label_encoders['Churn'].inverse_transform([prediction])[0]
+        # Make prediction with a single model call; identical validated
+        # inputs map to the same feature bytes and share a cache entry
+        probability = self._cached_predict_proba(artifacts, features.reshape(1, -1))[0]
+        record_stage('model', start)
+        PREDICTED_ROWS.inc('ok')
+        if self.shadow is not None:
+            self.shadow.submit(artifacts, [values], [probability])
         
-        result = {
-            'churn': churn_label,
-            'churn_probability': float(probability[1]),
-            'no_churn_probability': float(probability[0]),
-            'confidence': float(max(probability))
-        }
-        
-        return result
+        return self._format_result(artifacts, probability)
     
-    def predict_batch(self, input_list):
+    def predict_batch(self, input_list, top_k=None):
         """
         Make predictions for multiple inputs.
         
+        The batch is validated column by column, goes through the compiled
+        feature transform and is scored with a single model call. Invalid
+        rows do not fail the batch; their slot holds an error entry instead
+        of a prediction.
+        
+        With top_k, every prediction also gets 'reasons': the top_k model
+        features by absolute contribution to its churn score, read from the
+        contribution tables of the compiled model in the same pass that
+        scores the batch (see CompiledModel.explain). Such batches bypass
+        the prediction cache.
+        
+        With challengers configured (config.CHALLENGER_BUNDLES), the
+        validated rows and the champion's probabilities are then handed to
+        the ShadowScorer, which scores them in the background.
+        
         Args:
             input_list (list): List of dictionaries containing feature values
+            top_k (int): Reason codes per prediction; None for none
             
         Returns:
-            list: List of prediction results
+            list: Prediction results in input order; invalid rows are
+            returned as {'index': i, 'error': message, 'fields': [field errors]}
         """
-        results = []
-        for input_data in input_list:
-            result = self.predict(input_data)
-            results.append(result)
+        artifacts = self.artifacts
+        start = time.perf_counter()
+        values, positions, errors = artifacts.schema.validate_many(input_list)
+        if artifacts.drift_monitor is not None:
+            artifacts.drift_monitor.observe_many(values)
+        start = record_stage('validate', start)
+        rows = artifacts.transform.scale_many(values)
+        start = record_stage('prepare', start)
+        features = artifacts.transform.derive_many(rows)
+        start = record_stage('engineer', start)
+        
+        results = [None] * len(input_list)
+        for i, field_errors in errors.items():
+            results[i] = {'index': i, 'error': error_message(field_errors), 'fields': field_errors}
+        
+        if positions and top_k:
+            probabilities, reasons = self._explain(artifacts, features, top_k)
+            for i, probability, row_reasons in zip(positions, probabilities, reasons):
+                results[i] = self._format_result(artifacts, probability)
+                results[i]['reasons'] = row_reasons
+        elif positions:
+            probabilities = self._cached_predict_proba(artifacts, features)
+            for i, probability in zip(positions, probabilities):
+                results[i] = self._format_result(artifacts, probability)
+            record_stage('model', start)
+        if positions and self.shadow is not None:
+            self.shadow.submit(artifacts, values, probabilities)
+        
+        PREDICTED_ROWS.inc('ok', amount=len(positions))
+        if errors:
+            PREDICTED_ROWS.inc('invalid', amount=len(errors))
         return results
 
 def test_predictor():
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def artifact_fingerprint(paths):
+    """(path, mtime, size) for each artifact; changes whenever a file is rewritten."""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append((str(path), None, None))
+    return tuple(fingerprint)
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with per-entry TTL for model outputs.
+
+    Keys are the bytes of the validated feature vector, so inputs that only
+    differ in representation (SeniorCitizen 0 vs '0', 12 vs 12.0) share an
+    entry. The cache is cleared whenever any of the watched artifact files
+    changes on disk; they are re-checked at most every check_interval seconds.
+    """
+
+    def __init__(self, max_size, ttl, artifact_paths=(), check_interval=1.0):
+        """
+        Args:
+            max_size (int): Maximum number of cached entries
+            ttl (float): Seconds an entry stays valid; 0 or less never expires
+            artifact_paths (iterable): Files whose change invalidates the cache
+            check_interval (float): Seconds between artifact checks
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.artifact_paths = list(artifact_paths)
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = artifact_fingerprint(self.artifact_paths)
+        self._next_check = time.monotonic() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_artifacts(self, now):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        fingerprint = artifact_fingerprint(self.artifact_paths)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_artifacts(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and now >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries."""
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and re-read the artifact fingerprint."""
+        with self._lock:
+            self._entries.clear()
+            self._fingerprint = artifact_fingerprint(self.artifact_paths)
+            self.invalidations += 1
+
+    def stats(self):
+        """Counters for /api/health."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,82 @@
+import json
+import time
+import traceback
+
+from src.input_schema import ValidationError
+from src.metrics import record_stage
+
+
+def _json_body(body):
+    start = time.perf_counter()
+    data = json.loads(body) if body else None
+    record_stage('parse', start)
+    return data
+
+
+def _dump(payload, status=200):
+    return json.dumps(payload).encode(), status
+
+
+def predict_request(predictor, body, top_k=None, batcher=None):
+    """
+    Body of POST /api/predict, shared by the Flask app and the async app.
+
+    Parses the request body, scores it and serializes the response, so the
+    async app can run all of it on an InferencePool and large bodies never
+    tie up the event loop. top_k requests reason codes, as parsed from the
+    query string by parse_explain.
+
+    Args:
+        predictor (ChurnPredictor): Scores the input
+        body (bytes): Raw JSON request body
+        top_k (int): Reason codes per prediction, None for none
+        batcher (MicroBatcher): Coalesces predictions without reason codes
+            with those of concurrent requests, if given
+
+    Returns:
+        tuple: (JSON response body as bytes, HTTP status)
+    """
+    try:
+        data = _json_body(body)
+    except ValueError as e:
+        return _dump({'error': f'Invalid JSON: {e}'}, 400)
+    try:
+        if not data:
+            return _dump({'error': 'No input data provided'}, 400)
+        if top_k:
+            result = predictor.predict(data, top_k=top_k)
+        elif batcher is not None:
+            result = batcher.submit(data)
+        else:
+            result = predictor.predict(data)
+        return _dump({'success': True, 'prediction': result})
+    except ValidationError as e:
+        return _dump({'error': str(e), 'fields': e.errors}, 400)
+    except Exception as e:
+        print(f"Error during prediction: {str(e)}")
+        print(traceback.format_exc())
+        return _dump({'error': f'Prediction failed: {str(e)}'}, 500)
+
+
+def predict_batch_request(predictor, body, top_k=None):
+    """Body of POST /api/predict/batch; see predict_request."""
+    try:
+        data = _json_body(body)
+    except ValueError as e:
+        return _dump({'error': f'Invalid JSON: {e}'}, 400)
+    try:
+        if not isinstance(data, dict) or 'customers' not in data:
+            return _dump({'error': 'No input data provided. Expected {"customers": [...]}'}, 400)
+        customers = data['customers']
+        if not isinstance(customers, list):
+            return _dump({'error': 'customers must be a list'}, 400)
+
+        results = predictor.predict_batch(customers, top_k=top_k)
+        # Invalid rows are reported per index without failing the batch
+        errors = [result for result in results if 'error' in result]
+        return _dump({'success': True, 'predictions': results,
+                      'count': len(results), 'errors': errors})
+    except Exception as e:
+        print(f"Error during batch prediction: {str(e)}")
+        print(traceback.format_exc())
+        return _dump({'error': f'Batch prediction failed: {str(e)}'}, 500)
@@ -0,0 +1,340 @@
+import copy
+import hashlib
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import data_preprocessing, feature_engineering
+from src.columnar_store import (META_NAME, ColumnarAppender, ColumnarWriter, iter_chunks,
+                                read_columns, read_meta, write_meta)
+import config
+
+CACHE_FORMAT_VERSION = 1
+KEY_NAME = 'CACHE_KEY'
+PREPROCESSING_NAME = 'preprocessing.pkl'
+
+# The cache holds the encoded, unscaled inputs: category codes as int8 and
+# the raw numerics as float64. Scaling and feature engineering run on load
+# (processed_frame), in float64 like serving, so models train on exactly
+# the features serving computes
+COMPACT_DTYPES = {col: 'int8' for col in data_preprocessing.RAW_CATEGORICAL_COLUMNS}
+DEFAULT_DTYPE = 'float64'
+MAX_INT8_CLASSES = np.iinfo(np.int8).max + 1
+
+# Modules whose code determines the processed data
+CODE_MODULES = [data_preprocessing, feature_engineering]
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def code_version():
+    """Hash of the preprocessing and feature engineering source code."""
+    digest = hashlib.sha256(f'format-{CACHE_FORMAT_VERSION}'.encode())
+    for module in CODE_MODULES:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def _raw_digest(raw_path, meta):
+    """Digest of the raw file, reusing the one in meta if size and mtime are unchanged."""
+    stat = os.stat(raw_path)
+    raw_stat = [stat.st_size, stat.st_mtime_ns]
+    if meta and meta.get('raw_stat') == raw_stat and meta.get('raw_sha256'):
+        return meta['raw_sha256'], raw_stat
+    return file_digest(raw_path), raw_stat
+
+
+def cache_key(raw_digest):
+    return hashlib.sha256(f'{raw_digest}:{code_version()}'.encode()).hexdigest()
+
+
+def _stored_key(cache_path):
+    try:
+        return (Path(cache_path) / KEY_NAME).read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _check_int8_codes(label_encoders):
+    """Raise ValueError if a categorical column has too many values for int8 codes."""
+    for col, le in label_encoders.items():
+        if len(le.classes_) > MAX_INT8_CLASSES:
+            raise ValueError(f'{col} has {len(le.classes_)} distinct values; '
+                             f'the processed data cache stores at most {MAX_INT8_CLASSES}')
+
+
+def processed_frame(columns, scaler, rows=None):
+    """
+    Model features from cached columns: scaled with the frozen scaler, features added.
+
+    Args:
+        columns (dict): Column arrays of the cache, as from read_columns
+        scaler (StandardScaler): Scaler the cache was built with
+        rows (array): Row indices to take, all rows by default
+
+    Returns:
+        DataFrame: Same columns and values as preprocess_data followed by
+            create_features
+    """
+    df = pd.DataFrame({col: values if rows is None else values[rows]
+                       for col, values in columns.items()})
+    df, _ = data_preprocessing.scale_features(df, scaler, fit=False)
+    return feature_engineering.create_features(df)
+
+
+def _write_frame(df, cache_path, chunk_size=100_000):
+    writer = ColumnarWriter(cache_path, dtypes=COMPACT_DTYPES, default_dtype=DEFAULT_DTYPE)
+    for start in range(0, len(df), chunk_size):
+        writer.append(df.iloc[start:start + chunk_size])
+    return writer.close()
+
+
+def snapshot_dir(cache_path):
+    """Directory of the raw snapshots appended to a cache, kept beside it."""
+    cache_path = Path(cache_path)
+    return cache_path.with_name(f'{cache_path.name}.snapshots')
+
+
+def _concatenate_raw(raw_path, snapshot_paths, output_path):
+    """Write the raw CSV followed by the data rows of each snapshot."""
+    with open(raw_path, 'rb') as f:
+        header = f.readline()
+    with open(output_path, 'w+b') as out:
+        for k, path in enumerate([raw_path] + list(snapshot_paths)):
+            with open(path, 'rb') as f:
+                if k and f.readline().rstrip(b'\r\n') != header.rstrip(b'\r\n'):
+                    raise ValueError(f"{path} does not have the columns of {raw_path}")
+                shutil.copyfileobj(f, out)
+            if out.tell():
+                out.seek(-1, os.SEEK_END)
+                if out.read(1) != b'\n':
+                    out.write(b'\n')
+
+
+def build_processed_data(raw_path, cache_path, chunk_size=0, snapshot_paths=()):
+    """
+    Encode the raw file into the columnar cache, in memory or in chunks.
+
+    The rows of any snapshot_paths follow the raw file's, and the encoders
+    and scaler are fitted on all of them.
+
+    Returns:
+        tuple: (label_encoders, scaler)
+    """
+    combined_path = None
+    if snapshot_paths:
+        combined_path = cache_path.with_name(f'.{cache_path.name}.raw.csv')
+        _concatenate_raw(raw_path, snapshot_paths, combined_path)
+        raw_path = combined_path
+    try:
+        if chunk_size > 0:
+            label_encoders = data_preprocessing.fit_label_encoders_chunked(raw_path, chunk_size)
+            _check_int8_codes(label_encoders)
+            _, scaler = data_preprocessing.encode_data_chunked(
+                raw_path, cache_path, chunk_size=chunk_size, label_encoders=label_encoders,
+                fit=True, dtypes=COMPACT_DTYPES, default_dtype=DEFAULT_DTYPE
+            )
+        else:
+            df = data_preprocessing.clean_data(data_preprocessing.load_data(raw_path))
+            df, label_encoders = data_preprocessing.encode_features(df, fit=True)
+            _check_int8_codes(label_encoders)
+            _, scaler = data_preprocessing.scale_features(df, fit=True)
+            _write_frame(df, cache_path)
+    finally:
+        if combined_path is not None:
+            combined_path.unlink(missing_ok=True)
+    return label_encoders, scaler
+
+
+def load_processed_data(raw_path=None, cache_path=None, chunk_size=None, rebuild=False,
+                        refit=False):
+    """
+    Processed training data with its fitted encoders and scaler, from cache.
+
+    The cache is a columnar store of the encoded inputs (int8 category
+    codes, float64 numerics) plus the pickled encoders and scaler, keyed by
+    the SHA-256 of the raw file and of the preprocessing and feature
+    engineering code. It is only rebuilt when that key changes; otherwise
+    the columns are memory-mapped straight from disk and processed with
+    processed_frame. The key file is written last, so an interrupted build
+    is never mistaken for a valid cache.
+
+    Snapshots appended with append_processed_data are scaled with the
+    frozen scaler on load. A rebuild keeps them as long as the raw file is
+    unchanged: their rows follow the raw file's, in the order they were
+    appended, and the encoders and scaler are refitted over everything,
+    which also discards the running scaler. With refit, as for a full
+    retrain, the cache is rebuilt if any snapshot was appended since the
+    scaler was last fitted. The increments stay recorded in meta.json,
+    marked 'refit', so the same snapshot is never appended twice.
+
+    Args:
+        raw_path (Path): Raw CSV, defaults to config.RAW_DATA_PATH
+        cache_path (Path): Cache directory, defaults to config.PROCESSED_DATA_PATH
+        chunk_size (int): Rows per chunk when rebuilding, 0 for in memory;
+            defaults to config.PREPROCESS_CHUNK_SIZE
+        rebuild (bool): Rebuild even if the cache is current
+        refit (bool): Rebuild if appended snapshots were scaled with a
+            scaler that was not fitted on them
+
+    Returns:
+        tuple: (DataFrame, label_encoders, scaler, whether the cache was hit)
+    """
+    raw_path = Path(raw_path or config.RAW_DATA_PATH)
+    cache_path = Path(cache_path or config.PROCESSED_DATA_PATH)
+    chunk_size = config.PREPROCESS_CHUNK_SIZE if chunk_size is None else chunk_size
+
+    meta = read_meta(cache_path)
+    raw_digest, raw_stat = _raw_digest(raw_path, meta)
+    key = cache_key(raw_digest)
+    # Snapshots were appended to the rows of this raw file, not of another one
+    increments = meta.get('increments', []) if meta and meta.get('raw_sha256') == raw_digest else []
+
+    hit = (not rebuild and meta is not None and _stored_key(cache_path) == key
+           and not (refit and any(not increment.get('refit') for increment in increments)))
+    if hit:
+        preprocessing = joblib.load(cache_path / PREPROCESSING_NAME)
+        label_encoders, scaler = preprocessing['label_encoders'], preprocessing['scaler']
+    else:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        (cache_path / KEY_NAME).unlink(missing_ok=True)
+        snapshots = snapshot_dir(cache_path)
+        snapshot_paths = [snapshots / f"{increment['sha256']}.csv" for increment in increments]
+        for path in snapshot_paths:
+            if not path.exists():
+                raise FileNotFoundError(f'Appended snapshot {path} is missing; '
+                                        f'rebuild from a raw CSV that includes its rows')
+        label_encoders, scaler = build_processed_data(raw_path, cache_path, chunk_size,
+                                                      snapshot_paths)
+        joblib.dump({'label_encoders': label_encoders, 'scaler': scaler},
+                    cache_path / PREPROCESSING_NAME)
+        meta = read_meta(cache_path)
+        meta.update({'raw_sha256': raw_digest, 'raw_stat': raw_stat,
+                     'code_version': code_version()})
+        if increments:
+            meta['increments'] = [dict(increment, refit=True) for increment in increments]
+        else:
+            shutil.rmtree(snapshots, ignore_errors=True)
+        write_meta(cache_path, meta)
+        (cache_path / KEY_NAME).write_text(key)
+
+    return processed_frame(read_columns(cache_path), scaler), label_encoders, scaler, hit
+
+
+def _encoded_chunks(snapshot_path, cache_path, label_encoders, chunk_size):
+    """Yield a raw snapshot encoded with the fitted label encoders."""
+    try:
+        if chunk_size > 0:
+            tmp_path = cache_path.with_name(f'.{cache_path.name}.snapshot')
+            data_preprocessing.encode_data_chunked(
+                snapshot_path, tmp_path, chunk_size=chunk_size,
+                label_encoders=label_encoders, fit=False
+            )
+            try:
+                yield from iter_chunks(tmp_path, chunk_size)
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            df = data_preprocessing.clean_data(data_preprocessing.load_data(snapshot_path))
+            df, _ = data_preprocessing.encode_features(df, label_encoders, fit=False)
+            yield df
+    except ValueError as e:
+        # Unseen categories can't be encoded without refitting the encoders
+        raise ValueError(f'Cannot append {snapshot_path} to the processed data ({e}); '
+                         f'add its rows to the raw CSV and run a full retrain instead') from e
+
+
+def scaler_drift(running_scaler, scaler):
+    """Largest shift of a feature mean since the scaler was fitted, in its standard deviations."""
+    return float(np.max(np.abs(running_scaler.mean_ - scaler.mean_) / scaler.scale_))
+
+
+def append_processed_data(snapshot_path, cache_path=None, chunk_size=None):
+    """
+    Append a snapshot of new labelled customers to the processed data cache.
+
+    The snapshot has the raw CSV's columns. It is encoded with the
+    encoders the cache was built with, and scaled on load with its scaler,
+    so the rows already in the cache, and the models trained on them, stay
+    valid; values the encoders have never seen raise ValueError. The scaler
+    itself is left unchanged, but a running copy of it is updated with the new rows
+    (StandardScaler.partial_fit) and how far its means have drifted is
+    recorded, so a full retrain can be scheduled once the frozen scaling
+    stops describing the data. Only the new rows are processed and written.
+
+    Each snapshot is recorded once in meta.json under 'increments' (its
+    SHA-256, first row and row count); appending it again returns the
+    existing record. A copy of the raw snapshot is kept in snapshot_dir,
+    so a rebuild can refit the encoders and scaler with its rows.
+
+    Returns:
+        tuple: (increment record, whether rows were appended)
+    """
+    snapshot_path = Path(snapshot_path)
+    cache_path = Path(cache_path or config.PROCESSED_DATA_PATH)
+    chunk_size = config.PREPROCESS_CHUNK_SIZE if chunk_size is None else chunk_size
+
+    meta = read_meta(cache_path)
+    if meta is None or _stored_key(cache_path) is None:
+        raise FileNotFoundError(f'No processed data at {cache_path}; run a full training first')
+    digest = file_digest(snapshot_path)
+    for increment in meta.get('increments', []):
+        if increment['sha256'] == digest:
+            return increment, False
+
+    preprocessing = joblib.load(cache_path / PREPROCESSING_NAME)
+    label_encoders, scaler = preprocessing['label_encoders'], preprocessing['scaler']
+    running_scaler = copy.deepcopy(preprocessing.get('running_scaler', scaler))
+
+    appender = ColumnarAppender(cache_path)
+    for chunk in _encoded_chunks(snapshot_path, cache_path, label_encoders, chunk_size):
+        appender.append(chunk)
+        if len(chunk):
+            running_scaler.partial_fit(chunk.drop(columns=['Churn']).astype(np.float64))
+
+    increment = {
+        'sha256': digest,
+        'source': str(snapshot_path),
+        'start': appender.start,
+        'rows': appender.rows,
+        'holdout_fraction': config.TEST_SIZE,
+        'scaler_drift': scaler_drift(running_scaler, scaler),
+        'appended_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+    snapshots = snapshot_dir(cache_path)
+    snapshots.mkdir(exist_ok=True)
+    snapshot_tmp = snapshots / f'.{digest}.csv.tmp'
+    shutil.copyfile(snapshot_path, snapshot_tmp)
+    os.replace(snapshot_tmp, snapshots / f'{digest}.csv')
+    preprocessing_tmp = cache_path / f'.{PREPROCESSING_NAME}.tmp'
+    joblib.dump(dict(preprocessing, running_scaler=running_scaler), preprocessing_tmp)
+    appender.close({'increments': meta.get('increments', []) + [increment]})
+    os.replace(preprocessing_tmp, cache_path / PREPROCESSING_NAME)
+    return increment, True
+
+
+def update_increment(sha256, cache_path=None, **fields):
+    """Record fields (e.g. the outcome of training on it) on an increment in meta.json."""
+    cache_path = Path(cache_path or config.PROCESSED_DATA_PATH)
+    meta = read_meta(cache_path)
+    for increment in meta.get('increments', []):
+        if increment['sha256'] == sha256:
+            increment.update(fields)
+            write_meta(cache_path, meta)
+            return increment
+    raise KeyError(f'No increment {sha256} in {cache_path}')
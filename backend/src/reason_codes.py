@@ -0,0 +1,56 @@
+import numpy as np
+
+import config
+
+
+def parse_explain(params):
+    """
+    Reason-code settings of a prediction request's query string.
+
+    Args:
+        params: Mapping of query parameters; explain=true turns reason codes
+            on and top_k sets how many to return per customer
+
+    Returns:
+        int or None: Reasons to return per customer, None if explain is off
+
+    Raises:
+        ValueError: top_k is not a positive integer
+    """
+    if str(params.get('explain', 'false')).lower() != 'true':
+        return None
+    top_k = params.get('top_k', config.EXPLAIN_TOP_K)
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        raise ValueError(f'top_k must be a positive integer, got {top_k!r}')
+    if top_k < 1:
+        raise ValueError(f'top_k must be a positive integer, got {top_k}')
+    return top_k
+
+
+def top_reasons(contributions, feature_names, top_k):
+    """
+    The top_k features with the largest absolute contribution, per row.
+
+    Args:
+        contributions (np.ndarray): Array of shape (rows, features), as
+            returned by CompiledModel.explain
+        feature_names (list): Column names of contributions
+        top_k (int): Reasons per row; capped at the number of features
+
+    Returns:
+        list: One list per row of {'feature', 'contribution'} entries,
+        largest first; positive contributions push towards churn
+    """
+    top_k = min(top_k, contributions.shape[1])
+    magnitude = np.abs(contributions)
+    top = np.argpartition(-magnitude, top_k - 1, axis=1)[:, :top_k]
+    order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    values = np.take_along_axis(contributions, top, axis=1).tolist()
+    names = np.asarray(feature_names, dtype=object)[top].tolist()
+    return [
+        [{'feature': name, 'contribution': value} for name, value in zip(row_names, row_values)]
+        for row_names, row_values in zip(names, values)
+    ]
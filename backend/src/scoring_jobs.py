@@ -0,0 +1,512 @@
+import argparse
+import contextlib
+import csv
+import fcntl
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.stream_scoring import (read_csv_chunks, read_ndjson_chunks, score_chunks,
+                                format_csv, format_ndjson)
+import config
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+INPUT_FORMATS = ('csv', 'ndjson')
+OUTPUT_FORMATS = ('csv', 'ndjson')
+
+DB_NAME = 'jobs.db'
+DISPATCHER_LOCK_NAME = 'dispatcher.lock'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    input_format TEXT NOT NULL,
+    output_format TEXT NOT NULL,
+    rows_total INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    rows_failed INTEGER NOT NULL DEFAULT 0,
+    result_bytes INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    model_version TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _owner_alive(owner):
+    """False if owner is a process on this host that no longer exists."""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    Bulk scoring jobs kept on local disk.
+
+    Job records live in a SQLite database and each job has a directory with
+    its input file and results file, so the store needs no outside services
+    and is shared by every process on the host (API workers and scoring
+    processes open their own connections). Progress is checkpointed per
+    chunk as (rows done, bytes of results written), which is what lets an
+    interrupted job resume where it left off.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or config.JOBS_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Autocommit; writes that must be atomic open their own transaction
+        conn = sqlite3.connect(self.root / DB_NAME, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def job_dir(self, job_id):
+        return self.root / job_id
+
+    def input_path(self, job):
+        return self.job_dir(job['id']) / f"input.{job['input_format']}"
+
+    def results_path(self, job):
+        return self.job_dir(job['id']) / f"results.{job['output_format']}"
+
+    def submit(self, source, input_format, output_format='ndjson'):
+        """
+        Store an input file and queue a job for it.
+
+        Args:
+            source: Binary file-like object with the CSV or NDJSON input, or
+                a list of record dicts (stored as NDJSON)
+            input_format (str): 'csv' or 'ndjson'; ignored for a list
+            output_format (str): Format of the results, 'csv' or 'ndjson'
+
+        Returns:
+            dict: The new job
+        """
+        if isinstance(source, list):
+            input_format = 'ndjson'
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f'input_format must be one of {", ".join(INPUT_FORMATS)}')
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'output_format must be one of {", ".join(OUTPUT_FORMATS)}')
+
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'input_format': input_format, 'output_format': output_format}
+        job_dir = self.job_dir(job_id)
+        job_dir.mkdir()
+        # Fully written before the job is queued, so runners never see half an input
+        with open(self.input_path(job), 'wb') as f:
+            if isinstance(source, list):
+                for record in source:
+                    f.write(json.dumps(record).encode('utf-8') + b'\n')
+            else:
+                shutil.copyfileobj(source, f, 1 << 20)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, status, input_format, output_format, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, input_format, output_format, now, now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Job record as a dict, or None."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def recent(self, limit=50):
+        """Most recent jobs first."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?',
+                                (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim(self, owner=None):
+        """
+        Atomically mark the oldest queued job as running.
+
+        Returns:
+            dict: The claimed job, or None if the queue is empty
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1',
+                               (QUEUED,)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, '
+                'started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?',
+                (RUNNING, owner or _owner(), now, now, row['id'])
+            )
+            conn.execute('COMMIT')
+        return self.get(row['id'])
+
+    def update(self, job_id, attempt=None, **fields):
+        """
+        Set fields of a job and refresh its heartbeat (updated_at).
+
+        Args:
+            attempt (int): Only update if the job is still on this attempt,
+                i.e. it was not requeued and claimed again in the meantime
+
+        Returns:
+            bool: Whether the job was updated
+        """
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        query = f'UPDATE jobs SET {assignments} WHERE id = ?'
+        params = list(fields.values()) + [job_id]
+        if attempt is not None:
+            query += ' AND attempts = ?'
+            params.append(attempt)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount > 0
+
+    def finish(self, job_id, status, error=None, attempt=None):
+        return self.update(job_id, attempt=attempt, status=status, error=error,
+                           finished_at=time.time())
+
+    def requeue_abandoned(self, stale_seconds=None):
+        """
+        Put running jobs whose scorer is gone back in the queue.
+
+        A job is abandoned when its owner process on this host has exited
+        (e.g. the server was restarted) or when it has not checkpointed for
+        stale_seconds. Its progress is kept, so it resumes from the last
+        checkpoint; after config.JOB_MAX_ATTEMPTS attempts it is failed
+        instead, so an input that kills its scorer is not retried forever.
+
+        Returns:
+            list: Ids of the requeued jobs
+        """
+        stale_seconds = config.JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+        now = time.time()
+        requeued = []
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('SELECT id, owner, attempts, updated_at FROM jobs WHERE status = ?',
+                                (RUNNING,)).fetchall()
+            for row in rows:
+                if row['updated_at'] >= now - stale_seconds and _owner_alive(row['owner']):
+                    continue
+                if row['attempts'] >= config.JOB_MAX_ATTEMPTS:
+                    conn.execute('UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                                 (FAILED, f"Abandoned after {row['attempts']} attempts", now, row['id']))
+                else:
+                    conn.execute('UPDATE jobs SET status = ?, owner = NULL WHERE id = ?',
+                                 (QUEUED, row['id']))
+                    requeued.append(row['id'])
+            conn.execute('COMMIT')
+        return requeued
+
+
+def public_job(job):
+    """Job record as served by the API."""
+    total = job['rows_total']
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'rows_total': total,
+        'rows_done': job['rows_done'],
+        'rows_failed': job['rows_failed'],
+        'progress': job['rows_done'] / total if total else (1.0 if job['status'] == SUCCEEDED else 0.0),
+        'output_format': job['output_format'],
+        'model_version': job['model_version'],
+        'attempts': job['attempts'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+    }
+
+
+def _open_input(path):
+    return open(path, encoding='utf-8', newline='')
+
+
+def count_records(path, input_format):
+    """Number of records in an input file; blank lines are skipped like the readers do."""
+    with _open_input(path) as f:
+        if input_format == 'csv':
+            return max(sum(1 for row in csv.reader(f) if any(field.strip() for field in row)) - 1, 0)
+        return sum(1 for line in f if line.strip())
+
+
+def _read_chunks(f, input_format, chunk_size):
+    if input_format == 'csv':
+        return read_csv_chunks(f, chunk_size)
+    return read_ndjson_chunks(f, chunk_size)
+
+
+def _skip_records(chunks, n):
+    """Drop the first n records of a chunk stream."""
+    for chunk in chunks:
+        if n >= len(chunk):
+            n -= len(chunk)
+            continue
+        yield chunk[n:]
+        n = 0
+
+
+def run_job(job_id, root=None, predictor=None, chunk_size=None):
+    """
+    Score a claimed job, resuming from its last checkpoint.
+
+    Results are appended chunk by chunk; after each chunk the file is
+    flushed to disk and the checkpoint recorded. On resume the results file
+    is cut back to the checkpointed size, so a chunk that was being written
+    when the previous attempt died is scored again, never duplicated.
+
+    Args:
+        job_id (str): Job to run; should have been claimed
+        root (Path): Job store directory, defaults to config.JOBS_DIR
+        predictor (ChurnPredictor): Loaded predictor; loaded here if None
+        chunk_size (int): Records scored at a time, defaults to
+            config.STREAM_CHUNK_SIZE
+
+    Returns:
+        str: Final status of the job
+    """
+    store = JobStore(root)
+    job = store.get(job_id)
+    attempt = job['attempts']
+    chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+    try:
+        if predictor is None:
+            from src.predict import ChurnPredictor
+            with contextlib.redirect_stdout(sys.stderr):
+                # Challengers are compared on live traffic, not on bulk jobs
+                predictor = ChurnPredictor(shadow=False)
+            # Bulk rows rarely repeat; don't grow a cache in a one-job process
+            predictor.cache = None
+
+        input_path = store.input_path(job)
+        rows_total = job['rows_total']
+        if rows_total is None:
+            rows_total = count_records(input_path, job['input_format'])
+        store.update(job_id, attempt=attempt, rows_total=rows_total,
+                     model_version=predictor.model_version)
+
+        rows_done, rows_failed = job['rows_done'], job['rows_failed']
+        results_path = store.results_path(job)
+        with _open_input(input_path) as source, open(results_path, 'ab') as sink:
+            sink.truncate(job['result_bytes'])
+            sink.seek(job['result_bytes'])
+            chunks = _skip_records(_read_chunks(source, job['input_format'], chunk_size), rows_done)
+            for chunk in chunks:
+                results = list(score_chunks(predictor, [chunk], start_row=rows_done))
+                if job['output_format'] == 'csv':
+                    text = ''.join(format_csv(results, header=sink.tell() == 0))
+                else:
+                    text = ''.join(format_ndjson(results))
+                sink.write(text.encode('utf-8'))
+                sink.flush()
+                os.fsync(sink.fileno())
+
+                rows_done += len(results)
+                rows_failed += sum('error' in result for result in results)
+                if not store.update(job_id, attempt=attempt, rows_done=rows_done,
+                                    rows_failed=rows_failed, result_bytes=sink.tell()):
+                    # Requeued as abandoned and picked up by another runner
+                    return store.get(job_id)['status']
+            if job['output_format'] == 'csv' and sink.tell() == 0:
+                sink.write(''.join(format_csv([])).encode('utf-8'))
+                store.update(job_id, attempt=attempt, result_bytes=sink.tell())
+    except Exception as e:
+        store.finish(job_id, FAILED, f'{type(e).__name__}: {e}', attempt=attempt)
+        return FAILED
+
+    # The count is an estimate for progress; the scored rows are the total
+    store.update(job_id, attempt=attempt, rows_total=rows_done)
+    store.finish(job_id, SUCCEEDED, attempt=attempt)
+    return SUCCEEDED
+
+
+class JobRunner:
+    """
+    Runs queued jobs from a JobStore on a pool of scoring processes.
+
+    A dispatcher thread claims jobs and hands them to a process pool, so
+    scoring never holds a web worker. Each job gets a fresh spawned process
+    (max_tasks_per_child=1): it scores with the model that is current when
+    the job starts, and with the artifact bundle it memory-maps the same
+    arrays as the API workers instead of holding its own copy.
+
+    Like MicroBatcher, the dispatcher starts lazily and again after a fork,
+    and on start it requeues jobs whose previous runner died, which is how
+    jobs resume after a restart. Several runners (e.g. one per gunicorn
+    worker, or the standalone worker) can share a store, but only one of
+    them dispatches at a time: the one holding an exclusive lock on the
+    store's dispatcher.lock. The others retry the lock every poll_interval
+    and take over when its holder exits, so a host never runs more than
+    `workers` scoring processes per store.
+    """
+
+    def __init__(self, store, workers=2, poll_interval=1.0):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        # Whether this runner holds the dispatcher lock
+        self.dispatching = False
+        self._lock = threading.Lock()
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the dispatcher in this process if it is not running."""
+        if self.workers <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            threading.Thread(target=self._run, name='job-runner', daemon=True).start()
+
+    def notify(self):
+        """Wake the dispatcher, e.g. after a job was submitted."""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._pid = None
+
+    def _acquire_dispatcher_lock(self):
+        """File descriptor holding the store's dispatcher lock, or None if another runner holds it."""
+        fd = os.open(self.store.root / DISPATCHER_LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _run(self):
+        context = multiprocessing.get_context('spawn')
+        executor = None
+        running = {}
+        owner = _owner()
+        last_requeue = None
+        lock_fd = None
+        try:
+            while not self._stop.is_set():
+                if lock_fd is None:
+                    lock_fd = self._acquire_dispatcher_lock()
+                    if lock_fd is None:
+                        # Another runner dispatches; stand by in case it exits
+                        self._wakeup.wait(self.poll_interval)
+                        self._wakeup.clear()
+                        continue
+                    self.dispatching = True
+                now = time.monotonic()
+                if last_requeue is None or now - last_requeue >= self.poll_interval * 10:
+                    self.store.requeue_abandoned()
+                    last_requeue = now
+                for job_id, future in list(running.items()):
+                    if future.done():
+                        del running[job_id]
+                        if future.exception() is not None:
+                            # The scoring process died (e.g. killed for memory)
+                            self._retry(job_id, future.exception())
+                            if isinstance(future.exception(), BrokenProcessPool):
+                                executor.shutdown(wait=False, cancel_futures=True)
+                                executor = None
+                while len(running) < self.workers:
+                    job = self.store.claim(owner)
+                    if job is None:
+                        break
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                       max_tasks_per_child=1)
+                    future = executor.submit(run_job, job['id'], str(self.store.root))
+                    future.add_done_callback(lambda _: self._wakeup.set())
+                    running[job['id']] = future
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            if lock_fd is not None:
+                self.dispatching = False
+                os.close(lock_fd)
+
+    def _retry(self, job_id, error):
+        """Requeue a job whose process died, or fail it after JOB_MAX_ATTEMPTS."""
+        job = self.store.get(job_id)
+        if job['status'] != RUNNING:
+            return
+        if job['attempts'] >= config.JOB_MAX_ATTEMPTS:
+            self.store.finish(job_id, FAILED, f'{type(error).__name__}: {error}')
+        else:
+            self.store.update(job_id, status=QUEUED, owner=None)
+
+def main():
+    """Standalone job worker: python src/scoring_jobs.py [--workers N]"""
+    parser = argparse.ArgumentParser(description='Run queued bulk scoring jobs.')
+    parser.add_argument('--workers', type=int, default=max(config.JOB_WORKERS, 1),
+                        help='Jobs scored in parallel')
+    parser.add_argument('--jobs-dir', default=str(config.JOBS_DIR), help='Job store directory')
+    args = parser.parse_args()
+
+    runner = JobRunner(JobStore(args.jobs_dir), workers=args.workers,
+                       poll_interval=config.JOB_POLL_INTERVAL)
+    runner.ensure_started()
+    print(f"Scoring jobs from {args.jobs_dir} on {args.workers} process(es); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
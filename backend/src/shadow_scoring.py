@@ -0,0 +1,325 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.metrics import REGISTRY
+
+SHADOW_ROWS = REGISTRY.counter(
+    'churn_shadow_rows_total', 'Rows handed to each challenger, by outcome', ['challenger', 'outcome']
+)
+
+# Upper bounds of the buckets of |challenger - champion| churn probability
+DELTA_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+
+# Challenger artifacts of the shadow scoring process
+_process_challengers = None
+
+
+def _input_tables(transform):
+    return [(col, table) for col, table, _, _ in transform.columns]
+
+
+def _load_challengers(bundle_dirs):
+    global _process_challengers
+    from src.predict import ModelArtifacts
+    # Leave the CPU to the API workers when both want it
+    os.nice(10)
+    _process_challengers = [ModelArtifacts.from_bundle(bundle_dir) for bundle_dir in bundle_dirs]
+
+
+def _score_challengers(values, champion_scores, threshold, compatible):
+    """
+    Score validated rows with every challenger of this process.
+
+    Returns:
+        list: ChallengerStats of the rows for each challenger, or an error message
+    """
+    results = []
+    for artifacts, ok in zip(_process_challengers, compatible):
+        if not ok:
+            results.append("inputs or categories differ from the champion's")
+            continue
+        start = time.perf_counter()
+        try:
+            features = artifacts.transform.derive_many(artifacts.transform.scale_many(values))
+            scores = np.asarray(artifacts.predict_proba(features))[:, 1]
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+            continue
+        stats = ChallengerStats()
+        stats.add(champion_scores, scores, threshold, time.perf_counter() - start)
+        results.append(stats)
+    return results
+
+
+class ChallengerStats:
+    """Running agreement and score-delta totals of one challenger against the champion."""
+
+    def __init__(self):
+        self.rows = 0
+        # Rows by (champion churns, challenger churns)
+        self.both_churn = 0
+        self.champion_only = 0
+        self.challenger_only = 0
+        self.delta_sum = 0.0
+        self.delta_squares = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.histogram = np.zeros(len(DELTA_BUCKETS), dtype=np.int64)
+        self.seconds = 0.0
+        self.errors = 0
+        self.last_error = None
+
+    def add(self, champion, challenger, threshold, seconds):
+        """
+        Args:
+            champion (ndarray): Champion churn probabilities
+            challenger (ndarray): Challenger churn probabilities of the same rows
+            threshold (float): Decision threshold of both models' labels
+            seconds (float): Time the challenger took to score the rows
+        """
+        champion_churn = champion > threshold
+        challenger_churn = challenger > threshold
+        delta = challenger - champion
+        abs_delta = np.abs(delta)
+        self.rows += len(delta)
+        self.both_churn += int(np.count_nonzero(champion_churn & challenger_churn))
+        self.champion_only += int(np.count_nonzero(champion_churn & ~challenger_churn))
+        self.challenger_only += int(np.count_nonzero(~champion_churn & challenger_churn))
+        self.delta_sum += float(delta.sum())
+        self.delta_squares += float(delta @ delta)
+        self.abs_delta_sum += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        self.histogram += np.bincount(
+            np.minimum(np.searchsorted(DELTA_BUCKETS, abs_delta), len(DELTA_BUCKETS) - 1),
+            minlength=len(DELTA_BUCKETS)
+        )
+        self.seconds += seconds
+
+    def merge(self, other):
+        """Add the totals of another ChallengerStats."""
+        for name in ('rows', 'both_churn', 'champion_only', 'challenger_only', 'delta_sum',
+                     'delta_squares', 'abs_delta_sum', 'seconds', 'errors'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_abs_delta = max(self.max_abs_delta, other.max_abs_delta)
+        self.histogram += other.histogram
+
+    def to_dict(self):
+        rows = self.rows
+        mean = self.delta_sum / rows if rows else None
+        disagreements = self.champion_only + self.challenger_only
+        return {
+            'rows': rows,
+            'agreement': 1.0 - disagreements / rows if rows else None,
+            'labels': {
+                'both_churn': self.both_churn,
+                'champion_only': self.champion_only,
+                'challenger_only': self.challenger_only,
+                'neither': rows - self.both_churn - disagreements,
+            },
+            'score_delta': {
+                'mean': mean,
+                'std': float(np.sqrt(max(self.delta_squares / rows - mean * mean, 0.0))) if rows else None,
+                'mean_abs': self.abs_delta_sum / rows if rows else None,
+                'max_abs': self.max_abs_delta if rows else None,
+                'abs_histogram': {str(bound): int(count)
+                                  for bound, count in zip(DELTA_BUCKETS, self.histogram)},
+            },
+            'ms_per_row': self.seconds * 1000.0 / rows if rows else None,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+
+
+class ShadowScorer:
+    """
+    Score live traffic with challenger models off the request path.
+
+    After the champion has scored a request, the predictor hands submit()
+    the validated rows and the champion's probabilities. A background
+    thread takes everything queued, stacks it into one matrix and has a
+    spawned process score it with every challenger, through each
+    challenger's own feature transform, then adds the comparison to
+    per-challenger totals of constant size. The process runs at a lower
+    priority and keeps challenger scoring from competing with requests for
+    the GIL. The queue holds at most max_pending requests; when it is full
+    the request is dropped from shadow scoring, so a slow challenger never
+    delays or piles up behind the champion. Totals start afresh when the
+    champion changes.
+
+    Like MicroBatcher, the thread and process are started lazily and again
+    after a fork, so the scorer can be created in a preloaded gunicorn
+    master.
+    """
+
+    def __init__(self, challengers, threshold, max_pending=32):
+        """
+        Args:
+            challengers (list): ModelArtifacts of the challenger bundles
+            threshold (float): Churn probability above which a row is labelled churn
+            max_pending (int): Requests that may wait for the challengers
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.challengers = challengers
+        # Bundle directory of each challenger, which holds its native model
+        self.bundle_dirs = [str(artifacts.model_path.parent) for artifacts in challengers]
+        self.threshold = threshold
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._executor = None
+        self._reset(None)
+
+    def _reset(self, champion):
+        self.champion = champion
+        self.stats = {artifacts.version: ChallengerStats() for artifacts in self.challengers}
+        self.submitted_rows = 0
+        self.dropped_rows = 0
+        self.dropped_requests = 0
+        # Challengers that read the champion's validated rows the same way
+        self._compatible = [
+            champion is not None
+            and _input_tables(artifacts.transform) == _input_tables(champion.transform)
+            for artifacts in self.challengers
+        ]
+
+    def _start_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_load_challengers, initargs=(self.bundle_dirs,)
+        )
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked copy of the parent's queue would have no thread draining it
+            self._queue = queue.Queue(maxsize=self.max_pending)
+            self._executor = self._start_executor()
+            self._reset(None)
+            worker = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+            worker.start()
+            self._pid = os.getpid()
+
+    def submit(self, champion, values, probabilities):
+        """
+        Queue a scored request for the challengers, unless the queue is full.
+
+        Args:
+            champion (ModelArtifacts): Artifacts that scored the request
+            values (array-like): Validated rows, as from InputSchema
+            probabilities (array-like): Champion predict_proba output for those rows
+
+        Returns:
+            bool: False if the request was dropped
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((champion, values, probabilities))
+        except queue.Full:
+            rows = len(values)
+            with self._lock:
+                self.dropped_rows += rows
+                self.dropped_requests += 1
+            for artifacts in self.challengers:
+                SHADOW_ROWS.inc(artifacts.version, 'dropped', amount=rows)
+            return False
+        return True
+
+    def _collect(self):
+        """Block for the first queued request, then take whatever else is waiting."""
+        items = [self._queue.get()]
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                self._score(items)
+            except Exception as e:
+                # A request that can't be stacked or compared must not stop the thread
+                error = f"{type(e).__name__}: {e}"
+                with self._lock:
+                    for stats in self.stats.values():
+                        stats.errors += 1
+                        stats.last_error = error
+
+    def _score(self, items):
+        """Score a batch of queued requests with the challengers and add up the comparison."""
+        # Requests still queued from a champion replaced by a reload are skipped
+        champion = items[-1][0]
+        items = [item for item in items if item[0] is champion]
+        with self._lock:
+            if champion is not self.champion:
+                self._reset(champion)
+        n_inputs = len(champion.transform.input_features)
+        values = np.concatenate([np.asarray(rows, dtype=np.float64).reshape(-1, n_inputs)
+                                 for _, rows, _ in items])
+        scores = np.concatenate([np.asarray(probabilities, dtype=np.float64).reshape(-1, 2)[:, 1]
+                                 for _, _, probabilities in items])
+        with self._lock:
+            self.submitted_rows += len(values)
+            compatible = list(self._compatible)
+
+        try:
+            results = self._executor.submit(
+                _score_challengers, values, scores, self.threshold, compatible
+            ).result()
+        except Exception as e:
+            # Most likely the process died; start a new one for the next batch
+            results = [f"{type(e).__name__}: {e}"] * len(self.challengers)
+            self._executor.shutdown(wait=False)
+            self._executor = self._start_executor()
+
+        with self._lock:
+            for artifacts, result in zip(self.challengers, results):
+                stats = self.stats[artifacts.version]
+                if isinstance(result, str):
+                    stats.errors += 1
+                    stats.last_error = result
+                else:
+                    stats.merge(result)
+        for artifacts, result in zip(self.challengers, results):
+            SHADOW_ROWS.inc(artifacts.version, 'failed' if isinstance(result, str) else 'scored',
+                            amount=len(values))
+
+    def agreement(self):
+        """Label agreement of each challenger that has scored rows, for /api/metrics."""
+        with self._lock:
+            return {version: 1.0 - (stats.champion_only + stats.challenger_only) / stats.rows
+                    for version, stats in self.stats.items() if stats.rows}
+
+    def report(self):
+        """Queue state and comparison totals of this worker process, for /api/shadow."""
+        with self._lock:
+            return {
+                'champion': self.champion.version if self.champion is not None else None,
+                'decision_threshold': self.threshold,
+                'queue': {
+                    'pending': self._queue.qsize() if self._pid == os.getpid() else 0,
+                    'max_pending': self.max_pending,
+                    'submitted_rows': self.submitted_rows,
+                    'dropped_rows': self.dropped_rows,
+                    'dropped_requests': self.dropped_requests,
+                },
+                'challengers': {
+                    artifacts.version: dict(self.stats[artifacts.version].to_dict(),
+                                            type=artifacts.compiled_model.model_type)
+                    for artifacts in self.challengers
+                },
+            }
@@ -0,0 +1,149 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+RESULT_FIELDS = ['customerID', 'churn', 'churn_probability',
+                 'no_churn_probability', 'confidence', 'row', 'error']
+
+
+class InvalidRecord:
+    """Placeholder for an input line that could not be parsed."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def read_csv_chunks(source, chunk_size):
+    """
+    Read a CSV with the same schema as the raw dataset in chunks.
+
+    Values are kept as strings (blank TotalCharges stays blank) and converted
+    by the predictor, exactly as for JSON input.
+
+    Yields:
+        list: Up to chunk_size record dicts
+    """
+    import pandas as pd
+    reader = pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    for chunk in reader:
+        yield chunk.to_dict(orient='records')
+
+
+def read_ndjson_chunks(lines, chunk_size):
+    """
+    Read newline-delimited JSON records in chunks.
+
+    Yields:
+        list: Up to chunk_size record dicts; unparsable lines are yielded as
+        InvalidRecord so they are reported without stopping the stream
+    """
+    chunk = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            chunk.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            chunk.append(InvalidRecord(f'Invalid JSON: {e}'))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_chunks(predictor, chunks, start_row=0):
+    """
+    Score record chunks one at a time and yield one result per record.
+
+    Results are keyed by customerID when the input has one; failed rows also
+    carry their 0-based row number in the input, counted from start_row.
+    """
+    row = start_row
+    for chunk in chunks:
+        results = predictor.predict_batch(chunk)
+        for record, result in zip(chunk, results):
+            customer_id = record.get('customerID') if isinstance(record, dict) else None
+            output = {'customerID': customer_id}
+            if isinstance(record, InvalidRecord):
+                output.update({'row': row, 'error': record.message})
+            elif 'error' in result:
+                output.update({'row': row, 'error': result['error'], 'fields': result['fields']})
+            else:
+                output.update(result)
+            row += 1
+            yield output
+
+
+def format_ndjson(results):
+    """Yield each result as a line of JSON."""
+    for result in results:
+        yield json.dumps(result) + '\n'
+
+
+def format_csv(results, header=True):
+    """Yield a CSV header (unless header is False) followed by one line per result."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    for result in results:
+        writer.writerow(result)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def main():
+    """Command-line bulk scorer: python src/stream_scoring.py customers.csv -o scores.csv"""
+    parser = argparse.ArgumentParser(description='Score a CSV or NDJSON customer file in chunks.')
+    parser.add_argument('input', help="Input file (.csv, .ndjson or .jsonl); '-' reads CSV from stdin")
+    parser.add_argument('-o', '--output', default='-', help="Output file; '-' writes to stdout")
+    parser.add_argument('--input-format', choices=['csv', 'ndjson'],
+                        help='Input format (default: from the file extension)')
+    parser.add_argument('--output-format', choices=['csv', 'ndjson'],
+                        help='Output format (default: from the file extension, else ndjson)')
+    parser.add_argument('--chunk-size', type=int, default=config.STREAM_CHUNK_SIZE,
+                        help='Rows scored per chunk')
+    args = parser.parse_args()
+
+    input_format = args.input_format or ('ndjson' if args.input.endswith(('.ndjson', '.jsonl')) else 'csv')
+    output_format = args.output_format or ('csv' if args.output.endswith('.csv') else 'ndjson')
+
+    from src.predict import ChurnPredictor
+    # Keep load messages out of results written to stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        # Challengers are compared on live traffic, not on offline files
+        predictor = ChurnPredictor(shadow=False)
+
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline='')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        if input_format == 'csv':
+            chunks = read_csv_chunks(source, args.chunk_size)
+        else:
+            chunks = read_ndjson_chunks(source, args.chunk_size)
+        formatter = format_csv if output_format == 'csv' else format_ndjson
+        for text in formatter(score_chunks(predictor, chunks)):
+            sink.write(text)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.data_preprocessing import clean_data, encode_features, load_data, preprocess_data
+from src.feature_engineering import create_features
+from src.compiled_model import export_compiled_model
+from src.drift_monitor import build_reference, save_reference
+import config
+
+
+SAMPLE_CUSTOMER = {
+    'gender': 'Male',
+    'SeniorCitizen': 0,
+    'Partner': 'Yes',
+    'Dependents': 'No',
+    'tenure': 12,
+    'PhoneService': 'Yes',
+    'MultipleLines': 'No',
+    'InternetService': 'Fiber optic',
+    'OnlineSecurity': 'No',
+    'OnlineBackup': 'No',
+    'DeviceProtection': 'No',
+    'TechSupport': 'No',
+    'StreamingTV': 'Yes',
+    'StreamingMovies': 'Yes',
+    'Contract': 'Month-to-month',
+    'PaperlessBilling': 'Yes',
+    'PaymentMethod': 'Electronic check',
+    'MonthlyCharges': 85.0,
+    'TotalCharges': 1020.0
+}
+
+
+@pytest.fixture(scope='session')
+def trained_artifacts(tmp_path_factory):
+    """Train a small model on the raw data and save its artifacts."""
+    model_dir = tmp_path_factory.mktemp('models')
+    
+    df, label_encoders, scaler = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    df = create_features(df)
+    X = df.drop('Churn', axis=1)
+    y = df['Churn']
+    
+    model = LogisticRegression(max_iter=1000, random_state=config.RANDOM_STATE)
+    model.fit(X, y)
+    
+    joblib.dump(model, model_dir / 'model.pkl')
+    joblib.dump(scaler, model_dir / 'scaler.pkl')
+    joblib.dump(label_encoders, model_dir / 'label_encoders.pkl')
+    export_compiled_model(model, model_dir / 'compiled_model.npz', reference=X)
+    inputs, _ = encode_features(clean_data(load_data(config.RAW_DATA_PATH)), label_encoders, fit=False)
+    save_reference(build_reference(inputs, label_encoders), model_dir / 'drift_reference.json')
+    
+    return model_dir
+
+
+@pytest.fixture
+def model_dir(trained_artifacts, monkeypatch):
+    """Point config at the trained test artifacts."""
+    monkeypatch.setattr(config, 'MODEL_DIR', trained_artifacts)
+    monkeypatch.setattr(config, 'MODEL_PATH', trained_artifacts / 'model.pkl')
+    monkeypatch.setattr(config, 'SCALER_PATH', trained_artifacts / 'scaler.pkl')
+    monkeypatch.setattr(config, 'LABEL_ENCODERS_PATH', trained_artifacts / 'label_encoders.pkl')
+    monkeypatch.setattr(config, 'COMPILED_MODEL_PATH', trained_artifacts / 'compiled_model.npz')
+    monkeypatch.setattr(config, 'BUNDLE_DIR', trained_artifacts / 'bundles')
+    monkeypatch.setattr(config, 'DRIFT_REFERENCE_PATH', trained_artifacts / 'drift_reference.json')
+    return trained_artifacts
+
+
+@pytest.fixture
+def predictor(model_dir):
+    from src.predict import ChurnPredictor
+    return ChurnPredictor()
+
+
+@pytest.fixture
+def job_runner(tmp_path):
+    """Runner on a temporary job store; jobs are run explicitly by the tests that submit them."""
+    from src.scoring_jobs import JobRunner, JobStore
+    return JobRunner(JobStore(tmp_path / 'jobs'), workers=0)
+
+
+@pytest.fixture
+def client(predictor, job_runner, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'predictor', predictor)
+    monkeypatch.setattr(app_module, 'job_runner', job_runner)
+    app_module.app.config['TESTING'] = True
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def raw_customers():
+    """Raw customer records from the dataset, as the API receives them."""
+    import pandas as pd
+    df = pd.read_csv(config.RAW_DATA_PATH)
+    df = df.drop(columns=['customerID', 'Churn'])
+    return df.to_dict(orient='records')
@@ -0,0 +1,118 @@
+import pytest
+
+import config
+from conftest import SAMPLE_CUSTOMER
+
+
+def test_health_reports_decision_threshold(client):
+    response = client.get('/api/health')
+    
+    assert response.status_code == 200
+    assert response.get_json()['model_loaded'] is True
+    assert response.get_json()['decision_threshold'] == config.DECISION_THRESHOLD
+    assert response.get_json()['memory']['pid'] > 0
+
+
+def test_predict(client):
+    response = client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    
+    assert response.status_code == 200
+    prediction = response.get_json()['prediction']
+    assert prediction['churn'] in ('Yes', 'No')
+    assert prediction['churn_probability'] + prediction['no_churn_probability'] == pytest.approx(1.0)
+
+
+def test_predict_missing_fields(client):
+    customer = dict(SAMPLE_CUSTOMER)
+    del customer['tenure']
+    
+    response = client.post('/api/predict', json=customer)
+    
+    assert response.status_code == 400
+    assert 'tenure' in response.get_json()['error']
+
+
+def test_predict_batch_reports_errors(client):
+    customers = [SAMPLE_CUSTOMER, dict(SAMPLE_CUSTOMER, Contract='Weekly')]
+    
+    response = client.post('/api/predict/batch', json={'customers': customers})
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['count'] == 2
+    assert 'churn' in body['predictions'][0]
+    assert body['errors'] == [body['predictions'][1]]
+
+
+def test_predict_batch_explain_returns_top_reasons(client, predictor):
+    customers = [SAMPLE_CUSTOMER, dict(SAMPLE_CUSTOMER, Contract='Two year', tenure=60),
+                 dict(SAMPLE_CUSTOMER, Contract='Weekly')]
+    plain = client.post('/api/predict/batch', json={'customers': customers}).get_json()
+    response = client.post('/api/predict/batch?explain=true&top_k=4', json={'customers': customers})
+    
+    assert response.status_code == 200
+    predictions = response.get_json()['predictions']
+    assert 'error' in predictions[2]
+    for explained, prediction in zip(predictions[:2], plain['predictions']):
+        assert explained['churn_probability'] == pytest.approx(prediction['churn_probability'])
+        reasons = explained['reasons']
+        assert len(reasons) == 4
+        assert {reason['feature'] for reason in reasons} <= set(predictor.transform.feature_names)
+        magnitudes = [abs(reason['contribution']) for reason in reasons]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+    
+    single = client.post('/api/predict?explain=true', json=SAMPLE_CUSTOMER).get_json()
+    assert single['prediction']['reasons'] == predictions[0]['reasons'][:config.EXPLAIN_TOP_K]
+    assert client.post('/api/predict?explain=true&top_k=0', json=SAMPLE_CUSTOMER).status_code == 400
+
+
+def test_metrics_exposes_request_and_stage_latency(client):
+    client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    client.post('/api/predict/batch', json={'customers': [SAMPLE_CUSTOMER, {}]})
+    
+    response = client.get('/api/metrics')
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE churn_stage_duration_seconds histogram' in text
+    for stage in ('parse', 'validate', 'prepare', 'engineer', 'model'):
+        assert f'churn_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert 'churn_http_requests_total{endpoint="predict",method="POST",status="200"}' in text
+    assert 'churn_http_request_duration_seconds_bucket{endpoint="predict",method="POST",le="+Inf"}' in text
+    assert 'churn_predicted_rows_total{outcome="invalid"}' in text
+    assert 'churn_model_info{version="pickles-' in text
+
+
+def test_profiler_toggle(client, monkeypatch):
+    assert client.post('/api/profile/start').status_code == 404
+    
+    monkeypatch.setattr(config, 'PROFILER_ENABLED', True)
+    assert client.post('/api/profile/start?interval_ms=1').status_code == 202
+    assert client.post('/api/profile/start').status_code == 409
+    for _ in range(20):
+        client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    
+    response = client.post('/api/profile/stop')
+    
+    report = response.get_json()
+    assert response.status_code == 200
+    assert report['running'] is False
+    assert report['samples'] > 0
+    assert report['top_stacks'] and report['folded']
+
+
+def test_drift_reports_traffic_since_start(client, monkeypatch):
+    client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    client.post('/api/predict/batch', json={'customers': [SAMPLE_CUSTOMER, {}]})
+    
+    response = client.get('/api/drift')
+    
+    report = response.get_json()
+    assert response.status_code == 200
+    assert report['rows'] == 2
+    assert set(report['fields']) == set(config.INPUT_FEATURES)
+    assert report['fields']['Contract']['status'] == 'insufficient_data'
+    assert 'churn_feature_drift_psi{' not in client.get('/api/metrics').get_data(as_text=True)
+    monkeypatch.setattr(config, 'DRIFT_MIN_ROWS', 1)
+    assert 'churn_feature_drift_psi{feature="tenure"}' in client.get('/api/metrics').get_data(as_text=True)
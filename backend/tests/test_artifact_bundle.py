@@ -0,0 +1,63 @@
+import json
+import mmap
+import subprocess
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+from src.artifact_bundle import ArtifactBundle, current_bundle_dir, write_bundle
+from conftest import SAMPLE_CUSTOMER
+import config
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def bundle_dir(model_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'BUNDLE_DIR', tmp_path / 'bundles')
+    return write_bundle(
+        joblib.load(model_dir / 'model.pkl'),
+        joblib.load(model_dir / 'scaler.pkl'),
+        joblib.load(model_dir / 'label_encoders.pkl')
+    )
+
+
+def test_bundle_is_memory_mapped_and_current(bundle_dir):
+    assert current_bundle_dir() == bundle_dir
+    
+    bundle = ArtifactBundle(bundle_dir)
+    
+    assert bundle.version == bundle_dir.name
+    array = bundle.compiled_model.coef
+    while array is not None and not isinstance(array, (np.memmap, mmap.mmap)):
+        array = getattr(array, 'base', None)
+    assert array is not None
+
+
+def test_predictor_from_bundle_matches_pickles(bundle_dir, raw_customers, monkeypatch):
+    from src.predict import ChurnPredictor
+    
+    from_bundle = ChurnPredictor()
+    monkeypatch.setattr(config, 'USE_ARTIFACT_BUNDLE', False)
+    from_pickles = ChurnPredictor()
+    
+    assert from_bundle.bundle_version == bundle_dir.name
+    assert from_bundle.scaler is None and from_pickles.bundle_version is None
+    assert from_bundle.predict_batch(raw_customers[:100]) == from_pickles.predict_batch(raw_customers[:100])
+
+
+def test_bundle_startup_skips_heavy_imports(bundle_dir):
+    script = (
+        'import sys, json, pathlib; sys.path.insert(0, "."); import config; '
+        f'config.BUNDLE_DIR = pathlib.Path({str(bundle_dir.parent)!r}); '
+        'from src.predict import ChurnPredictor; '
+        f'p = ChurnPredictor(); p.predict({SAMPLE_CUSTOMER!r}); '
+        'print(json.dumps([m for m in ("sklearn", "xgboost", "pandas", "joblib") if m in sys.modules]))'
+    )
+    output = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    
+    assert json.loads(output.strip().splitlines()[-1]) == []
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from conftest import SAMPLE_CUSTOMER
+from src.inference_pool import InferencePool, PoolSaturated
+
+
+@pytest.fixture
+def async_client(client, predictor, monkeypatch):
+    import asgi
+    monkeypatch.setattr(asgi.wsgi, 'predictor', predictor)
+    return TestClient(asgi.app)
+
+
+def test_async_app_serves_the_flask_routes(async_client, client):
+    health = async_client.get('/api/health').json()
+    assert health['model_loaded'] is True and health['inference_pool']['kind'] == 'thread'
+    
+    response = async_client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    assert response.status_code == 200
+    assert response.json() == client.post('/api/predict', json=SAMPLE_CUSTOMER).get_json()
+    
+    path = '/api/predict/batch?explain=true&top_k=2'
+    response = async_client.post(path, json={'customers': [SAMPLE_CUSTOMER]})
+    assert response.json() == client.post(path, json={'customers': [SAMPLE_CUSTOMER]}).get_json()
+    assert async_client.post('/api/predict?explain=true&top_k=x', json=SAMPLE_CUSTOMER).status_code == 400
+    
+    response = async_client.post('/api/predict', json=dict(SAMPLE_CUSTOMER, tenure='twelve'))
+    assert response.status_code == 400 and response.json()['fields'][0]['code'] == 'not_numeric'
+    
+    response = async_client.post('/api/predict/batch', json={'customers': [SAMPLE_CUSTOMER, {}]})
+    assert response.json()['count'] == 2 and response.json()['errors'][0]['index'] == 1
+    
+    assert async_client.get('/api/features').json() == client.get('/api/features').get_json()
+    # Served by the Flask app
+    assert async_client.get('/api/jobs').json() == {'jobs': []}
+    assert 'churn_inference_pool_pending' in async_client.get('/api/metrics').text
+
+
+def test_async_predictions_share_the_micro_batcher(async_client, client, predictor, monkeypatch):
+    import asgi
+    from src.microbatch import MicroBatcher
+    batcher = MicroBatcher(predictor.predict_batch, max_wait_ms=1)
+    monkeypatch.setattr(asgi, 'batcher', batcher)
+    
+    response = async_client.post('/api/predict', json=SAMPLE_CUSTOMER)
+    
+    assert response.json() == client.post('/api/predict', json=SAMPLE_CUSTOMER).get_json()
+    assert batcher.stats()['rows'] == 1
+    # Both apps answer malformed bodies the same way
+    response = async_client.post('/api/predict', content='{')
+    assert response.status_code == 400
+    assert response.json() == client.post('/api/predict', data='{').get_json()
+
+
+def test_inference_pool_rejects_beyond_max_pending():
+    release = threading.Event()
+    
+    async def scenario():
+        pool = InferencePool(workers=1, max_pending=2)
+        blocked = [asyncio.ensure_future(pool.run(lambda predictor, event: event.wait(5), None, release))
+                   for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturated):
+            await pool.run(lambda predictor: None, None)
+        release.set()
+        await asyncio.gather(*blocked)
+        await pool.run(lambda predictor: None, None)
+        return pool.stats()
+    
+    stats = asyncio.run(scenario())
+    assert stats['rejected'] == 1 and stats['completed'] == 3 and stats['pending'] == 0
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from src.compiled_model import CompiledModel, check_parity, compile_model, export_compiled_model
+from src.data_preprocessing import preprocess_data
+from src.feature_engineering import create_features
+import config
+
+
+@pytest.fixture(scope='module')
+def split():
+    df, _, _ = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    df = create_features(df)
+    X = df.drop('Churn', axis=1)
+    y = df['Churn']
+    return train_test_split(X, y, test_size=config.TEST_SIZE,
+                            random_state=config.RANDOM_STATE, stratify=y)
+
+
+MODELS = [
+    LogisticRegression(max_iter=1000, random_state=config.RANDOM_STATE),
+    RandomForestClassifier(n_estimators=20, random_state=config.RANDOM_STATE),
+    GradientBoostingClassifier(n_estimators=20, random_state=config.RANDOM_STATE),
+    XGBClassifier(n_estimators=20, random_state=config.RANDOM_STATE, eval_metric='logloss'),
+]
+
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: type(model).__name__)
+def test_compiled_model_matches_original(model, split, tmp_path):
+    X_train, X_test, y_train, y_test = split
+    model.fit(X_train, y_train)
+    
+    export_compiled_model(model, tmp_path / 'compiled_model.npz')
+    compiled = CompiledModel.load(tmp_path / 'compiled_model.npz')
+    parity = check_parity(compiled, model, X_test)
+    
+    assert parity['label_agreement'] == 1.0
+    np.testing.assert_array_equal(
+        compiled.predict(X_test.to_numpy(dtype=np.float64)), model.predict(X_test)
+    )
+
+
+@pytest.mark.parametrize('model', MODELS, ids=lambda model: type(model).__name__)
+def test_contributions_add_up_to_score(model, split):
+    X_train, X_test, y_train, y_test = split
+    model = clone(model).fit(X_train, y_train)
+    compiled = CompiledModel(compile_model(model, reference=X_train))
+    X = X_test.to_numpy(dtype=np.float64)
+    
+    probabilities, contributions = compiled.explain(X)
+    
+    np.testing.assert_allclose(probabilities, model.predict_proba(X_test), atol=1e-6)
+    positive = probabilities[:, 1]
+    if compiled.contribution_units == 'log_odds':
+        score = np.log(positive / (1.0 - positive))
+    else:
+        score = positive
+    np.testing.assert_allclose(compiled.expected_value + contributions.sum(axis=1), score, atol=1e-5)
+    
+    if compiled.kind == 'trees':
+        # Leaves found by the native model, as the predictor does for large batches
+        leaves = model.apply(X if isinstance(model, GradientBoostingClassifier) else X_test)
+        _, native = compiled.explain(X, leaves=leaves.reshape(len(X), -1))
+        np.testing.assert_allclose(native, contributions)
+
+
+def test_predictor_uses_compiled_model(predictor):
+    assert predictor.compiled_model is not None
+    assert predictor.compiled_model.model_type == 'LogisticRegression'
@@ -0,0 +1,149 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.columnar_store import ColumnarWriter, iter_chunks, read_frame, read_meta
+from src.data_preprocessing import preprocess_data, preprocess_data_chunked
+from src.feature_engineering import create_features
+import config
+
+
+def test_columnar_store_round_trip(tmp_path):
+    path = tmp_path / 'store'
+    writer = ColumnarWriter(path, dtypes={'b': 'float32'}, metadata={'source': 'test'})
+    writer.append(pd.DataFrame({'a': [1, 2], 'b': [0.5, 1.5]}))
+    writer.append(pd.DataFrame({'a': [3], 'b': [2.5]}))
+    writer.close()
+
+    meta = read_meta(path)
+    assert meta['rows'] == 3 and meta['source'] == 'test'
+    df = read_frame(path)
+    assert df['a'].tolist() == [1, 2, 3]
+    assert df['b'].dtype == np.float32
+    assert [len(chunk) for chunk in iter_chunks(path, 2)] == [2, 1]
+
+    writer = ColumnarWriter(tmp_path / 'other')
+    writer.append(pd.DataFrame({'a': [1]}))
+    with pytest.raises(ValueError):
+        writer.append(pd.DataFrame({'c': [1]}))
+
+
+def test_chunked_preprocessing_matches_in_memory(tmp_path):
+    expected, label_encoders, scaler = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    expected = create_features(expected)
+
+    path, chunked_encoders, chunked_scaler = preprocess_data_chunked(
+        config.RAW_DATA_PATH, tmp_path / 'processed', chunk_size=997
+    )
+    df = read_frame(path)
+
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected)
+    for col in expected.columns:
+        np.testing.assert_allclose(df[col].to_numpy(float), expected[col].to_numpy(float),
+                                   rtol=0, atol=1e-9)
+    for col, le in label_encoders.items():
+        assert list(chunked_encoders[col].classes_) == list(le.classes_)
+    np.testing.assert_allclose(chunked_scaler.mean_, scaler.mean_, rtol=1e-12)
+    np.testing.assert_allclose(chunked_scaler.scale_, scaler.scale_, rtol=1e-12)
+    # The spilled encoded chunks are cleaned up
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['processed']
+
+
+def test_processed_cache_rebuilds_only_when_inputs_change(tmp_path, monkeypatch):
+    from src import processed_cache
+
+    raw_path = tmp_path / 'raw.csv'
+    raw_path.write_bytes(config.RAW_DATA_PATH.read_bytes())
+    cache_path = tmp_path / 'processed'
+
+    df, label_encoders, scaler, hit = processed_cache.load_processed_data(raw_path, cache_path)
+    assert not hit
+    # Stored compactly: category codes as int8, raw numerics as float64
+    stored = read_frame(cache_path)
+    assert list(stored.columns) == list(scaler.feature_names_in_) + ['Churn']
+    assert stored['Contract'].dtype == np.int8 and stored['Churn'].dtype == np.int8
+    assert stored['tenure'].dtype == np.float64
+    assert stored['MonthlyCharges'].tolist() == pd.read_csv(raw_path)['MonthlyCharges'].tolist()
+    expected, _, _ = preprocess_data(raw_path, fit=True)
+    expected = create_features(expected)
+    # Bit for bit what preprocessing produced, so training sees serving's values
+    assert list(df.columns) == list(expected.columns)
+    for col in expected.columns:
+        np.testing.assert_array_equal(df[col], expected[col])
+
+    cached, cached_encoders, cached_scaler, hit = processed_cache.load_processed_data(raw_path, cache_path)
+    assert hit
+    pd.testing.assert_frame_equal(cached, df)
+    assert list(cached_encoders['Contract'].classes_) == list(label_encoders['Contract'].classes_)
+    np.testing.assert_array_equal(cached_scaler.mean_, scaler.mean_)
+
+    # New code version
+    monkeypatch.setattr(processed_cache, 'CACHE_FORMAT_VERSION', processed_cache.CACHE_FORMAT_VERSION + 1)
+    assert not processed_cache.load_processed_data(raw_path, cache_path)[3]
+    assert processed_cache.load_processed_data(raw_path, cache_path)[3]
+
+    # New raw data
+    lines = raw_path.read_text().splitlines(keepends=True)
+    raw_path.write_text(''.join(lines[:-100]))
+    df, _, _, hit = processed_cache.load_processed_data(raw_path, cache_path, chunk_size=1000)
+    assert not hit
+    assert len(df) == len(lines) - 101
+
+
+def test_append_processed_data(tmp_path):
+    from src import processed_cache
+    from src.columnar_store import ColumnarAppender
+
+    lines = config.RAW_DATA_PATH.read_text().splitlines(keepends=True)
+    raw_path = tmp_path / 'raw.csv'
+    raw_path.write_text(''.join(lines[:-300]))
+    snapshot_path = tmp_path / 'snapshot.csv'
+    snapshot_path.write_text(lines[0] + ''.join(lines[-300:]))
+    cache_path = tmp_path / 'processed'
+    df, label_encoders, scaler, _ = processed_cache.load_processed_data(raw_path, cache_path)
+    n_rows = len(df)
+
+    # An interrupted append leaves the store as it was
+    appender = ColumnarAppender(cache_path)
+    appender.append(read_frame(cache_path).iloc[:10])
+    del appender
+    assert len(read_frame(cache_path)) == n_rows
+
+    increment, appended = processed_cache.append_processed_data(snapshot_path, cache_path)
+    assert appended
+    assert increment['start'] == n_rows and increment['rows'] == 300
+    assert 0 <= increment['scaler_drift'] < 0.25
+    # The cache still hits, with the frozen scaler and a running copy updated by the snapshot
+    df, _, cached_scaler, hit = processed_cache.load_processed_data(raw_path, cache_path)
+    assert hit
+    assert len(df) == n_rows + 300
+    expected, _, _ = preprocess_data(snapshot_path, label_encoders, scaler, fit=False)
+    expected = create_features(expected)
+    for col in expected.columns:
+        np.testing.assert_array_equal(df[col].iloc[n_rows:], expected[col])
+    np.testing.assert_array_equal(cached_scaler.mean_, scaler.mean_)
+    running_scaler = joblib.load(cache_path / processed_cache.PREPROCESSING_NAME)['running_scaler']
+    assert running_scaler.n_samples_seen_ == scaler.n_samples_seen_ + 300
+
+    assert processed_cache.append_processed_data(snapshot_path, cache_path) == (increment, False)
+    assert len(read_meta(cache_path)['increments']) == 1
+
+    unseen = tmp_path / 'unseen.csv'
+    unseen.write_text(lines[0] + lines[-1].replace('Month-to-month', 'Weekly')
+                      .replace('One year', 'Weekly').replace('Two year', 'Weekly'))
+    with pytest.raises(ValueError, match='full retrain'):
+        processed_cache.append_processed_data(unseen, cache_path)
+    assert len(read_frame(cache_path)) == n_rows + 300
+
+    # A refit rebuilds as if the snapshot had been in the raw file all along
+    df, _, refit_scaler, hit = processed_cache.load_processed_data(raw_path, cache_path, refit=True)
+    assert not hit
+    expected, _, expected_scaler = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    np.testing.assert_array_equal(df['MonthlyCharges'], expected['MonthlyCharges'])
+    np.testing.assert_array_equal(refit_scaler.mean_, expected_scaler.mean_)
+    assert 'running_scaler' not in joblib.load(cache_path / processed_cache.PREPROCESSING_NAME)
+    assert read_meta(cache_path)['increments'] == [dict(increment, refit=True)]
+    assert processed_cache.load_processed_data(raw_path, cache_path, refit=True)[3]
+    assert processed_cache.append_processed_data(snapshot_path, cache_path)[1] is False
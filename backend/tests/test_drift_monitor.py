@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_preprocessing import clean_data, encode_features, load_data, scale_features
+from src.drift_monitor import DriftMonitor, build_reference
+from src.feature_transform import CompiledTransform
+from src.input_schema import InputSchema
+import config
+
+
+@pytest.fixture(scope='module')
+def reference_setup():
+    inputs, label_encoders = encode_features(clean_data(load_data(config.RAW_DATA_PATH)))
+    _, scaler = scale_features(inputs)
+    transform = CompiledTransform.from_fitted(label_encoders, scaler)
+    return build_reference(inputs, label_encoders), transform
+
+
+@pytest.fixture(scope='module')
+def customers():
+    df = pd.read_csv(config.RAW_DATA_PATH).drop(columns=['customerID', 'Churn'])
+    return df.to_dict(orient='records')
+
+
+@pytest.fixture(scope='module')
+def rows(reference_setup, customers):
+    _, transform = reference_setup
+    values, _, errors = InputSchema.from_transform(transform).validate_many(customers)
+    assert not errors
+    return values
+
+
+def test_reference_traffic_shows_no_drift(reference_setup, rows):
+    reference, transform = reference_setup
+    monitor = DriftMonitor(reference, transform.input_features)
+    monitor.observe_many(rows)
+    
+    report = monitor.report()
+    
+    assert report['rows'] == len(rows) and report['drifted'] == []
+    assert set(report['fields']) == set(reference['fields'])
+    for result in report['fields'].values():
+        assert result['status'] == 'ok' and result['psi'] < 1e-9
+    tenure = report['fields']['tenure']
+    assert tenure['quantiles']['0.5'] == pytest.approx(tenure['reference_quantiles']['0.5'], rel=0.1)
+
+
+def test_reference_from_cached_inputs_matches_raw_traffic(tmp_path, rows):
+    from src.columnar_store import read_frame
+    from src.processed_cache import load_processed_data
+    # Built like training does, from the processed cache's stored inputs
+    cache_path = tmp_path / 'processed'
+    _, label_encoders, scaler, _ = load_processed_data(config.RAW_DATA_PATH, cache_path)
+    reference = build_reference(read_frame(cache_path), label_encoders)
+    monitor = DriftMonitor(reference, list(scaler.feature_names_in_))
+    monitor.observe_many(rows)
+    
+    report = monitor.report()
+    
+    assert reference['rows'] == len(rows) and 'Churn' not in reference['fields']
+    for result in report['fields'].values():
+        assert result['psi'] < 1e-9
+
+
+def test_shifted_traffic_is_flagged(reference_setup, customers):
+    reference, transform = reference_setup
+    shifted = [dict(customer, MonthlyCharges=min(float(customer['MonthlyCharges']) * 1.25, 200),
+                    PaymentMethod='Electronic check')
+               for customer in customers[:3000]]
+    values, _, _ = InputSchema.from_transform(transform).validate_many(shifted)
+    monitor = DriftMonitor(reference, transform.input_features)
+    monitor.observe_many(values)
+    
+    report = monitor.report()
+    
+    assert report['drifted'] == ['MonthlyCharges', 'PaymentMethod']
+    charges = report['fields']['MonthlyCharges']
+    assert charges['ks'] > 0.1
+    assert charges['quantiles']['0.5'] > charges['reference_quantiles']['0.5']
+    assert report['fields']['PaymentMethod']['categories']['Electronic check']['live'] == 1.0
+
+
+def test_single_rows_count_like_batches(reference_setup, rows):
+    reference, transform = reference_setup
+    one = DriftMonitor(reference, transform.input_features)
+    for row in rows[:300]:
+        one.observe_one(row.tolist())
+    many = DriftMonitor(reference, transform.input_features)
+    many.observe_many(rows[:300])
+    
+    assert one.report(min_rows=0)['fields'] == many.report(min_rows=0)['fields']
+    assert one.report()['fields']['tenure']['status'] == 'ok'
+    assert one.report(min_rows=1000)['fields']['tenure']['status'] == 'insufficient_data'
+
+
+def test_old_windows_age_out(reference_setup, rows, monkeypatch):
+    import src.drift_monitor as drift_monitor
+    now = [1000.0]
+    monkeypatch.setattr(drift_monitor.time, 'time', lambda: now[0])
+    reference, transform = reference_setup
+    monitor = DriftMonitor(reference, transform.input_features, window_seconds=10, windows=3)
+    
+    monitor.observe_many(rows[:100])
+    now[0] += 10
+    monitor.observe_one(rows[100].tolist())
+    assert monitor.report()['rows'] == 101
+    
+    now[0] += 20
+    assert monitor.report()['rows'] == 1
+    now[0] += 100
+    assert monitor.report()['rows'] == 0
+    assert not np.any(monitor.counts)
+
+
+def test_extremes_age_out_with_their_window(reference_setup, rows, monkeypatch):
+    import src.drift_monitor as drift_monitor
+    now = [1000.0]
+    monkeypatch.setattr(drift_monitor.time, 'time', lambda: now[0])
+    reference, transform = reference_setup
+    monitor = DriftMonitor(reference, transform.input_features, window_seconds=10, windows=3)
+    charges = transform.input_features.index('MonthlyCharges')
+    outlier = rows[0].copy()
+    outlier[charges] = 10_000.0
+    
+    monitor.observe_one(outlier.tolist())
+    now[0] += 10
+    monitor.observe_many(rows[1:2000])
+    assert monitor.report()['fields']['MonthlyCharges']['quantiles']['0.5'] < 200
+    assert monitor.high.max(axis=0)[monitor._numeric_index['MonthlyCharges']] == 10_000.0
+    
+    now[0] += 20
+    assert monitor.report()['rows'] == 1999
+    high = monitor.high.max(axis=0)[monitor._numeric_index['MonthlyCharges']]
+    assert high == rows[1:2000, charges].max()
@@ -0,0 +1,78 @@
+import numpy as np
+
+from src.data_preprocessing import prepare_input_data
+from src.feature_engineering import create_features
+from src.input_schema import InputSchema
+from conftest import SAMPLE_CUSTOMER
+
+
+def _features(transform, customer):
+    """Feature vector of one customer on the serving path."""
+    values, errors = InputSchema.from_transform(transform).validate_one(customer)
+    assert not errors
+    return transform.derive_one(transform.scale_one(values))
+
+
+def test_serving_path_is_bit_identical_to_pandas_path(predictor, raw_customers):
+    transform = predictor.transform
+    
+    for customer in raw_customers[:500]:
+        expected = create_features(
+            prepare_input_data(customer, predictor.label_encoders, predictor.scaler)
+        )
+        assert list(expected.columns) == transform.feature_names
+        
+        np.testing.assert_array_equal(_features(transform, customer),
+                                      expected.to_numpy(dtype=np.float64)[0])
+
+
+def test_blank_total_charges(predictor):
+    customer = dict(SAMPLE_CUSTOMER, TotalCharges=' ')
+    expected = create_features(
+        prepare_input_data(customer, predictor.label_encoders, predictor.scaler)
+    )
+    
+    np.testing.assert_array_equal(_features(predictor.transform, customer),
+                                  expected.to_numpy(dtype=np.float64)[0])
+
+
+def test_matrix_path_matches_single_rows(predictor, raw_customers):
+    transform = predictor.transform
+    values, positions, errors = predictor.schema.validate_many(raw_customers[:500])
+    
+    features = transform.derive_many(transform.scale_many(values))
+    
+    assert positions == list(range(500)) and not errors
+    for row, customer in zip(features, raw_customers[:500]):
+        np.testing.assert_array_equal(row, _features(transform, customer))
+
+
+def test_bins_match_pd_cut():
+    import pandas as pd
+    from src.feature_engineering import TENURE_BINS
+    
+    values = np.array([-2, -1.0000001, -1, -0.5, 0, 12, 12.0001, 48, 100, 100.1, np.nan])
+    expected = pd.cut(values, bins=[-1, 12, 24, 48, 100], labels=[0, 1, 2, 3],
+                      include_lowest=True).codes
+    np.testing.assert_array_equal(TENURE_BINS(values), expected)
+    assert [TENURE_BINS(np.float64(v)) for v in values] == list(expected)
+
+
+def test_registered_feature_is_used_in_training_and_serving(predictor):
+    from src import feature_engineering
+    from src.feature_transform import CompiledTransform
+    
+    feature_engineering.derived_feature('ChargesPerService', ['MonthlyCharges', 'PhoneService'])(
+        lambda charges, phone: charges * phone
+    )
+    try:
+        transform = CompiledTransform.from_fitted(predictor.label_encoders, predictor.scaler)
+        expected = create_features(
+            prepare_input_data(SAMPLE_CUSTOMER, predictor.label_encoders, predictor.scaler)
+        )
+        assert transform.feature_names[-1] == 'ChargesPerService'
+        assert transform.feature_names == list(expected.columns)
+        np.testing.assert_array_equal(_features(transform, SAMPLE_CUSTOMER),
+                                      expected.to_numpy(dtype=np.float64)[0])
+    finally:
+        del feature_engineering.FEATURE_REGISTRY['ChargesPerService']
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.data_preprocessing import prepare_input_data
+from src.input_schema import InputSchema, ValidationError
+from conftest import SAMPLE_CUSTOMER
+
+
+def test_validate_many_matches_validate_one(predictor, raw_customers):
+    schema = predictor.schema
+    customers = raw_customers[:300] + [
+        dict(SAMPLE_CUSTOMER, SeniorCitizen='1', tenure='12', TotalCharges=' '),
+        dict(SAMPLE_CUSTOMER, Contract='Weekly', tenure=-3, MonthlyCharges=None),
+        dict(SAMPLE_CUSTOMER, gender=['Male'], TotalCharges='inf'),
+    ]
+    
+    values, positions, errors = schema.validate_many(customers)
+    
+    assert positions == list(range(301)) and list(errors) == [301, 302]
+    for row, customer in zip(values, customers):
+        np.testing.assert_array_equal(row, schema.validate_one(customer)[0])
+    for i, field_errors in errors.items():
+        assert field_errors == schema.validate_one(customers[i])[1]
+    assert [(e['field'], e['code']) for e in errors[301]] == [
+        ('tenure', 'out_of_range'), ('Contract', 'invalid_category'),
+        ('MonthlyCharges', 'not_numeric'),
+    ]
+    assert [(e['field'], e['code']) for e in errors[302]] == [
+        ('gender', 'invalid_category'), ('TotalCharges', 'not_numeric'),
+    ]
+
+
+def test_scaled_schema_output_matches_transform(predictor, raw_customers):
+    values, _, _ = predictor.schema.validate_many(raw_customers[:300])
+    
+    rows = predictor.transform.scale_many(values)
+    
+    for row, scaled, customer in zip(rows, values, raw_customers[:300]):
+        expected = prepare_input_data(customer, predictor.label_encoders, predictor.scaler)
+        np.testing.assert_array_equal(row, expected.to_numpy(dtype=np.float64)[0])
+        assert predictor.transform.scale_one(scaled.tolist()) == row.tolist()
+
+
+def test_out_of_range_policies(predictor):
+    customer = dict(SAMPLE_CUSTOMER, tenure=80)
+    
+    clip = InputSchema.from_transform(predictor.transform, out_of_range='clip')
+    allow = InputSchema.from_transform(predictor.transform, out_of_range='allow')
+    
+    assert clip.validate_one(customer)[0][4] == 72.0
+    assert clip.validate_many([customer])[0][0, 4] == 72.0
+    assert allow.validate_one(customer)[0][4] == 80.0
+    with pytest.raises(ValidationError, match='tenure must be between 0 and 72') as excinfo:
+        predictor.predict(customer)
+    assert excinfo.value.errors[0]['max'] == 72
+
+
+def test_validate_many_10k_rows_is_fast(predictor, raw_customers):
+    customers = (raw_customers * 2)[:10000]
+    
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        _, positions, _ = predictor.schema.validate_many(customers)
+        best = min(best, time.perf_counter() - start)
+    
+    assert len(positions) == 10000
+    # A few milliseconds on a laptop; generous for slow CI machines
+    assert best < 0.1
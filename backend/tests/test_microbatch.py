@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from src.microbatch import MicroBatcher
+from conftest import SAMPLE_CUSTOMER
+
+
+def test_concurrent_submissions_share_batches(predictor):
+    batcher = MicroBatcher(predictor.predict_batch, max_batch_size=16, max_wait_ms=50)
+    customers = [dict(SAMPLE_CUSTOMER, tenure=t) for t in range(32)]
+    results = [None] * len(customers)
+    
+    def submit(i):
+        results[i] = batcher.submit(customers[i], timeout=10)
+    
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(customers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    for customer, result in zip(customers, results):
+        expected = predictor.predict(customer)
+        assert result['churn'] == expected['churn']
+        assert result['churn_probability'] == pytest.approx(expected['churn_probability'], abs=1e-12)
+    
+    stats = batcher.stats()
+    assert stats['rows'] == 32
+    assert stats['batches'] < 32
+    assert sum(stats['batch_size_histogram'].values()) == stats['batches']
+    assert stats['queue_depth'] == 0
+
+
+def test_invalid_input_raises_for_its_caller_only(predictor):
+    batcher = MicroBatcher(predictor.predict_batch, max_batch_size=4, max_wait_ms=1)
+    
+    with pytest.raises(ValueError, match='Contract'):
+        batcher.submit(dict(SAMPLE_CUSTOMER, Contract='Weekly'), timeout=10)
+    assert 'churn' in batcher.submit(SAMPLE_CUSTOMER, timeout=10)
@@ -0,0 +1,32 @@
+import json
+
+from src.pipeline_parity import REFERENCE_STAGES, SERVING_STAGES, run_parity
+
+
+def test_training_and_serving_paths_agree(predictor):
+    report = run_parity(predictor, rows=500, single_rows=20)
+    
+    assert report['passed'], report['parity']
+    assert report['rows'] == 500 and report['single_rows'] == 20
+    assert report['parity']['label_agreement'] == 1.0
+    for mode in ('batch', 'single'):
+        assert set(report[mode]['reference']['stage_seconds']) == set(REFERENCE_STAGES)
+        assert set(report[mode]['serving']['stage_seconds']) == set(SERVING_STAGES)
+        assert report[mode]['serving']['rows_per_second'] > 0
+    json.dumps(report)
+
+
+def test_skew_is_reported(predictor, monkeypatch):
+    # Serving-side scaler drift on one column
+    mean = predictor.transform.mean.copy()
+    mean[4] += 1e-3
+    monkeypatch.setattr(predictor.transform, 'mean', mean)
+    monkeypatch.setattr(predictor.transform, '_mean_scale',
+                        list(zip(mean.tolist(), predictor.transform.scale.tolist())))
+    
+    report = run_parity(predictor, rows=200, single_rows=5)
+    
+    assert not report['passed']
+    assert report['parity']['feature_max_abs_diff'] > 1e-9
+    # tenure, or AvgCharges which is derived from it
+    assert report['parity']['worst_feature'] in ('tenure', 'AvgCharges')
@@ -0,0 +1,106 @@
+import copy
+
+import pytest
+
+from conftest import SAMPLE_CUSTOMER
+import config
+
+
+def test_predict_batch_matches_single_predictions(predictor, raw_customers):
+    customers = raw_customers[:200]
+    
+    batch = predictor.predict_batch(customers)
+    
+    assert len(batch) == len(customers)
+    for customer, result in zip(customers, batch):
+        single = predictor.predict(customer)
+        assert result['churn'] == single['churn']
+        assert result['churn_probability'] == pytest.approx(single['churn_probability'], abs=1e-12)
+
+
+def test_predict_batch_reports_invalid_rows_by_index(predictor):
+    missing = copy.deepcopy(SAMPLE_CUSTOMER)
+    del missing['Contract']
+    unknown = dict(SAMPLE_CUSTOMER, PaymentMethod='Bitcoin')
+    bad_number = dict(SAMPLE_CUSTOMER, tenure='twelve')
+    
+    results = predictor.predict_batch(
+        [SAMPLE_CUSTOMER, missing, unknown, 'not a customer', bad_number, SAMPLE_CUSTOMER]
+    )
+    
+    assert len(results) == 6
+    assert results[0] == results[5]
+    assert 'churn' in results[0]
+    assert results[1] == {
+        'index': 1, 'error': 'Missing required fields: Contract',
+        'fields': [{'field': 'Contract', 'code': 'missing', 'message': 'Missing required field'}]
+    }
+    assert results[2]['index'] == 2 and 'PaymentMethod' in results[2]['error']
+    assert results[2]['fields'][0]['code'] == 'invalid_category'
+    assert results[3]['index'] == 3 and results[3]['fields'][0]['code'] == 'not_object'
+    assert results[4]['index'] == 4 and 'tenure' in results[4]['error']
+    assert results[4]['fields'][0]['code'] == 'not_numeric'
+
+
+def test_predict_batch_empty(predictor):
+    assert predictor.predict_batch([]) == []
+
+
+def test_decision_threshold_sets_label(model_dir, monkeypatch):
+    from src.predict import ChurnPredictor
+    
+    probability = ChurnPredictor().predict(SAMPLE_CUSTOMER)['churn_probability']
+    
+    monkeypatch.setattr(config, 'DECISION_THRESHOLD', probability - 1e-6)
+    assert ChurnPredictor().predict(SAMPLE_CUSTOMER)['churn'] == 'Yes'
+    
+    monkeypatch.setattr(config, 'DECISION_THRESHOLD', probability + 1e-6)
+    low = ChurnPredictor()
+    assert low.predict(SAMPLE_CUSTOMER)['churn'] == 'No'
+    assert low.predict_batch([SAMPLE_CUSTOMER])[0]['churn'] == 'No'
+
+
+def test_prediction_cache_counts_hits_and_misses(predictor):
+    predictor.cache.clear()
+    customer = dict(SAMPLE_CUSTOMER, SeniorCitizen=1)
+    
+    first = predictor.predict(customer)
+    # Same customer in a different representation hits the same entry
+    second = predictor.predict(dict(customer, SeniorCitizen='1', tenure=12.0))
+    batch = predictor.predict_batch([customer, SAMPLE_CUSTOMER])
+    
+    assert first == second == batch[0]
+    stats = predictor.cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['size'] == 2
+
+
+def test_prediction_cache_evicts_and_invalidates(tmp_path):
+    from src.prediction_cache import PredictionCache
+    
+    artifact = tmp_path / 'model.pkl'
+    artifact.write_bytes(b'v1')
+    cache = PredictionCache(max_size=2, ttl=0, artifact_paths=[artifact], check_interval=0)
+    
+    for key in (b'a', b'b', b'c'):
+        cache.put(key, key)
+    assert cache.get(b'a') is None
+    assert cache.get(b'c') == b'c'
+    assert cache.stats()['evictions'] == 1
+    
+    artifact.write_bytes(b'v2-retrained')
+    assert cache.get(b'c') is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_prepare_for_fork_freezes_model_arrays(predictor):
+    expected = predictor.predict(SAMPLE_CUSTOMER)
+    
+    predictor.prepare_for_fork()
+    
+    assert predictor.artifacts._model is not None or predictor.artifacts.compiled_model.kind == 'linear'
+    with pytest.raises(ValueError):
+        predictor.artifacts.transform.mean[0] = 1.0
+    assert predictor.predict(SAMPLE_CUSTOMER) == expected
+    assert predictor.status()['preloaded'] is False
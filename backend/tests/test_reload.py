@@ -0,0 +1,88 @@
+import time
+
+import joblib
+import pytest
+
+from src.artifact_bundle import write_bundle
+from conftest import SAMPLE_CUSTOMER
+import config
+
+
+@pytest.fixture
+def bundle_root(model_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'BUNDLE_DIR', tmp_path / 'bundles')
+    monkeypatch.setattr(config, 'RELOAD_TRIGGER_PATH', tmp_path / 'RELOAD')
+    return tmp_path / 'bundles'
+
+
+def _write(model_dir, **model_updates):
+    model = joblib.load(model_dir / 'model.pkl')
+    for name, value in model_updates.items():
+        setattr(model, name, value)
+    return write_bundle(model, joblib.load(model_dir / 'scaler.pkl'),
+                        joblib.load(model_dir / 'label_encoders.pkl'))
+
+
+def test_reload_swaps_in_new_bundle(model_dir, bundle_root):
+    from src.predict import ChurnPredictor
+    
+    first = _write(model_dir)
+    predictor = ChurnPredictor()
+    before = predictor.predict(SAMPLE_CUSTOMER)
+    old_artifacts = predictor.artifacts
+    
+    model = joblib.load(model_dir / 'model.pkl')
+    second = _write(model_dir, intercept_=model.intercept_ + 3.0)
+    version = predictor.reload()
+    
+    assert version == second.name != first.name
+    assert predictor.status()['version'] == second.name
+    assert predictor.status()['reloads'] == 1
+    assert predictor.predict(SAMPLE_CUSTOMER)['churn_probability'] > before['churn_probability']
+    # A request holding the old artifacts still scores with the old model
+    values, _ = old_artifacts.schema.validate_one(SAMPLE_CUSTOMER)
+    features = old_artifacts.transform.derive_one(old_artifacts.transform.scale_one(values))
+    assert predictor._predict_proba(
+        old_artifacts, features.reshape(1, -1)
+    )[0][1] == pytest.approx(before['churn_probability'])
+
+
+def test_failed_reload_keeps_active_model(model_dir, bundle_root):
+    from src.predict import ChurnPredictor
+    
+    bundle = _write(model_dir)
+    predictor = ChurnPredictor()
+    
+    (bundle_root / 'LATEST').write_text('missing-version')
+    (bundle_root / 'missing-version').mkdir()
+    (bundle_root / 'missing-version' / 'manifest.json').write_text('{"format_version": 99}')
+    
+    with pytest.raises(ValueError):
+        predictor.reload()
+    assert predictor.model_version == bundle.name
+    assert 'format' in predictor.status()['last_reload_error']
+    assert 'churn' in predictor.predict(SAMPLE_CUSTOMER)
+
+
+def test_watcher_reloads_on_new_bundle(model_dir, bundle_root):
+    from src.predict import ChurnPredictor
+    
+    _write(model_dir)
+    predictor = ChurnPredictor()
+    predictor.ensure_watcher(0.05)
+    
+    second = _write(model_dir, intercept_=joblib.load(model_dir / 'model.pkl').intercept_ - 1.0)
+    deadline = time.time() + 5
+    while predictor.model_version != second.name and time.time() < deadline:
+        time.sleep(0.05)
+    predictor.stop_watcher()
+    
+    assert predictor.model_version == second.name
+
+
+def test_reload_endpoint(client, model_dir, bundle_root):
+    response = client.post('/api/reload?wait=true')
+    
+    assert response.status_code == 200
+    assert response.get_json()['model']['reloads'] == 1
+    assert client.get('/api/health').get_json()['model']['load_seconds'] > 0
@@ -0,0 +1,134 @@
+import io
+import json
+import time
+
+import pytest
+
+from src.scoring_jobs import JobRunner, JobStore, count_records, run_job
+from conftest import SAMPLE_CUSTOMER
+import config
+
+
+@pytest.fixture
+def raw_csv_head():
+    with open(config.RAW_DATA_PATH, encoding='utf-8') as f:
+        return ''.join(f.readline() for _ in range(51))
+
+
+def test_interrupted_job_resumes_from_checkpoint(predictor, raw_csv_head, tmp_path, monkeypatch):
+    store = JobStore(tmp_path)
+    job = store.submit(io.BytesIO(raw_csv_head.encode()), 'csv', 'csv')
+    store.claim()
+    
+    # The scorer dies while scoring the third chunk, after writing part of it
+    predict_batch = predictor.predict_batch
+    calls = []
+    
+    def dying_predict_batch(chunk):
+        calls.append(len(chunk))
+        if len(calls) == 3:
+            with open(store.results_path(job), 'ab') as f:
+                f.write(b'half a chunk')
+            raise SystemExit
+        return predict_batch(chunk)
+    
+    monkeypatch.setattr(predictor, 'predict_batch', dying_predict_batch)
+    with pytest.raises(SystemExit):
+        run_job(job['id'], tmp_path, predictor, chunk_size=7)
+    monkeypatch.setattr(predictor, 'predict_batch', predict_batch)
+    
+    interrupted = store.get(job['id'])
+    assert interrupted['status'] == 'running'
+    assert interrupted['rows_done'] == 14 and interrupted['rows_total'] == 50
+    
+    assert store.requeue_abandoned(stale_seconds=0) == [job['id']]
+    assert store.claim()['attempts'] == 2
+    assert run_job(job['id'], tmp_path, predictor, chunk_size=7) == 'succeeded'
+    
+    lines = store.results_path(job).read_text().splitlines()
+    assert len(lines) == 51 and lines[0].startswith('customerID,churn,')
+    assert [line.split(',')[0] for line in lines[1:]] == \
+        [row.split(',')[0] for row in raw_csv_head.splitlines()[1:]]
+    assert store.get(job['id'])['rows_done'] == 50
+
+
+def test_job_api(client, predictor, job_runner):
+    customers = [SAMPLE_CUSTOMER, dict(SAMPLE_CUSTOMER, Contract='Weekly')]
+    
+    response = client.post('/api/jobs', json={'customers': customers})
+    
+    assert response.status_code == 202
+    body = response.get_json()
+    job_id = body['job']['job_id']
+    assert body['job']['status'] == 'queued'
+    assert client.get(body['results_url']).status_code == 409
+    
+    store = job_runner.store
+    assert store.claim()['id'] == job_id
+    run_job(job_id, store.root, predictor)
+    
+    status = client.get(body['status_url']).get_json()
+    assert status['status'] == 'succeeded' and status['progress'] == 1.0
+    assert status['rows_total'] == 2 and status['rows_failed'] == 1
+    results = [json.loads(line) for line in client.get(body['results_url']).get_data(as_text=True).splitlines()]
+    assert results[0] == predictor.predict(SAMPLE_CUSTOMER) | {'customerID': None}
+    assert 'Contract' in results[1]['error']
+    assert client.get('/api/jobs/unknown').status_code == 404
+
+
+def test_runner_scores_jobs_on_process_pool(model_dir, raw_csv_head, tmp_path, monkeypatch):
+    # Spawned scoring processes read the model location from the environment
+    monkeypatch.setenv('MODEL_DIR', str(model_dir))
+    store = JobStore(tmp_path)
+    job = store.submit(io.BytesIO(raw_csv_head.encode()), 'csv')
+    runner = JobRunner(store, workers=1, poll_interval=0.05)
+    
+    runner.ensure_started()
+    try:
+        deadline = time.monotonic() + 120
+        while store.get(job['id'])['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        runner.stop()
+    
+    finished = store.get(job['id'])
+    assert finished['status'] == 'succeeded', finished['error']
+    assert finished['model_version'].startswith('pickles-')
+    assert len(store.results_path(finished).read_text().splitlines()) == 50
+
+
+def test_blank_csv_lines_are_not_counted(predictor, raw_csv_head, tmp_path):
+    lines = raw_csv_head.splitlines(keepends=True)
+    store = JobStore(tmp_path)
+    job = store.submit(io.BytesIO(''.join(lines[:3] + ['\n', ' \n'] + lines[3:6] + ['\n']).encode()), 'csv')
+    store.claim()
+    
+    assert count_records(store.input_path(job), 'csv') == 5
+    assert run_job(job['id'], tmp_path, predictor) == 'succeeded'
+    finished = store.get(job['id'])
+    assert finished['rows_done'] == finished['rows_total'] == 5
+
+
+def test_one_runner_dispatches_per_store(tmp_path):
+    store = JobStore(tmp_path)
+    first = JobRunner(store, workers=1, poll_interval=0.05)
+    second = JobRunner(store, workers=1, poll_interval=0.05)
+    
+    def wait_for(condition, timeout=10):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return condition()
+    
+    first.ensure_started()
+    try:
+        assert wait_for(lambda: first.dispatching)
+        second.ensure_started()
+        time.sleep(0.2)
+        assert not second.dispatching
+        # The standby runner takes over when the dispatcher goes away
+        first.stop()
+        assert wait_for(lambda: second.dispatching)
+    finally:
+        first.stop()
+        second.stop()
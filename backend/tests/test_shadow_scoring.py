@@ -0,0 +1,114 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from conftest import SAMPLE_CUSTOMER
+from src.artifact_bundle import write_bundle
+from src.data_preprocessing import preprocess_data
+from src.feature_engineering import create_features
+from src.shadow_scoring import ShadowScorer
+import src.shadow_scoring as shadow_scoring
+import config
+
+
+@pytest.fixture(scope='module')
+def challenger_bundles(trained_artifacts, tmp_path_factory):
+    """A bundle of the champion model itself and one of a more regularized model."""
+    root = tmp_path_factory.mktemp('challengers')
+    scaler = joblib.load(trained_artifacts / 'scaler.pkl')
+    label_encoders = joblib.load(trained_artifacts / 'label_encoders.pkl')
+    same = write_bundle(joblib.load(trained_artifacts / 'model.pkl'), scaler, label_encoders,
+                        root=root / 'same')
+
+    df, _, _ = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    df = create_features(df)
+    model = LogisticRegression(C=0.001, max_iter=1000).fit(df.drop('Churn', axis=1), df['Churn'])
+    other = write_bundle(model, scaler, label_encoders, root=root / 'other')
+    return same, other
+
+
+@pytest.fixture
+def shadow_client(client, model_dir, challenger_bundles, monkeypatch):
+    import app as app_module
+    from src.predict import ChurnPredictor
+    monkeypatch.setattr(config, 'CHALLENGER_BUNDLES', [str(path) for path in challenger_bundles])
+    monkeypatch.setattr(app_module, 'predictor', ChurnPredictor())
+    return client
+
+
+def _wait_for_rows(report_func, rows, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        report = report_func()
+        if all(challenger['rows'] >= rows for challenger in report['challengers'].values()):
+            return report
+        time.sleep(0.05)
+    raise AssertionError(f'Challengers did not score {rows} rows in time: {report}')
+
+
+def test_shadow_reports_agreement_with_challengers(shadow_client, challenger_bundles, raw_customers):
+    assert shadow_client.post('/api/predict', json=SAMPLE_CUSTOMER).status_code == 200
+    shadow_client.post('/api/predict/batch', json={'customers': raw_customers[:500] + [{}]})
+
+    report = _wait_for_rows(lambda: shadow_client.get('/api/shadow').get_json(), 501)
+
+    same, other = (report['challengers'][path.name] for path in challenger_bundles)
+    assert report['queue']['submitted_rows'] == 501 and report['queue']['dropped_rows'] == 0
+    assert same['agreement'] == 1.0 and same['score_delta']['max_abs'] < 1e-9
+    assert same['labels']['both_churn'] + same['labels']['neither'] == 501
+    assert other['errors'] == 0 and other['score_delta']['mean_abs'] > 0
+    assert sum(other['score_delta']['abs_histogram'].values()) == 501
+    assert 'churn_shadow_agreement{challenger="' in shadow_client.get('/api/metrics').get_data(as_text=True)
+
+
+def test_shadow_endpoint_needs_challengers(client):
+    assert client.get('/api/shadow').status_code == 404
+
+
+def test_full_queue_drops_shadow_work(predictor, challenger_bundles, monkeypatch):
+    from src.predict import ModelArtifacts
+    challengers = [ModelArtifacts.from_bundle(path) for path in challenger_bundles]
+    # Score in a thread of this process, held up until release is set
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(release.wait, 5)
+    monkeypatch.setattr(shadow_scoring, '_process_challengers', challengers)
+    monkeypatch.setattr(ShadowScorer, '_start_executor', lambda self: executor)
+    scorer = ShadowScorer(challengers, 0.5, max_pending=2)
+    values, _ = predictor.schema.validate_one(SAMPLE_CUSTOMER)
+
+    # The first request is taken by the scoring thread, two more fill the queue
+    assert scorer.submit(predictor.artifacts, [values], [(0.4, 0.6)])
+    time.sleep(0.1)
+    assert scorer.submit(predictor.artifacts, [values], [(0.4, 0.6)])
+    assert scorer.submit(predictor.artifacts, [values], [(0.4, 0.6)])
+    assert not scorer.submit(predictor.artifacts, [values], [(0.4, 0.6)])
+    release.set()
+
+    report = _wait_for_rows(scorer.report, 3)
+    assert report['queue']['dropped_requests'] == 1 and report['queue']['submitted_rows'] == 3
+
+
+def test_bad_request_does_not_stop_shadow_scoring(predictor, challenger_bundles, monkeypatch):
+    from src.predict import ModelArtifacts
+    challengers = [ModelArtifacts.from_bundle(path) for path in challenger_bundles]
+    monkeypatch.setattr(shadow_scoring, '_process_challengers', challengers)
+    monkeypatch.setattr(ShadowScorer, '_start_executor', lambda self: ThreadPoolExecutor(max_workers=1))
+    scorer = ShadowScorer(challengers, 0.5)
+    values, _ = predictor.schema.validate_one(SAMPLE_CUSTOMER)
+
+    # Rows of the wrong width can't be stacked
+    assert scorer.submit(predictor.artifacts, [values[:-1]], [(0.4, 0.6)])
+    deadline = time.time() + 10
+    while not all(challenger['errors'] for challenger in scorer.report()['challengers'].values()):
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert scorer.submit(predictor.artifacts, [values], [(0.4, 0.6)])
+
+    report = _wait_for_rows(scorer.report, 1)
+    for challenger in report['challengers'].values():
+        assert challenger['errors'] == 1 and 'ValueError' in challenger['last_error']
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from src.stream_scoring import main, read_csv_chunks, read_ndjson_chunks, score_chunks
+from conftest import SAMPLE_CUSTOMER
+import config
+
+
+@pytest.fixture
+def raw_csv_head():
+    with open(config.RAW_DATA_PATH, encoding='utf-8') as f:
+        return ''.join(f.readline() for _ in range(51))
+
+
+def test_csv_chunks_match_batch_predictions(predictor, raw_csv_head, raw_customers):
+    chunks = read_csv_chunks(io.StringIO(raw_csv_head), chunk_size=7)
+    results = list(score_chunks(predictor, chunks))
+    expected = predictor.predict_batch(raw_customers[:50])
+    
+    assert len(results) == 50
+    assert results[0]['customerID'] == '7590-VHVEG'
+    for result, batch in zip(results, expected):
+        assert result['churn'] == batch['churn']
+        assert result['churn_probability'] == pytest.approx(batch['churn_probability'], abs=1e-12)
+
+
+def test_ndjson_reports_bad_lines_without_stopping(predictor):
+    lines = [
+        json.dumps(dict(SAMPLE_CUSTOMER, customerID='a')),
+        '{not json',
+        json.dumps(dict(SAMPLE_CUSTOMER, customerID='c', Contract='Weekly')),
+        json.dumps(dict(SAMPLE_CUSTOMER, customerID='d')),
+    ]
+    
+    results = list(score_chunks(predictor, read_ndjson_chunks(lines, chunk_size=3)))
+    
+    assert [r['customerID'] for r in results] == ['a', None, 'c', 'd']
+    assert results[1]['row'] == 1 and results[1]['error'].startswith('Invalid JSON')
+    assert results[2]['row'] == 2 and 'Contract' in results[2]['error']
+    assert 'churn' in results[0] and 'churn' in results[3]
+
+
+def test_stream_endpoint(client, raw_csv_head):
+    response = client.post('/api/predict/stream?output=csv', data=raw_csv_head,
+                           content_type='text/csv')
+    
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 50
+    assert rows[1]['customerID'] == '5575-GNVDE'
+    
+    response = client.post('/api/predict/stream', data='{}', content_type='text/plain')
+    assert response.status_code == 415
+
+
+def test_command_line_scorer(model_dir, raw_csv_head, tmp_path, monkeypatch):
+    input_path = tmp_path / 'customers.csv'
+    input_path.write_text(raw_csv_head)
+    output_path = tmp_path / 'scores.ndjson'
+    monkeypatch.setattr(sys, 'argv', ['stream_scoring.py', str(input_path), '-o', str(output_path)])
+    
+    main()
+    
+    results = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert len(results) == 50
+    assert all('churn' in result for result in results)
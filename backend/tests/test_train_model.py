@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'))
+
+import train_model
+from src.compiled_model import CompiledModel, check_parity, compile_model
+from src.data_preprocessing import preprocess_data
+from src.feature_engineering import create_features
+import config
+
+
+@pytest.fixture(scope='module')
+def split():
+    df, _, _ = preprocess_data(config.RAW_DATA_PATH, fit=True)
+    df = create_features(df).sample(n=1500, random_state=config.RANDOM_STATE)
+    X = df.drop('Churn', axis=1)
+    y = df['Churn']
+    return train_test_split(X, y, test_size=config.TEST_SIZE,
+                            random_state=config.RANDOM_STATE, stratify=y)
+
+
+@pytest.mark.parametrize('cv_folds', [0, 2])
+def test_parallel_model_selection(split, cv_folds):
+    best_model, results = train_model.train_and_evaluate_models(*split, n_jobs=2, cv_folds=cv_folds)
+    
+    assert set(results) == set(train_model.build_candidates())
+    for metrics in results.values():
+        assert 0.0 <= metrics['f1'] <= 1.0
+        assert metrics['fit_seconds'] > 0
+        assert metrics['peak_rss_mb'] > 0
+    best_name = max(results, key=lambda name: results[name]['f1'])
+    assert results[best_name]['model'] is best_model
+    assert best_model.predict_proba(split[1]).shape == (len(split[1]), 2)
+
+
+def test_early_stopped_xgboost_compiles(split):
+    X_train, X_test, y_train, y_test = split
+    model = train_model.build_candidates()['XGBoost'].set_params(n_estimators=500)
+    
+    train_model.fit_model(model, X_train, y_train)
+    
+    assert model.best_iteration < 499
+    check_parity(CompiledModel(compile_model(model)), model, X_test)
+
+
+@pytest.mark.parametrize('name', list(train_model.build_candidates()))
+def test_warm_start_model_continues_training(split, name):
+    X_train, X_test, y_train, y_test = split
+    half = len(X_train) // 2
+    model = train_model.fit_model(train_model.build_candidates()[name], X_train[:half], y_train[:half])
+    before = model.predict_proba(X_test)
+    
+    updated = train_model.warm_start_model(model, X_train[half:], y_train[half:], n_estimators=5)
+    
+    np.testing.assert_array_equal(model.predict_proba(X_test), before)
+    assert updated is not model and not updated.get_params().get('warm_start')
+    if name == 'Random Forest':
+        assert len(updated.estimators_) == len(model.estimators_) + 5
+    elif name == 'XGBoost':
+        assert updated.get_booster().num_boosted_rounds() > model.get_booster().num_boosted_rounds()
+    assert not np.array_equal(updated.predict_proba(X_test), before)
+    check_parity(CompiledModel(compile_model(updated)), updated, X_test)
+
+
+def test_incremental_training_publishes_only_if_metrics_hold(tmp_path, monkeypatch):
+    from src.artifact_bundle import current_bundle_dir
+    from src.drift_monitor import load_reference
+    from src.processed_cache import load_processed_data
+    
+    lines = config.RAW_DATA_PATH.read_text().splitlines(keepends=True)
+    raw_path = tmp_path / 'raw.csv'
+    raw_path.write_text(''.join(lines[:2001]))
+    snapshots = []
+    for k, start in enumerate((2001, 2501)):
+        snapshots.append(tmp_path / f'snapshot{k}.csv')
+        snapshots[-1].write_text(lines[0] + ''.join(lines[start:start + 500]))
+    cache_path = tmp_path / 'processed'
+    model_path = tmp_path / 'model.pkl'
+    for name, value in {'MODEL_PATH': model_path, 'COMPILED_MODEL_PATH': tmp_path / 'compiled.npz',
+                        'SCALER_PATH': tmp_path / 'scaler.pkl', 'BUNDLE_DIR': tmp_path / 'bundles',
+                        'LABEL_ENCODERS_PATH': tmp_path / 'label_encoders.pkl',
+                        'DRIFT_REFERENCE_PATH': tmp_path / 'drift_reference.json'}.items():
+        monkeypatch.setattr(config, name, value)
+    df, _, _, _ = load_processed_data(raw_path, cache_path)
+    model = train_model.build_candidates()['Logistic Regression']
+    joblib.dump(model.fit(df.drop('Churn', axis=1), df['Churn']), model_path)
+    
+    # A tolerance no update can meet
+    monkeypatch.setattr(config, 'INCREMENTAL_TOLERANCE', -1.0)
+    record = train_model.train_incremental(snapshots[0], cache_path)
+    assert record['published'] is False and 'dropped' in record['reason']
+    assert record['train_rows'] == 400 and record['replay_rows'] == 400 and record['holdout_rows'] == 100
+    assert current_bundle_dir() is None
+    assert train_model.train_incremental(snapshots[0], cache_path) == record
+    
+    monkeypatch.setattr(config, 'INCREMENTAL_TOLERANCE', 1.0)
+    record = train_model.train_incremental(snapshots[1], cache_path)
+    assert record['published'] is True
+    assert record['holdout_rows'] == 200  # rolling holdout of both snapshots
+    assert current_bundle_dir().name == record['bundle']
+    # The drift reference covers every cached row but the holdout, not just the update's sample
+    assert load_reference(config.DRIFT_REFERENCE_PATH)['rows'] == 3000 - 200
+    assert joblib.load(model_path).coef_.tolist() != model.coef_.tolist()
+
+
+def test_full_retrain_refits_scaling_after_drift(tmp_path, monkeypatch):
+    from src.drift_monitor import load_reference
+    from src.processed_cache import PREPROCESSING_NAME, load_processed_data, read_meta
+    
+    lines = config.RAW_DATA_PATH.read_text().splitlines(keepends=True)
+    raw_path = tmp_path / 'raw.csv'
+    raw_path.write_text(''.join(lines[:2001]))
+    snapshots = []
+    for k, start in enumerate((2001, 2501)):
+        snapshots.append(tmp_path / f'snapshot{k}.csv')
+        snapshots[-1].write_text(lines[0] + ''.join(lines[start:start + 500]))
+    cache_path = tmp_path / 'processed'
+    for name, value in {'RAW_DATA_PATH': raw_path, 'PROCESSED_DATA_DIR': tmp_path,
+                        'PROCESSED_DATA_PATH': cache_path, 'MODEL_DIR': tmp_path,
+                        'MODEL_PATH': tmp_path / 'model.pkl', 'COMPILED_MODEL_PATH': tmp_path / 'compiled.npz',
+                        'SCALER_PATH': tmp_path / 'scaler.pkl', 'BUNDLE_DIR': tmp_path / 'bundles',
+                        'LABEL_ENCODERS_PATH': tmp_path / 'label_encoders.pkl',
+                        'DRIFT_REFERENCE_PATH': tmp_path / 'drift_reference.json'}.items():
+        monkeypatch.setattr(config, name, value)
+    
+    def train_logistic_regression(X_train, X_test, y_train, y_test):
+        model = train_model.build_candidates()['Logistic Regression']
+        return model.fit(X_train, y_train), {}
+    monkeypatch.setattr(train_model, 'train_and_evaluate_models', train_logistic_regression)
+    train_model.main()
+    assert load_reference(config.DRIFT_REFERENCE_PATH)['rows'] == 1600  # the training split
+    
+    # Any drift is too much
+    monkeypatch.setattr(config, 'INCREMENTAL_MAX_SCALER_DRIFT', 0.0)
+    record = train_model.train_incremental(snapshots[0], cache_path)
+    assert record['published'] is False and 'full retrain' in record['reason']
+    
+    df, _, scaler, cache_hit = load_processed_data(refit=True)
+    assert not cache_hit and len(df) == 2500  # the snapshot's rows are kept
+    assert scaler.n_samples_seen_ == 2500
+    assert 'running_scaler' not in joblib.load(cache_path / PREPROCESSING_NAME)
+    train_model.main()
+    assert joblib.load(config.SCALER_PATH).n_samples_seen_ == 2500
+    
+    monkeypatch.setattr(config, 'INCREMENTAL_MAX_SCALER_DRIFT', 10.0)
+    monkeypatch.setattr(config, 'INCREMENTAL_TOLERANCE', 1.0)
+    record = train_model.train_incremental(snapshots[1], cache_path)
+    assert record['published'] is True
+    assert record['start'] == 2500 and record['holdout_rows'] == 100  # only the new snapshot's holdout
+    assert [increment.get('refit', False) for increment in read_meta(cache_path)['increments']] == [True, False]
+
+
+def test_search_models_halves_and_records_trials(tmp_path):
+    from src.processed_cache import load_processed_data
+    
+    lines = config.RAW_DATA_PATH.read_text().splitlines(keepends=True)
+    raw_path = tmp_path / 'raw.csv'
+    raw_path.write_text(''.join(lines[:1501]))
+    cache_path = tmp_path / 'processed'
+    load_processed_data(raw_path, cache_path)
+    results_path = tmp_path / 'trials.jsonl'
+    
+    name, params, records = train_model.search_models(
+        cache_path, np.arange(1500), n_jobs=2, budget=300, trials=8, eta=2,
+        min_fraction=0.25, results_path=results_path
+    )
+    
+    assert [json.loads(line) for line in results_path.read_text().splitlines()] == records
+    rungs = [[record for record in records if record['rung'] == rung] for rung in range(3)]
+    assert [len(rung) for rung in rungs] == [8, 4, 2]
+    assert [rung[0]['fraction'] for rung in rungs] == [0.25, 0.5, 1.0]
+    for rung, next_rung in zip(rungs, rungs[1:]):
+        promoted = {record['trial'] for record in rung if record['promoted']}
+        assert promoted == {record['trial'] for record in next_rung}
+    for record in records:
+        assert record['status'] == 'completed' and record['fit_seconds'] > 0
+        assert 0.0 <= record['metrics']['f1'] <= 1.0
+    best = max(rungs[-1], key=lambda record: record['metrics']['f1'])
+    assert (name, params) == (best['model'], best['params'])
+    # Every candidate's defaults are among the trials
+    assert {record['model'] for record in rungs[0] if not record['params']} == set(train_model.SEARCH_SPACES)